@@ -0,0 +1,63 @@
+"""Compare the dataclass AST with the flat-array AstArena.
+
+Reports build time, retained memory, formatting (a full traversal) and
+pickling for both representations.
+
+Usage: python -m benchmarks.bench_arena [size_in_kb]
+"""
+
+import pickle
+import sys
+import time
+import tracemalloc
+
+from kemlang.arena import parse_arena
+from kemlang.fmt import ArenaFormatter, Formatter
+from kemlang.parser import parse_program
+
+from benchmarks.generator import generate_program
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def retained_mb(fn) -> float:
+    tracemalloc.start()
+    result = fn()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / (1024 * 1024)
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    source = generate_program(size_kb * 1024, shape="expressions")
+    print(f"source: {len(source) / (1024 * 1024):.2f} MB")
+
+    program, build_objects = timed(lambda: parse_program(source, "regex"))
+    arena, build_arena = timed(lambda: parse_arena(source, "regex"))
+    print(f"  build     objects {build_objects:7.3f} s   arena {build_arena:7.3f} s")
+
+    memory_objects = retained_mb(lambda: parse_program(source, "regex"))
+    memory_arena = retained_mb(lambda: parse_arena(source, "regex"))
+    print(f"  memory    objects {memory_objects:7.1f} MB  arena {memory_arena:7.1f} MB")
+
+    _, format_objects = timed(lambda: Formatter().format_program(program))
+    _, format_arena = timed(lambda: ArenaFormatter(arena).format_program())
+    print(f"  format    objects {format_objects:7.3f} s   arena {format_arena:7.3f} s")
+
+    data_objects, pickle_objects = timed(lambda: pickle.dumps(program, pickle.HIGHEST_PROTOCOL))
+    data_arena, pickle_arena = timed(lambda: pickle.dumps(arena, pickle.HIGHEST_PROTOCOL))
+    _, unpickle_objects = timed(lambda: pickle.loads(data_objects))
+    _, unpickle_arena = timed(lambda: pickle.loads(data_arena))
+    print(f"  pickle    objects {pickle_objects:7.3f} s   arena {pickle_arena:7.3f} s")
+    print(f"  unpickle  objects {unpickle_objects:7.3f} s   arena {unpickle_arena:7.3f} s")
+    print(f"  pickled   objects {len(data_objects) / 1024:7.0f} KB  arena {len(data_arena) / 1024:7.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Report the memory retained by parsed ASTs, in bytes per KB of source.
+
+Usage: python -m benchmarks.bench_ast_memory [size_in_kb]
+"""
+
+import sys
+import tracemalloc
+
+from kemlang.lexer import tokenize
+from kemlang.parser import Parser
+
+from benchmarks.generator import SHAPES, generate_program
+
+
+def ast_bytes(source: str) -> int:
+    """Bytes still allocated by the parser once the AST is built."""
+    # Tokens are created untraced: only the tree itself is counted
+    tokens = tokenize(source, "regex")
+    tracemalloc.start()
+    program = Parser(tokens).parse()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del program
+    return retained
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    for shape in SHAPES:
+        source = generate_program(size_kb * 1024, shape=shape)
+        retained = ast_bytes(source)
+        print(f"  {shape:12} {retained / (1024 * 1024):7.2f} MB"
+              f"  {retained / (len(source) / 1024):8.0f} bytes/KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare loading a program from __kemcache__ with lexing and parsing it.
+
+Usage: python -m benchmarks.bench_cache [max_size_in_kb]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from kemlang.cache import cache_key, cache_path, compile_cached, source_digest
+from kemlang.parser import parse_program
+
+from benchmarks.generator import generate_program
+
+
+def best_time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    max_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    size_kb = 64
+    with tempfile.TemporaryDirectory() as tmpdir:
+        while size_kb <= max_kb:
+            path = Path(tmpdir) / f"prog{size_kb}.jsk"
+            data = generate_program(size_kb * 1024).encode("utf-8")
+            path.write_bytes(data)
+
+            entry = cache_path(path, cache_key(source_digest(data)))
+
+            def parse_only(data=data):
+                parse_program(data)
+
+            def compile_miss(path=path, data=data, entry=entry):
+                entry.unlink(missing_ok=True)
+                compile_cached(path, data)
+
+            def compile_hit(path=path, data=data):
+                compile_cached(path, data)
+
+            parse = best_time(parse_only)
+            miss = best_time(compile_miss)
+            hit = best_time(compile_hit)
+            print(f"  {size_kb:5} KB  parse {parse * 1000:8.1f} ms  miss {miss * 1000:8.1f} ms"
+                  f"  hit {hit * 1000:7.1f} ms  x{parse / hit:.1f}"
+                  f"  entry {entry.stat().st_size // 1024:6} KB")
+            size_kb *= 4
+
+
+if __name__ == "__main__":
+    main()
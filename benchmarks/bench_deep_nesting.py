@@ -0,0 +1,51 @@
+"""Stress the parsers with deeply nested blocks and expressions.
+
+Usage: python -m benchmarks.bench_deep_nesting [max_depth]
+"""
+
+import sys
+import time
+
+from kemlang.lexer import tokenize
+from kemlang.parser import PARSER_MODES
+
+
+def nested_blocks(depth: int) -> str:
+    return ("kem bhai\n" + "jo bhai chhe {\nfarvu {\n" * (depth // 2)
+            + "bhai bol 1\n" + "tame jao\n} jya sudhi bhai nathi\n}\n" * (depth // 2) + "aavjo bhai")
+
+
+def nested_parens(depth: int) -> str:
+    return "kem bhai\nbhai bol " + "(1 + " * depth + "1" + ")" * depth + "\naavjo bhai"
+
+
+def nested_unary(depth: int) -> str:
+    return "kem bhai\nbhai bol " + "- " * depth + "1\naavjo bhai"
+
+
+SHAPES = {"blocks": nested_blocks, "parens": nested_parens, "unary": nested_unary}
+
+
+def main() -> None:
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sys.setrecursionlimit(10_000)
+    for name, build in SHAPES.items():
+        depth = 1000
+        while depth <= max_depth:
+            tokens = tokenize(build(depth), "regex")
+            row = [f"{name:7} depth {depth:8}"]
+            for mode, parser_class in PARSER_MODES.items():
+                start = time.perf_counter()
+                try:
+                    parser_class(tokens).parse()
+                except RecursionError:
+                    row.append(f"{mode} RecursionError")
+                    continue
+                elapsed = time.perf_counter() - start
+                row.append(f"{mode} {elapsed:7.3f} s ({elapsed / depth * 1e6:5.2f} us/level)")
+            print("  ".join(row))
+            depth *= 4
+
+
+if __name__ == "__main__":
+    main()
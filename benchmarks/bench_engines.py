@@ -0,0 +1,75 @@
+"""Compare execution engines on loop and arithmetic workloads.
+
+Usage: python -m benchmarks.bench_engines [scale]
+"""
+
+import sys
+import time
+
+from kemlang.interpreter import EXECUTION_ENGINES, engine_class
+from kemlang.parser import parse_program
+
+from benchmarks.generator import generate_program
+
+
+def workloads(scale: int) -> dict:
+    return {
+        "count": f'''kem bhai
+aa i che 0
+aa total che 0
+farvu {{
+  total che total + i * 2 - 1
+  i che i + 1
+}} jya sudhi i < {20000 * scale}
+bhai bol total
+aavjo bhai''',
+        "primes": f'''kem bhai
+aa n che 2
+aa found che 0
+farvu {{
+  aa d che 2
+  aa prime che bhai chhe
+  farvu {{
+    jo n % d == 0 {{ prime che bhai nathi  tame jao }}
+    d che d + 1
+  }} jya sudhi d * d <= n
+  jo prime {{ found che found + 1 }}
+  n che n + 1
+}} jya sudhi n < {2000 * scale}
+bhai bol found
+aavjo bhai''',
+        "nested": f'''kem bhai
+aa i che 0
+aa acc che 0
+farvu {{
+  aa j che 0
+  farvu {{
+    jo (i + j) % 3 == 0 {{ acc che acc + 1 }} nahi to {{ acc che acc - 1 }}
+    j che j + 1
+  }} jya sudhi j < 100
+  i che i + 1
+}} jya sudhi i < {100 * scale}
+bhai bol acc
+aavjo bhai''',
+        "generated": generate_program(64 * 1024 * scale),
+    }
+
+
+def main() -> None:
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    for name, source in workloads(scale).items():
+        program = parse_program(source)
+        row = [f"{name:10}"]
+        baseline = None
+        for engine in EXECUTION_ENGINES:
+            output = []
+            start = time.perf_counter()
+            engine_class(engine)(lambda: "", output.append).interpret(program)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            row.append(f"{engine} {elapsed * 1000:8.1f} ms (x{baseline / elapsed:.1f})")
+        print("  ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Compare lexer engine throughput on a synthetic KemLang program.
+
+Usage: python -m benchmarks.bench_lexer [size_in_kb]
+"""
+
+import sys
+import time
+
+from kemlang.lexer import LEXER_ENGINES, tokenize
+
+from benchmarks.generator import generate_program
+
+
+def build_program(size_kb: int) -> str:
+    return generate_program(size_kb * 1024)
+
+
+def measure(source: str, engine: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokenize(source, engine)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    source = build_program(size_kb)
+    megabytes = len(source.encode("utf-8")) / (1024 * 1024)
+
+    print(f"source: {megabytes:.2f} MB, {len(tokenize(source, 'regex'))} tokens")
+    for engine in LEXER_ENGINES:
+        elapsed = measure(source, engine)
+        print(f"  {engine:8} {elapsed:8.3f} s  {megabytes / elapsed:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
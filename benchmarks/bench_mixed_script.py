@@ -0,0 +1,62 @@
+"""Compare lexing of ASCII programs with Gujarati-script and mixed-script versions.
+
+Usage: python -m benchmarks.bench_mixed_script [size_in_kb]
+"""
+
+import random
+import sys
+import time
+
+from kemlang.lexer import GUJARATI_KEYWORDS, LEXER_ENGINES, tokenize
+from kemlang.types import TokenType
+
+from benchmarks.generator import generate_program
+
+
+GUJARATI = dict((token_type, phrase) for phrase, token_type in GUJARATI_KEYWORDS)
+
+
+def transliterate(source: str, share: float, seed: int = 0) -> str:
+    """Rewrite ``share`` of the keywords and identifiers in Gujarati script."""
+    rng = random.Random(seed)
+    parts = []
+    pos = 0
+    for token in tokenize(source, "regex"):
+        if rng.random() >= share:
+            continue
+        if token.type is TokenType.IDENTIFIER:
+            replacement = "ચલ" + token.lexeme[1:]
+        elif token.type in GUJARATI:
+            replacement = GUJARATI[token.type]
+        else:
+            continue
+        parts.append(source[pos:token.offset])
+        parts.append(replacement)
+        pos = token.offset + len(token.lexeme)
+    parts.append(source[pos:])
+    return "".join(parts)
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    ascii_source = generate_program(size_kb * 1024)
+    variants = {
+        "ascii": ascii_source,
+        "mixed": transliterate(ascii_source, 0.5),
+        "gujarati": transliterate(ascii_source, 1.0),
+    }
+
+    for name, source in variants.items():
+        count = len(tokenize(source, "regex"))
+        row = [f"{name:9} {count:7} tokens"]
+        for engine in list(LEXER_ENGINES) + ["bytes"]:
+            data = source.encode("utf-8") if engine == "bytes" else source
+            start = time.perf_counter()
+            tokenize(data, "regex" if engine == "bytes" else engine)
+            elapsed = time.perf_counter() - start
+            row.append(f"{engine} {count / elapsed / 1000:7.0f} Ktok/s")
+        print("  ".join(row))
+
+
+if __name__ == "__main__":
+    main()
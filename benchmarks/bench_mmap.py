@@ -0,0 +1,53 @@
+"""Compare lexing a file from read_text() against the memory-mapped bytes path.
+
+Usage: python -m benchmarks.bench_mmap [size_in_mb]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+from kemlang.lexer import iter_tokens
+from kemlang.source import load_source
+
+from benchmarks.bench_lexer import build_program
+
+
+def from_text(path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    deque(iter_tokens(source, "regex"), maxlen=0)
+
+
+def from_mmap(path: str) -> None:
+    deque(iter_tokens(load_source(path)), maxlen=0)
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    fd, path = tempfile.mkstemp(suffix=".jsk")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(build_program(size_mb * 1024))
+
+    try:
+        print(f"file: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+        for fn in (from_text, from_mmap):
+            start = time.perf_counter()
+            fn(path)
+            elapsed = time.perf_counter() - start
+
+            # Separate traced run: tracemalloc distorts timings
+            tracemalloc.start()
+            fn(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {fn.__name__:10} {elapsed:7.2f} s  heap peak {peak / (1024 * 1024):7.1f} MB")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
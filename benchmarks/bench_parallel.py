@@ -0,0 +1,48 @@
+"""Measure parallel chunked tokenization speedup by worker count.
+
+Usage: python -m benchmarks.bench_parallel [size_in_mb] [chunk_size_in_kb]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from kemlang.parallel import tokenize_buffer_parallel
+from kemlang.tokenbuffer import tokenize_buffer
+
+from benchmarks.generator import generate_program
+
+
+def best_time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    chunk_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    source = generate_program(size_mb * 1024 * 1024)
+    megabytes = len(source) / (1024 * 1024)
+
+    serial = best_time(lambda: tokenize_buffer(source))
+    print(f"source: {megabytes:.1f} MB, chunks of {chunk_kb} KB, {os.cpu_count()} CPUs")
+    print(f"  serial     {serial:7.3f} s  {megabytes / serial:7.2f} MB/s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        # Pool start-up is excluded: a long-lived tool would keep its pool
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            elapsed = best_time(lambda: tokenize_buffer_parallel(
+                source, chunk_size=chunk_kb * 1024, executor=pool))
+        print(f"  {workers:2} workers {elapsed:7.3f} s  {megabytes / elapsed:7.2f} MB/s"
+              f"  x{serial / elapsed:.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
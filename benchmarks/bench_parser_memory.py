@@ -0,0 +1,44 @@
+"""Compare peak parser memory for eager token lists vs. streamed tokens.
+
+Usage: python -m benchmarks.bench_parser_memory [size_in_kb]
+"""
+
+import sys
+import tracemalloc
+
+from kemlang.lexer import tokenize
+from kemlang.parser import Parser, parse_program
+from kemlang.types import TokenType
+
+from benchmarks.bench_lexer import build_program
+
+
+def eager(source: str) -> None:
+    # What parse_program used to do: full token list plus a filtered copy
+    tokens = tokenize(source, "regex")
+    filtered = [t for t in tokens if t.type != TokenType.NEWLINE]
+    Parser(filtered).parse()
+
+
+def streamed(source: str) -> None:
+    parse_program(source, "regex")
+
+
+def peak_mb(fn, source: str) -> float:
+    tracemalloc.start()
+    fn(source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    source = build_program(size_kb)
+    print(f"source: {len(source) / (1024 * 1024):.2f} MB")
+    for fn in (eager, streamed):
+        print(f"  {fn.__name__:8} peak {peak_mb(fn, source):8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
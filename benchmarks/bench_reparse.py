@@ -0,0 +1,47 @@
+"""Compare incremental reparsing after a small edit with a full reparse.
+
+Usage: python -m benchmarks.bench_reparse [max_size_in_kb]
+"""
+
+import sys
+import time
+
+from kemlang.incremental import parse_source, reparse
+
+from benchmarks.generator import generate_program
+
+
+def best_time(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    max_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    size_kb = 64
+    while size_kb <= max_kb:
+        source = generate_program(size_kb * 1024)
+        parsed = parse_source(source)
+        # Rename a variable in the middle of the file
+        offset = source.index("\naa ", len(source) // 2) + len("\naa ")
+        edited = source[:offset] + "z" + source[offset:]
+
+        def full_parse(edited=edited):
+            parse_source(edited)
+
+        def incremental_parse(parsed=parsed, offset=offset):
+            reparse(parsed, offset, 0, "z")
+
+        full = best_time(full_parse, repeat=1)
+        incremental = best_time(incremental_parse)
+        print(f"  {size_kb:5} KB  full {full * 1000:9.1f} ms  incremental {incremental * 1000:7.2f} ms"
+              f"  x{full / incremental:.0f}")
+        size_kb *= 4
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Count scope allocations on the loop workloads of bench_engines.
+
+Usage: python -m benchmarks.bench_scopes [scale]
+"""
+
+import sys
+import time
+
+from kemlang.interpreter import Environment, engine_class
+from kemlang.parser import parse_program
+
+from benchmarks.bench_engines import workloads
+
+
+ENGINES = ("tree", "slots", "vm", "closure")
+
+
+def count_environments(fn) -> int:
+    """Run ``fn`` and return how many Environments it created."""
+    created = 0
+    init = Environment.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal created
+        created += 1
+        init(self, *args, **kwargs)
+
+    Environment.__init__ = counting_init
+    try:
+        fn()
+    finally:
+        Environment.__init__ = init
+    return created
+
+
+def main() -> None:
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    for name, source in workloads(scale).items():
+        if name == "generated":
+            continue
+        program = parse_program(source)
+        row = [f"{name:8}"]
+        for engine in ENGINES:
+            def run(engine=engine, program=program):
+                engine_class(engine)(lambda: "", lambda text: None).interpret(program)
+
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            # Slot frames are plain lists, so only Environment engines are counted
+            count = f"{count_environments(run):7} envs" if engine != "slots" else " " * 12
+            row.append(f"{engine} {elapsed * 1000:7.1f} ms {count}")
+        print("  ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Measure lexing of programs with large embedded text blocks.
+
+Usage: python -m benchmarks.bench_strings
+"""
+
+import time
+
+from kemlang.lexer import LEXER_ENGINES, tokenize
+
+
+def build_program(block_chars: int, blocks: int = 4) -> str:
+    text = ("lorem ipsum dolor \\n sit \\\"amet\\\" " * (block_chars // 34 + 1))[:block_chars]
+    text = text.rstrip("\\")
+    lines = [f'aa block{i} che "{text}"\nbhai bol block{i}' for i in range(blocks)]
+    return "kem bhai\n" + "\n".join(lines) + "\naavjo bhai\n"
+
+
+def main() -> None:
+    for block_chars in (10_000, 100_000, 1_000_000):
+        source = build_program(block_chars)
+        row = [f"{block_chars:>9} chars/block"]
+        for engine in LEXER_ENGINES:
+            start = time.perf_counter()
+            tokenize(source, engine)
+            row.append(f"{engine} {time.perf_counter() - start:7.3f} s")
+        print("  ".join(row))
+
+
+if __name__ == "__main__":
+    main()
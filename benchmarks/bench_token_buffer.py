@@ -0,0 +1,37 @@
+"""Compare memory held by a List[Token] against a TokenBuffer.
+
+Usage: python -m benchmarks.bench_token_buffer [size_in_kb]
+"""
+
+import sys
+import tracemalloc
+
+from kemlang.lexer import tokenize
+from kemlang.tokenbuffer import tokenize_buffer
+
+from benchmarks.bench_lexer import build_program
+
+
+def retained_mb(fn, source: str):
+    tracemalloc.start()
+    result = fn(source)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained / (1024 * 1024)
+
+
+def main() -> None:
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    source = build_program(size_kb)
+    print(f"source: {len(source) / (1024 * 1024):.2f} MB")
+
+    tokens, list_mb = retained_mb(lambda s: tokenize(s, "regex"), source)
+    print(f"  List[Token]  {len(tokens)} tokens  {list_mb:8.1f} MB")
+    del tokens
+
+    buffer, buffer_mb = retained_mb(tokenize_buffer, source)
+    print(f"  TokenBuffer  {len(buffer)} tokens  {buffer_mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
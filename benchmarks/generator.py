@@ -0,0 +1,171 @@
+"""Seeded, grammar-aware generator of synthetic KemLang programs.
+
+Generated programs are valid end to end: they lex, parse, format and run
+to completion. Variables are declared before use, arithmetic only touches
+integers (kept small with a trailing modulo), divisors are never zero
+and every loop runs a bounded number of times.
+"""
+
+import random
+from typing import Dict, List, Optional
+
+
+SHAPES = ("mixed", "deep", "expressions", "declarations", "strings")
+
+_WORDS = ["kem", "cho", "majama", "bhai", "dhokla", "khaman", "garba", "chai", "navratri"]
+_ARITHMETIC = ["+", "-", "*"]
+_COMPARISON = ["==", "!=", "<", ">", "<=", ">="]
+
+
+class ProgramGenerator:
+    """Emit KemLang programs of roughly a target size and a given shape.
+
+    Shapes:
+      mixed         a blend of everything below
+      deep          deeply nested ``jo`` / ``farvu`` blocks
+      expressions   long arithmetic and comparison expressions
+      declarations  many variable declarations and assignments
+      strings       large string literals
+    """
+
+    def __init__(self, seed: int = 0, shape: str = "mixed", max_depth: int = 40,
+                 expression_terms: int = 60, string_chars: int = 4096):
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape '{shape}', expected one of {', '.join(SHAPES)}")
+        self.rng = random.Random(seed)
+        self.shape = shape
+        self.max_depth = max_depth
+        self.expression_terms = expression_terms
+        self.string_chars = string_chars
+        self.counter = 0
+        # One dict per open block: variable name -> "int", "str" or "counter"
+        self.scopes: List[Dict[str, str]] = [{}]
+        self.lines: List[str] = []
+        self.size = 0
+
+    def generate(self, target_bytes: int) -> str:
+        self.emit(0, "kem bhai")
+        while self.size < target_bytes:
+            self.statement(0)
+        self.emit(0, "aavjo bhai")
+        return "\n".join(self.lines) + "\n"
+
+    # Output helpers
+    def emit(self, depth: int, text: str):
+        line = "  " * depth + text
+        self.lines.append(line)
+        self.size += len(line) + 1
+
+    def fresh_name(self) -> str:
+        self.counter += 1
+        return f"v{self.counter}"
+
+    def variables(self, *kinds: str) -> List[str]:
+        names = []
+        for scope in self.scopes:
+            names.extend(name for name, kind in scope.items() if kind in kinds)
+        return names
+
+    # Statements
+    def statement(self, depth: int):
+        shape = self.shape
+        if shape == "mixed":
+            shape = self.rng.choice(SHAPES[1:])
+
+        if shape == "deep":
+            self.nested(depth, self.max_depth)
+        elif shape == "expressions":
+            self.declare(depth, "int", self.int_expression(self.expression_terms))
+            self.emit(depth, f"bhai bol {self.comparison(self.expression_terms // 2)}")
+        elif shape == "declarations":
+            for _ in range(20):
+                self.simple_statement(depth)
+        else:
+            self.declare(depth, "str", self.string_literal(self.string_chars))
+            self.emit(depth, f"bhai bol {self.rng.choice(self.variables('str'))}")
+
+    def simple_statement(self, depth: int):
+        ints = self.variables("int")
+        choice = self.rng.random()
+        if not ints or choice < 0.4:
+            self.declare(depth, "int", self.int_expression(4))
+        elif choice < 0.6:
+            self.declare(depth, "str", self.string_literal(24))
+        elif choice < 0.85:
+            self.emit(depth, f"{self.rng.choice(ints)} che {self.int_expression(4)}")
+        else:
+            self.emit(depth, f"bhai bol {self.rng.choice(ints)}")
+
+    def declare(self, depth: int, kind: str, value: str) -> str:
+        name = self.fresh_name()
+        self.emit(depth, f"aa {name} che {value}")
+        self.scopes[-1][name] = kind
+        return name
+
+    def nested(self, depth: int, remaining: int):
+        """Open ``remaining`` levels of alternating if/loop blocks."""
+        self.simple_statement(depth)
+        if remaining == 0:
+            return
+
+        if self.rng.random() < 0.5:
+            self.scopes.append({})
+            self.emit(depth, f"jo {self.comparison(3)} {{")
+            self.nested(depth + 1, remaining - 1)
+            self.scopes[-1] = {}
+            self.emit(depth, "} nahi to {")
+            self.simple_statement(depth + 1)
+            self.emit(depth, "}")
+        else:
+            # Loop counters are never reassigned elsewhere, and nested
+            # loops run once each so run time stays linear in size
+            counter = self.declare(depth, "counter", "0")
+            self.scopes.append({})
+            self.emit(depth, "farvu {")
+            self.emit(depth + 1, f"{counter} che {counter} + 1")
+            self.nested(depth + 1, remaining - 1)
+            self.emit(depth, f"}} jya sudhi {counter} < 1")
+        self.scopes.pop()
+
+    # Expressions
+    def int_operand(self) -> str:
+        ints = self.variables("int", "counter")
+        if ints and self.rng.random() < 0.5:
+            return self.rng.choice(ints)
+        return str(self.rng.randint(0, 999))
+
+    def int_expression(self, terms: int) -> str:
+        parts = [self.int_operand()]
+        for _ in range(terms - 1):
+            op = self.rng.choice(_ARITHMETIC)
+            operand = self.int_operand()
+            if self.rng.random() < 0.1:
+                # Divisors are non-zero literals; "/" would produce floats
+                op, operand = "%", str(self.rng.randint(1, 9))
+            elif self.rng.random() < 0.1:
+                operand = f"({operand} - {self.int_operand()})"
+            parts.append(f"{op} {operand}")
+        if terms == 1:
+            return parts[0]
+        # Keeps values bounded however often variables feed back into themselves
+        return f"({' '.join(parts)}) % 1009"
+
+    def comparison(self, terms: int) -> str:
+        return f"{self.int_expression(terms)} {self.rng.choice(_COMPARISON)} {self.int_expression(terms)}"
+
+    def string_literal(self, chars: int) -> str:
+        words: List[str] = []
+        length = 0
+        while length < chars:
+            word = self.rng.choice(_WORDS)
+            if self.rng.random() < 0.05:
+                word += "\\n"
+            words.append(word)
+            length += len(word) + 1
+        return '"' + " ".join(words) + '"'
+
+
+def generate_program(target_bytes: int, shape: str = "mixed", seed: int = 0,
+                     **options: Optional[int]) -> str:
+    """Generate a valid program of at least ``target_bytes`` characters."""
+    return ProgramGenerator(seed, shape, **options).generate(target_bytes)  # type: ignore[arg-type]
@@ -0,0 +1,160 @@
+"""Front-end throughput suite: tokenize, parse and format generated programs.
+
+For every stage, program shape and size it records wall time (best of
+``--repeat`` runs), tokens/s, MB/s and peak traced memory, and fits a
+scaling exponent per stage and shape (1.0 means linear in input size).
+Results are written as JSON so runs can be diffed across commits.
+
+Usage: python -m benchmarks.runner [--sizes 64,256,1024] [--shapes mixed,deep]
+                                   [--stages tokenize,parse] [--output FILE]
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from kemlang.fmt import format_code
+from kemlang.lexer import iter_tokens, tokenize
+from kemlang.parser import parse_program
+from kemlang.tokenbuffer import tokenize_buffer
+from kemlang.version import __version__
+
+from benchmarks.generator import SHAPES, generate_program
+
+
+STAGES: Dict[str, Callable[[str], Any]] = {
+    "tokenize": lambda source: tokenize(source, "classic"),
+    "tokenize-regex": lambda source: tokenize(source, "regex"),
+    "tokenize-stream": lambda source: deque(iter_tokens(source, "regex"), maxlen=0),
+    "tokenize-buffer": tokenize_buffer,
+    "parse": lambda source: parse_program(source, "regex"),
+    "format": format_code,
+}
+
+
+def best_time(fn: Callable[[str], Any], source: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(fn: Callable[[str], Any], source: str) -> int:
+    # Traced separately: tracemalloc slows allocation-heavy code a lot
+    tracemalloc.start()
+    try:
+        fn(source)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def scaling_exponent(points: List[Dict[str, Any]]) -> float:
+    """Least-squares slope of log(seconds) against log(bytes)."""
+    xs = [math.log(p["bytes"]) for p in points]
+    ys = [math.log(p["seconds"]) for p in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if spread == 0:
+        return float("nan")
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys, strict=True)) / spread
+
+
+def run_suite(sizes_kb: List[int], shapes: List[str], stages: List[str],
+              repeat: int = 3, seed: int = 0, memory: bool = True) -> Dict[str, Any]:
+    results = []
+    curves = []
+    for shape in shapes:
+        programs = [generate_program(size * 1024, shape, seed) for size in sizes_kb]
+        token_counts = [len(tokenize_buffer(source)) for source in programs]
+
+        for stage in stages:
+            fn = STAGES[stage]
+            points = []
+            for source, token_count in zip(programs, token_counts, strict=True):
+                size = len(source.encode("utf-8"))
+                seconds = best_time(fn, source, repeat)
+                row = {
+                    "stage": stage,
+                    "shape": shape,
+                    "bytes": size,
+                    "tokens": token_count,
+                    "seconds": seconds,
+                    "tokens_per_s": token_count / seconds,
+                    "mb_per_s": size / (1024 * 1024) / seconds,
+                    "peak_bytes": peak_memory(fn, source) if memory else None,
+                }
+                results.append(row)
+                points.append(row)
+                print(f"{stage:16} {shape:13} {size / 1024:9.0f} KB {seconds:8.3f} s "
+                      f"{row['mb_per_s']:7.2f} MB/s", file=sys.stderr)
+
+            curves.append({
+                "stage": stage,
+                "shape": shape,
+                "points": [[p["bytes"], p["seconds"]] for p in points],
+                "exponent": scaling_exponent(points) if len(points) > 1 else None,
+            })
+
+    return {
+        "meta": {
+            "kemlang": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+        "scaling": curves,
+    }
+
+
+def _list(value: str) -> List[str]:
+    return [item for item in value.split(",") if item]
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="64,256,1024", help="program sizes in KB")
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced memory runs")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    for name, known, values in (("shape", SHAPES, _list(args.shapes)),
+                                ("stage", STAGES, _list(args.stages))):
+        unknown = [value for value in values if value not in known]
+        if unknown:
+            parser.error(f"unknown {name}: {', '.join(unknown)}")
+
+    report = run_suite(
+        [int(size) for size in _list(args.sizes)],
+        _list(args.shapes),
+        _list(args.stages),
+        repeat=args.repeat,
+        seed=args.seed,
+        memory=not args.no_memory,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
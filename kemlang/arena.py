@@ -0,0 +1,262 @@
+from array import array
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Tuple
+
+from .types import (
+    ASTNode, Program, Block, KemValue,
+    Print, Declaration, Assignment, If, While, Break, Continue,
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
+)
+from .lexer import iter_tokens
+from .parser import Parser
+from .source import SourceData
+
+
+class NodeKind(IntEnum):
+    PROGRAM = 0
+    BLOCK = 1
+    PRINT = 2
+    DECLARATION = 3
+    ASSIGNMENT = 4
+    IF = 5
+    WHILE = 6
+    BREAK = 7
+    CONTINUE = 8
+    BINARY = 9
+    UNARY = 10
+    LITERAL = 11
+    VARIABLE = 12
+    INPUT = 13
+
+
+class AstArena:
+    """Flat-array AST storage.
+
+    Node ``i`` is ``kinds[i]`` plus three operand slots ``first[i]``,
+    ``second[i]`` and ``third[i]`` and the source offset of its operator or
+    name (-1 for other nodes). Children always have smaller indices than
+    their parent, so the program is the last node. The slots hold, by kind:
+
+    ==============  ===============  ===========  ==============
+    kind            first            second       third
+    ==============  ===============  ===========  ==============
+    PROGRAM, BLOCK  start in lists   count        -
+    PRINT           expression       -            -
+    DECLARATION     name slot        initializer  -
+    ASSIGNMENT      name slot        value        -
+    IF              condition        then block   else block/-1
+    WHILE           body             condition    -
+    BINARY          left             right        BinaryOp code
+    UNARY           operand          -            UnaryOp code
+    LITERAL         literal slot     -            -
+    VARIABLE        name slot        -            -
+    ==============  ===============  ===========  ==============
+
+    Statement lists are runs of node indices in ``lists``; literal values
+    and variable names live in the ``literals`` and ``names`` side tables,
+    with equal values sharing a slot.
+    """
+
+    def __init__(self) -> None:
+        self.kinds = array('B')
+        self.first = array('i')
+        self.second = array('i')
+        self.third = array('i')
+        self.offsets = array('i')
+        self.lists = array('i')
+        self.literals: List[KemValue] = []
+        self.names: List[str] = []
+        # Keyed by (type, value) so that True and 1 get separate slots
+        self._literal_slots: Dict[Tuple[type, Any], int] = {}
+        self._name_slots: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The slot lookups are rebuilt on load rather than pickled
+        state = self.__dict__.copy()
+        del state["_literal_slots"], state["_name_slots"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._literal_slots = {(value.__class__, value): slot for slot, value in enumerate(self.literals)}
+        self._name_slots = {name: slot for slot, name in enumerate(self.names)}
+
+    @property
+    def root(self) -> int:
+        return len(self.kinds) - 1
+
+    def add(self, kind: NodeKind, first: int = -1, second: int = -1,
+            third: int = -1, offset: int = -1) -> int:
+        """Append a node and return its index."""
+        self.kinds.append(kind)
+        self.first.append(first)
+        self.second.append(second)
+        self.third.append(third)
+        self.offsets.append(offset)
+        return len(self.kinds) - 1
+
+    def add_list(self, kind: NodeKind, nodes: List[int]) -> int:
+        """Append a PROGRAM or BLOCK node over already added statements."""
+        start = len(self.lists)
+        self.lists.extend(nodes)
+        return self.add(kind, start, len(nodes))
+
+    def literal_slot(self, value: Any) -> int:
+        key = (value.__class__, value)
+        slot = self._literal_slots.get(key)
+        if slot is None:
+            slot = self._literal_slots[key] = len(self.literals)
+            self.literals.append(value)
+        return slot
+
+    def name_slot(self, name: str) -> int:
+        slot = self._name_slots.get(name)
+        if slot is None:
+            slot = self._name_slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+    def statements(self, node: int) -> array:
+        """Statement node indices of a PROGRAM or BLOCK node."""
+        start = self.first[node]
+        return self.lists[start:start + self.second[node]]
+
+    # Conversion from and to the dataclass AST
+    @classmethod
+    def from_program(cls, program: Program) -> "AstArena":
+        arena = cls()
+        arena.add_list(NodeKind.PROGRAM, [arena.add_node(stmt) for stmt in program.statements])
+        return arena
+
+    def add_node(self, node: ASTNode) -> int:
+        """Append ``node`` and its children; returns the index of ``node``."""
+        add = self.add
+        if isinstance(node, Binary):
+            left = self.add_node(node.left)
+            return add(NodeKind.BINARY, left, self.add_node(node.right), node.operator, node.offset)
+        if isinstance(node, Literal):
+            return add(NodeKind.LITERAL, self.literal_slot(node.value))
+        if isinstance(node, Variable):
+            return add(NodeKind.VARIABLE, self.name_slot(node.name), offset=node.offset)
+        if isinstance(node, Unary):
+            return add(NodeKind.UNARY, self.add_node(node.right), -1, node.operator, node.offset)
+        if isinstance(node, Input):
+            return add(NodeKind.INPUT)
+        if isinstance(node, Print):
+            return add(NodeKind.PRINT, self.add_node(node.expression))
+        if isinstance(node, Declaration):
+            return add(NodeKind.DECLARATION, self.name_slot(node.name), self.add_node(node.initializer),
+                       offset=node.offset)
+        if isinstance(node, Assignment):
+            return add(NodeKind.ASSIGNMENT, self.name_slot(node.name), self.add_node(node.value),
+                       offset=node.offset)
+        if isinstance(node, If):
+            condition = self.add_node(node.condition)
+            then_branch = self.add_node(node.then_branch)
+            else_branch = self.add_node(node.else_branch) if node.else_branch is not None else -1
+            return add(NodeKind.IF, condition, then_branch, else_branch)
+        if isinstance(node, While):
+            body = self.add_node(node.body)
+            return add(NodeKind.WHILE, body, self.add_node(node.condition))
+        if isinstance(node, Block):
+            return self.add_list(NodeKind.BLOCK, [self.add_node(stmt) for stmt in node.statements])
+        if isinstance(node, Break):
+            return add(NodeKind.BREAK)
+        if isinstance(node, Continue):
+            return add(NodeKind.CONTINUE)
+        raise TypeError(f"Unknown AST node type: {type(node).__name__}")
+
+    def to_program(self) -> Program:
+        # from_program adds the Program node last
+        return _ProgramBuilder(self).visit_program(self.root)
+
+
+class ArenaVisitor:
+    """Walks an :class:`AstArena` by node index, without node objects.
+
+    :meth:`visit` dispatches on the node kind to ``visit_<kind>(node)``,
+    e.g. ``visit_binary``; kinds without a method go to
+    :meth:`generic_visit`. Methods read operands from ``self.arena``.
+    """
+
+    def __init__(self, arena: AstArena):
+        self.arena = arena
+        self._dispatch: Tuple[Callable[[int], Any], ...] = tuple(
+            getattr(self, "visit_" + kind.name.lower(), self.generic_visit) for kind in NodeKind)
+
+    def visit(self, node: int) -> Any:
+        return self._dispatch[self.arena.kinds[node]](node)
+
+    def generic_visit(self, node: int) -> Any:
+        raise NotImplementedError(f"No visitor for {NodeKind(self.arena.kinds[node]).name} nodes")
+
+
+class _ProgramBuilder(ArenaVisitor):
+    """Rebuilds the dataclass AST from an arena."""
+
+    def visit_program(self, node: int) -> Program:
+        return Program([self.visit(stmt) for stmt in self.arena.statements(node)])
+
+    def visit_block(self, node: int) -> Block:
+        return Block([self.visit(stmt) for stmt in self.arena.statements(node)])
+
+    def visit_print(self, node: int) -> Print:
+        return Print(self.visit(self.arena.first[node]))
+
+    def visit_declaration(self, node: int) -> Declaration:
+        arena = self.arena
+        return Declaration(arena.names[arena.first[node]], self.visit(arena.second[node]),
+                           arena.offsets[node])
+
+    def visit_assignment(self, node: int) -> Assignment:
+        arena = self.arena
+        return Assignment(arena.names[arena.first[node]], self.visit(arena.second[node]),
+                          arena.offsets[node])
+
+    def visit_if(self, node: int) -> If:
+        arena = self.arena
+        else_branch = arena.third[node]
+        return If(self.visit(arena.first[node]), self.visit(arena.second[node]),
+                  self.visit(else_branch) if else_branch >= 0 else None)
+
+    def visit_while(self, node: int) -> While:
+        return While(self.visit(self.arena.first[node]), self.visit(self.arena.second[node]))
+
+    def visit_break(self, node: int) -> Break:
+        return Break()
+
+    def visit_continue(self, node: int) -> Continue:
+        return Continue()
+
+    def visit_binary(self, node: int) -> Binary:
+        arena = self.arena
+        return Binary(self.visit(arena.first[node]), BinaryOp(arena.third[node]),
+                      self.visit(arena.second[node]), arena.offsets[node])
+
+    def visit_unary(self, node: int) -> Unary:
+        arena = self.arena
+        return Unary(UnaryOp(arena.third[node]), self.visit(arena.first[node]), arena.offsets[node])
+
+    def visit_literal(self, node: int) -> Literal:
+        return Literal(self.arena.literals[self.arena.first[node]])
+
+    def visit_variable(self, node: int) -> Variable:
+        return Variable(self.arena.names[self.arena.first[node]], self.arena.offsets[node])
+
+    def visit_input(self, node: int) -> Input:
+        return Input()
+
+
+def parse_arena(source: SourceData, engine: str = "classic") -> AstArena:
+    """Parse source code straight into an :class:`AstArena`.
+
+    Top-level statements are moved into the arena as soon as they are
+    parsed, so only one statement's node objects exist at a time.
+    """
+    arena = AstArena()
+    statements = [arena.add_node(stmt) for stmt in Parser(iter_tokens(source, engine)).iter_statements()]
+    arena.add_list(NodeKind.PROGRAM, statements)
+    return arena
@@ -0,0 +1,155 @@
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from typing import BinaryIO, List, Mapping, Optional, Tuple
+
+from .arena import AstArena
+from .parser import parse_program
+from .source import SourceData
+from .types import Program
+from .version import __version__
+
+
+CACHE_DIR = "__kemcache__"
+CACHE_SUFFIX = ".kemc"
+
+# Bump when the entry layout or the arena encoding changes
+_MAGIC = b"KEMC\x01"
+_ARRAYS = ("kinds", "first", "second", "third", "offsets", "lists")
+
+Options = Mapping[str, str]
+
+
+def source_digest(data: SourceData) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _options_key(options: Optional[Options]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((options or {}).items()))
+
+
+def cache_key(digest: str, options: Optional[Options] = None) -> str:
+    """Key of a compiled program: source hash, KemLang version and options."""
+    key = repr((digest, __version__, _options_key(options)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_path(path: Path, key: str) -> Path:
+    """``dir/__kemcache__/<name>.<key>.kemc`` for the source file ``dir/<name>``."""
+    return path.parent / CACHE_DIR / f"{path.name}.{key}{CACHE_SUFFIX}"
+
+
+def _header(digest: str, options: Optional[Options]) -> tuple:
+    return (__version__, sys.byteorder, digest, _options_key(options))
+
+
+def _read_header(f: BinaryIO) -> Optional[tuple]:
+    if f.read(len(_MAGIC)) != _MAGIC:
+        return None
+    header = marshal.load(f)
+    return header if isinstance(header, tuple) and len(header) == 4 else None
+
+
+def write_entry(target: Path, arena: AstArena, digest: str,
+                options: Optional[Options] = None) -> None:
+    """Write an arena to ``target`` atomically.
+
+    The entry is written to a temporary file in the same directory and
+    renamed into place, so concurrent readers and writers only ever see
+    complete entries.
+    """
+    target.parent.mkdir(exist_ok=True)
+    body = tuple(getattr(arena, name).tobytes() for name in _ARRAYS) + (arena.literals, arena.names)
+    fd, temporary = tempfile.mkstemp(suffix=".tmp", dir=target.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC)
+            marshal.dump(_header(digest, options), f)
+            marshal.dump(body, f)
+        os.replace(temporary, target)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(temporary)
+        raise
+
+
+def read_entry(target: Path, digest: str, options: Optional[Options] = None) -> Optional[AstArena]:
+    """Load the arena stored at ``target``, or None if it is missing or stale."""
+    arena = AstArena()
+    try:
+        with open(target, "rb") as f:
+            if _read_header(f) != _header(digest, options):
+                return None
+            body = marshal.load(f)
+        # A truncated or foreign body is a miss, not an error
+        for name, data in zip(_ARRAYS, body[:len(_ARRAYS)], strict=True):
+            getattr(arena, name).frombytes(data)
+        arena.literals, arena.names = body[len(_ARRAYS):]
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return arena
+
+
+def compile_cached(path: Path, data: SourceData, options: Optional[Options] = None,
+                   engine: str = "classic") -> Program:
+    """Parse the file ``path`` holding ``data``, going through ``__kemcache__``.
+
+    Errors writing the cache are ignored, like with ``__pycache__``: a
+    read-only checkout still runs, it just parses every time.
+    """
+    digest = source_digest(data)
+    target = cache_path(path, cache_key(digest, options))
+    arena = read_entry(target, digest, options)
+    if arena is not None:
+        return arena.to_program()
+
+    program = parse_program(data, engine)
+    try:
+        write_entry(target, AstArena.from_program(program), digest, options)
+    except OSError:
+        pass
+    return program
+
+
+def _is_stale(entry: Path) -> bool:
+    if entry.suffix != CACHE_SUFFIX:
+        # Left behind by a writer that was killed before the rename
+        return entry.suffix == ".tmp"
+    source = entry.parent.parent / entry.name[:-len(CACHE_SUFFIX)].rpartition(".")[0]
+    try:
+        with open(entry, "rb") as f:
+            header = _read_header(f)
+        data = source.read_bytes()
+    except (OSError, EOFError, ValueError, TypeError):
+        return True
+    return (header is None or header[0] != __version__ or header[1] != sys.byteorder
+            or header[2] != source_digest(data))
+
+
+def prune_cache(root: Path, everything: bool = False) -> List[Path]:
+    """Delete stale ``__kemcache__`` entries under ``root``; returns them.
+
+    An entry is stale when its source file is gone or has changed, or when
+    it was written by another KemLang version. With ``everything`` all
+    entries go. Cache directories left empty are removed too.
+    """
+    directories = [root] if root.name == CACHE_DIR else sorted(root.rglob(CACHE_DIR))
+    removed = []
+    for directory in directories:
+        if not directory.is_dir():
+            continue
+        for entry in sorted(directory.iterdir()):
+            if entry.is_file() and (everything or _is_stale(entry)):
+                entry.unlink()
+                removed.append(entry)
+        try:
+            directory.rmdir()
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .errors import KemError
+from .lexer import make_lexer
+from .parser import Parser
+from .resolver import Resolver
+from .source import LineIndex
+from .version import __version__
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    kind: str
+    message: str
+    line: int
+    col: int
+
+    @classmethod
+    def from_error(cls, error: KemError) -> "Diagnostic":
+        return cls(type(error).__name__, error.message, error.line, error.col)
+
+
+def check_source(source: str) -> List[Diagnostic]:
+    """Every lexical, syntax and scope diagnostic for ``source``, by position.
+
+    Lexing and parsing recover from errors, and the scope check runs on
+    whatever the parser could build.
+    """
+    lexer = make_lexer(source, "regex", recover=True)
+    parser = Parser(lexer.iter_tokens(), collect_errors=True)
+    program = parser.parse()
+    scope_errors = Resolver(LineIndex(source)).resolve(program).errors
+    errors: List[KemError] = [*lexer.errors, *(parser.errors or []), *scope_errors]
+    diagnostics = [Diagnostic.from_error(error) for error in errors]
+    diagnostics.sort(key=lambda d: (d.line, d.col))
+    return diagnostics
+
+
+def _check_data(data: bytes) -> List[Diagnostic]:
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return [Diagnostic("Error", f"File is not valid UTF-8: {e.reason}", 0, 0)]
+    return check_source(text.replace("\r\n", "\n").replace("\r", "\n"))
+
+
+class CheckCache:
+    """Diagnostics of previously checked files, keyed by content hash.
+
+    Stored as one JSON file; entries from another KemLang version are
+    discarded on load.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, List[Diagnostic]] = {}
+        self.changed = False
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == __version__:
+            for digest, diagnostics in data.get("entries", {}).items():
+                self.entries[digest] = [Diagnostic(**d) for d in diagnostics]
+
+    def get(self, digest: str) -> Optional[List[Diagnostic]]:
+        return self.entries.get(digest)
+
+    def put(self, digest: str, diagnostics: List[Diagnostic]) -> None:
+        self.entries[digest] = diagnostics
+        self.changed = True
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        data = {
+            "version": __version__,
+            "entries": {digest: [asdict(d) for d in diagnostics]
+                        for digest, diagnostics in self.entries.items()},
+        }
+        # Write then rename, so an interrupted run never leaves a torn cache
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, self.path)
+        self.changed = False
+
+
+def check_files(files: Iterable[Path], workers: Optional[int] = None,
+                cache: Optional[CheckCache] = None,
+                executor: Optional[Executor] = None) -> Dict[Path, List[Diagnostic]]:
+    """Check ``files``, fanning uncached ones out across a process pool.
+
+    Returns diagnostics per file in the order given. ``executor`` lets
+    callers reuse a pool; otherwise one with ``workers`` processes is
+    started when more than one file needs checking.
+    """
+    results: Dict[Path, List[Diagnostic]] = {}
+    pending: Dict[str, List[Path]] = {}
+    contents: Dict[str, bytes] = {}
+    for file in files:
+        data = file.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        cached = cache.get(digest) if cache is not None else None
+        if cached is None:
+            pending.setdefault(digest, []).append(file)
+            contents[digest] = data
+            cached = []  # keeps the file's place in ``results`` until it is checked
+        results[file] = cached
+
+    digests = list(pending)
+    if len(digests) <= 1 or workers == 1:
+        checked = [_check_data(contents[digest]) for digest in digests]
+    elif executor is not None:
+        checked = list(executor.map(_check_data, [contents[digest] for digest in digests]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            checked = list(pool.map(_check_data, [contents[digest] for digest in digests]))
+
+    for digest, diagnostics in zip(digests, checked, strict=True):
+        for file in pending[digest]:
+            results[file] = diagnostics
+        if cache is not None:
+            cache.put(digest, diagnostics)
+    return results
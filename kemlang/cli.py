@@ -1,5 +1,9 @@
+import mmap
 import sys
+from dataclasses import asdict
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Optional
 import typer
 from rich.console import Console
 from rich.syntax import Syntax
@@ -7,14 +11,31 @@ from rich.tree import Tree
 import json
 
 from .version import __version__
-from .lexer import tokenize
-from .parser import parse_program
-from .interpreter import run
+from .tokenbuffer import tokenize_buffer
+from .lexer import iter_tokens, tokenize_with_errors
+from .parser import Parser, parse_program
+from .interpreter import EXECUTION_ENGINES, Interpreter, engine_class, run
 from .fmt import format_code
 from .errors import render_diagnostic, KemError
+from .check import CheckCache, check_files
+from .cache import CACHE_DIR, compile_cached, prune_cache
+from .serialize import OUTPUT_FORMATS, write_program, write_tokens
+from .transpile import PythonInterpreter, transpile
+from .source import LineIndex, SourceData, load_source, source_text
+from .types import Token
 
 app = typer.Typer(help="KemLang - A Gujarati-flavored programming language")
 console = Console()
+# Diagnostics for machine-readable output go to stderr, keeping stdout parseable
+error_console = Console(stderr=True)
+
+FORMAT_HELP = "Output format: text, or " + ", ".join(OUTPUT_FORMATS) + " streamed to stdout"
+
+
+def check_format(output_format: str) -> None:
+    if output_format != "text" and output_format not in OUTPUT_FORMATS:
+        console.print(f"[red]Error: Unknown format '{output_format}'[/red]")
+        raise typer.Exit(1)
 
 
 def pretty_print_ast(node, tree=None, name="Program") -> Tree:
@@ -39,7 +60,7 @@ def pretty_print_ast(node, tree=None, name="Program") -> Tree:
         if hasattr(node, 'else_branch') and node.else_branch:
             pretty_print_ast(node.else_branch, subtree, "Else")
     elif hasattr(node, 'left') and hasattr(node, 'right'):
-        subtree = tree.add(f"[green]{node_type}[/green] [yellow]{getattr(node, 'operator', {}).lexeme if hasattr(node, 'operator') else ''}[/yellow]")
+        subtree = tree.add(f"[green]{node_type}[/green] [yellow]{node.operator.symbol}[/yellow]")
         pretty_print_ast(node.left, subtree, "Left")
         pretty_print_ast(node.right, subtree, "Right")
     elif hasattr(node, 'value'):
@@ -55,34 +76,52 @@ def pretty_print_ast(node, tree=None, name="Program") -> Tree:
 @app.command("run-file")
 def run_file(
     file: Path = typer.Argument(..., help="KemLang file to run"),
-    trace: bool = typer.Option(False, "--trace", help="Show tokens and AST before execution")
-):
+    trace: bool = typer.Option(False, "--trace", help="Show tokens and AST before execution"),
+    no_cache: bool = typer.Option(False, "--no-cache", help=f"Parse from scratch, bypassing {CACHE_DIR}"),
+    engine: str = typer.Option("tree", "--engine", help="Execution engine: " + ", ".join(EXECUTION_ENGINES)),
+    dump_python: Optional[Path] = typer.Option(None, "--dump-python", help="Write the program translated to Python")
+) -> None:
     """Run a KemLang file."""
     if not file.exists():
         console.print(f"[red]Error: File '{file}' not found[/red]")
         raise typer.Exit(1)
+    if engine not in EXECUTION_ENGINES:
+        console.print(f"[red]Error: Unknown engine '{engine}'[/red]")
+        raise typer.Exit(1)
 
     if file.suffix != '.jsk':
         console.print(f"[yellow]Warning: File '{file}' doesn't have .jsk extension[/yellow]")
 
+    source: SourceData = b""
     try:
-        source = file.read_text()
+        # Large programs are lexed straight from the mapped file
+        source = load_source(file)
 
         if trace:
+            text = source_text(source)
             console.print("[bold]Tokens:[/bold]")
-            tokens = tokenize(source)
-            for token in tokens[:20]:  # Limit output
+            tokens = tokenize_buffer(text)
+            for token in islice(tokens, 20):  # Limit output
                 console.print(f"  {token.type.name:15} {token.lexeme!r:15} {token.line}:{token.col}")
             if len(tokens) > 20:
                 console.print(f"  ... and {len(tokens) - 20} more tokens")
 
             console.print("\n[bold]AST:[/bold]")
-            program = parse_program(source)
+            program = parse_program(text)
             tree = pretty_print_ast(program)
             console.print(tree)
             console.print()
 
-        exit_code = run(source)
+        program = parse_program(source) if no_cache else compile_cached(file, source)
+        if dump_python is not None:
+            dump_python.write_text(transpile(program, source).text, encoding="utf-8")
+        interpreter: Interpreter
+        if engine == "python":
+            # Errors and tracebacks from the generated module point into the file
+            interpreter = PythonInterpreter(source=source, filename=str(file))
+        else:
+            interpreter = engine_class(engine)()
+        exit_code = interpreter.interpret(program)
         if exit_code == 0:
             sys.exit(0)
         else:
@@ -95,10 +134,13 @@ def run_file(
     except Exception as e:
         console.print(f"[red]Error: {str(e)}[/red]")
         raise typer.Exit(1) from e
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
 
 
 @app.command()
-def repl():
+def repl() -> None:
     """Start an interactive KemLang REPL."""
     console.print("[bold green]KemLang REPL v{__version__}[/bold green]")
     console.print("Type your code and press Ctrl+D (Unix) or Ctrl+Z (Windows) to execute.")
@@ -142,7 +184,7 @@ def repl():
 def fmt(
     path: Path = typer.Argument(..., help="File or directory to format"),
     check: bool = typer.Option(False, "--check", help="Check if files are formatted without modifying them")
-):
+) -> None:
     """Format KemLang files."""
     if path.is_file():
         files = [path]
@@ -183,34 +225,79 @@ def fmt(
 
 
 @app.command()
-def tokens(file: Path = typer.Argument(..., help="KemLang file to tokenize")):
+def tokens(
+    file: Path = typer.Argument(..., help="KemLang file to tokenize"),
+    recover: bool = typer.Option(False, "--recover", help="Keep going after lexical errors and report them all"),
+    output_format: str = typer.Option("text", "--format", "-f", help=FORMAT_HELP)
+) -> None:
     """Show tokens for a KemLang file."""
     if not file.exists():
         console.print(f"[red]Error: File '{file}' not found[/red]")
         raise typer.Exit(1)
+    check_format(output_format)
 
     try:
         source = file.read_text()
-        tokens = tokenize(source)
+        if output_format != "text":
+            stream: Iterable[Token]
+            if recover:
+                stream, errors = tokenize_with_errors(source, "regex")
+            else:
+                stream, errors = iter_tokens(source, "regex"), []
+            write_tokens(stream, sys.stdout.buffer, output_format)
+            lines = LineIndex(source)
+            for error in errors:
+                diagnostic = render_diagnostic(source, error.line, error.col, error.message,
+                                               "LexerError", lines)
+                error_console.print(f"[red]{diagnostic}[/red]")
+            if errors:
+                raise typer.Exit(1)
+            return
+
+        tokens: Iterable[Token]
+        if recover:
+            tokens, errors = tokenize_with_errors(source, "regex")
+        else:
+            tokens, errors = tokenize_buffer(source), []
 
         console.print(f"[bold]Tokens for {file}:[/bold]")
         for token in tokens:
             console.print(f"  {token.type.name:15} {token.lexeme!r:15} {token.line}:{token.col}")
 
+        if errors:
+            lines = LineIndex(source)
+            for error in errors:
+                diagnostic = render_diagnostic(source, error.line, error.col, error.message,
+                                               "LexerError", lines)
+                console.print(f"[red]{diagnostic}[/red]")
+            raise typer.Exit(1)
+
+    except typer.Exit:
+        raise
     except Exception as e:
-        console.print(f"[red]Error: {str(e)}[/red]")
+        out = console if output_format == "text" else error_console
+        out.print(f"[red]Error: {str(e)}[/red]")
         raise typer.Exit(1) from e
 
 
 @app.command()
-def ast(file: Path = typer.Argument(..., help="KemLang file to parse")):
+def ast(
+    file: Path = typer.Argument(..., help="KemLang file to parse"),
+    output_format: str = typer.Option("text", "--format", "-f", help=FORMAT_HELP)
+) -> None:
     """Show AST for a KemLang file."""
     if not file.exists():
         console.print(f"[red]Error: File '{file}' not found[/red]")
         raise typer.Exit(1)
+    check_format(output_format)
 
     try:
         source = file.read_text()
+        if output_format != "text":
+            # Each top-level statement is written as soon as it is parsed
+            write_program(Parser(iter_tokens(source)).iter_statements(), sys.stdout.buffer, output_format)
+            return
+
         program = parse_program(source)
 
         console.print(f"[bold]AST for {file}:[/bold]")
@@ -218,16 +305,90 @@ def ast(file: Path = typer.Argument(..., help="KemLang file to parse")):
         console.print(tree)
 
     except KemError as e:
+        out = console if output_format == "text" else error_console
         diagnostic = render_diagnostic(source, e.line, e.col, e.message, type(e).__name__)
-        console.print(f"[red]{diagnostic}[/red]")
+        out.print(f"[red]{diagnostic}[/red]")
         raise typer.Exit(1) from e
+    except Exception as e:
+        out = console if output_format == "text" else error_console
+        out.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1) from e
+
+
+@app.command()
+def check(
+    path: Path = typer.Argument(..., help="File or directory to check"),
+    output_json: bool = typer.Option(False, "--json", help="Print diagnostics as JSON"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Worker processes (default: one per CPU)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Check every file, ignoring cached results")
+) -> None:
+    """Report every lexical, syntax and scope error in KemLang files."""
+    if path.is_file():
+        files = [path]
+        root = path.parent
+    elif path.is_dir():
+        files = sorted(path.rglob("*.jsk"))
+        root = path
+    else:
+        console.print(f"[red]Error: '{path}' is not a file or directory[/red]")
+        raise typer.Exit(1)
+
+    cache = None if no_cache else CheckCache(root / ".kemcheck_cache.json")
+    try:
+        results = check_files(files, jobs, cache)
+        if cache is not None:
+            cache.save()
     except Exception as e:
         console.print(f"[red]Error: {str(e)}[/red]")
         raise typer.Exit(1) from e
 
+    count = sum(len(diagnostics) for diagnostics in results.values())
+    if output_json:
+        typer.echo(json.dumps([
+            {"file": str(file), **asdict(diagnostic)}
+            for file, diagnostics in results.items() for diagnostic in diagnostics
+        ], indent=2))
+    else:
+        for file, diagnostics in results.items():
+            if not diagnostics:
+                continue
+            source = file.read_text(encoding="utf-8", errors="replace")
+            lines = LineIndex(source)
+            console.print(f"[bold]{file}[/bold]")
+            for diagnostic in diagnostics:
+                rendered = render_diagnostic(source, diagnostic.line, diagnostic.col,
+                                             diagnostic.message, diagnostic.kind, lines)
+                console.print(f"[red]{rendered}[/red]")
+            console.print()
+
+        failed = sum(1 for diagnostics in results.values() if diagnostics)
+        if count:
+            console.print(f"[red]{count} problem(s) in {failed} of {len(files)} file(s)[/red]")
+        else:
+            console.print(f"[green]No problems found in {len(files)} file(s)[/green]")
+
+    if count:
+        raise typer.Exit(1)
+
+
+@app.command("cache-prune")
+def cache_prune(
+    path: Path = typer.Argument(Path("."), help="Directory to search for caches"),
+    everything: bool = typer.Option(False, "--all", help="Remove every entry, not only stale ones")
+) -> None:
+    """Delete stale compiled programs from __kemcache__ directories."""
+    if not path.is_dir():
+        console.print(f"[red]Error: '{path}' is not a directory[/red]")
+        raise typer.Exit(1)
+
+    removed = prune_cache(path, everything)
+    for entry in removed:
+        console.print(f"Removed {entry}")
+    console.print(f"[green]Removed {len(removed)} cache file(s)[/green]")
+
 
 @app.command()
-def version():
+def version() -> None:
     """Show KemLang version."""
     console.print(f"KemLang {__version__}")
 
@@ -0,0 +1,324 @@
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from .types import (
+    ASTNode, Program, Block, Stmt, KemValue,
+    Print, Declaration, Assignment, If, While, Break, Continue,
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
+)
+from .errors import RuntimeError, BreakError, ContinueError
+from .interpreter import Environment, Interpreter, declares
+
+
+Action = Callable[[Environment], None]
+Evaluator = Callable[[Environment], KemValue]
+
+
+class ClosureCompiler:
+    """Compiles each AST node once into a Python closure over an Environment.
+
+    Operators, literal values and variable lookups are chosen while
+    compiling, so running a program is plain closure calls. A variable is
+    bound to the innermost enclosing block that declares it before the
+    use, which is where :meth:`Environment.get` finds it at run time; the
+    lookup closure walks that many scopes directly. Blocks that declare
+    nothing run in the enclosing scope, and a loop reuses one scope for
+    every iteration of its body.
+    """
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        # Names declared so far in each open scope, innermost last
+        self.scopes: List[Set[str]] = [set()]
+
+    def compile(self, program: Program) -> Action:
+        return self.sequence(program.statements)
+
+    def sequence(self, statements: Sequence[ASTNode]) -> Action:
+        actions = tuple(self.statement(statement) for statement in statements)
+        if len(actions) == 1:
+            return actions[0]
+
+        def run_sequence(env: Environment) -> None:
+            for action in actions:
+                action(env)
+        return run_sequence
+
+    def hops(self, name: str) -> Optional[int]:
+        """Scopes between the current one and the declaration of ``name``."""
+        for hops, scope in enumerate(reversed(self.scopes)):
+            if name in scope:
+                return hops
+        return None
+
+    # Statements
+    def statement(self, stmt: ASTNode) -> Action:
+        if isinstance(stmt, Print):
+            return self.print_statement(stmt)
+        if isinstance(stmt, Declaration):
+            return self.declaration(stmt)
+        if isinstance(stmt, Assignment):
+            return self.assignment(stmt)
+        if isinstance(stmt, If):
+            return self.if_statement(stmt)
+        if isinstance(stmt, While):
+            return self.while_statement(stmt)
+        if isinstance(stmt, Block):
+            return self.block(stmt)
+        if isinstance(stmt, Break):
+            def run_break(env: Environment) -> None:
+                raise BreakError()
+            return run_break
+        if isinstance(stmt, Continue):
+            def run_continue(env: Environment) -> None:
+                raise ContinueError()
+            return run_continue
+        raise RuntimeError(f"Unknown statement type: {type(stmt)}")
+
+    def print_statement(self, stmt: Print) -> Action:
+        expression = self.expression(stmt.expression)
+        output_fn = self.interpreter.output_fn
+        stringify = self.interpreter.stringify
+
+        def run_print(env: Environment) -> None:
+            output_fn(stringify(expression(env)))
+        return run_print
+
+    def declaration(self, stmt: Declaration) -> Action:
+        initializer = self.expression(stmt.initializer)
+        name = stmt.name
+        self.scopes[-1].add(name)
+
+        def run_declaration(env: Environment) -> None:
+            value = initializer(env)
+            values = env.values
+            if name in values:
+                raise RuntimeError(f"Variable '{name}' already declared in this scope")
+            values[name] = value
+        return run_declaration
+
+    def assignment(self, stmt: Assignment) -> Action:
+        value_of = self.expression(stmt.value)
+        name = stmt.name
+        hops = self.hops(name)
+        if hops is None:
+            def run_undefined(env: Environment) -> None:
+                value_of(env)
+                raise RuntimeError(f"Undefined variable '{name}'")
+            return run_undefined
+        if hops == 0:
+            def run_assignment(env: Environment) -> None:
+                env.values[name] = value_of(env)
+            return run_assignment
+
+        def run_outer_assignment(env: Environment) -> None:
+            value = value_of(env)
+            _outer(env, hops).values[name] = value
+        return run_outer_assignment
+
+    def block(self, block: Block) -> Action:
+        if not declares(block):
+            return self.sequence(block.statements)
+        body = self.scoped_sequence(block.statements)
+
+        def run_block(env: Environment) -> None:
+            body(Environment(env))
+        return run_block
+
+    def scoped_sequence(self, statements: Sequence[ASTNode]) -> Action:
+        """Compile ``statements`` to run in a scope of their own."""
+        self.scopes.append(set())
+        body = self.sequence(statements)
+        self.scopes.pop()
+        return body
+
+    def if_statement(self, stmt: If) -> Action:
+        condition = self.truth(stmt.condition)
+        then_branch = self.statement(stmt.then_branch)
+        if not stmt.else_branch:
+            def run_if(env: Environment) -> None:
+                if condition(env):
+                    then_branch(env)
+            return run_if
+
+        else_branch = self.statement(stmt.else_branch)
+
+        def run_if_else(env: Environment) -> None:
+            if condition(env):
+                then_branch(env)
+            else:
+                else_branch(env)
+        return run_if_else
+
+    def while_statement(self, stmt: While) -> Action:
+        scoped = declares(stmt.body)
+        if scoped:
+            body = self.scoped_sequence(stmt.body.statements)
+        else:
+            body = self.sequence(stmt.body.statements)
+        condition = self.truth(stmt.condition)
+
+        def run_while(env: Environment) -> None:
+            try:
+                while True:
+                    try:
+                        body(env)
+                    except ContinueError:
+                        pass
+                    if not condition(env):
+                        break
+            except BreakError:
+                pass
+
+        def run_scoped_while(env: Environment) -> None:
+            # One scope for the whole loop, emptied before each iteration
+            scope = Environment(env)
+            values = scope.values
+            try:
+                while True:
+                    values.clear()
+                    try:
+                        body(scope)
+                    except ContinueError:
+                        pass
+                    if not condition(env):
+                        break
+            except BreakError:
+                pass
+        return run_scoped_while if scoped else run_while
+
+    # Expressions
+    def truth(self, expr: ASTNode) -> Callable[[Environment], bool]:
+        """Compile ``expr`` to a closure returning its KemLang truthiness."""
+        expression = self.expression(expr)
+        is_truthy = self.interpreter.is_truthy
+
+        def test(env: Environment) -> bool:
+            value = expression(env)
+            return value is True or (value is not False and is_truthy(value))
+        return test
+
+    def expression(self, expr: ASTNode) -> Evaluator:
+        if isinstance(expr, Literal):
+            value = expr.value
+            return lambda env: value
+        if isinstance(expr, Variable):
+            return self.variable(expr.name)
+        if isinstance(expr, Binary):
+            return self.binary(expr)
+        if isinstance(expr, Unary):
+            return self.unary(expr)
+        if isinstance(expr, Input):
+            input_fn = self.interpreter.input_fn
+            return lambda env: input_fn().rstrip('\n')
+        raise RuntimeError(f"Unknown expression type: {type(expr)}")
+
+    def variable(self, name: str) -> Evaluator:
+        hops = self.hops(name)
+        if hops is None:
+            def load_undefined(env: Environment) -> KemValue:
+                raise RuntimeError(f"Undefined variable '{name}'")
+            return load_undefined
+        if hops == 0:
+            return lambda env: env.values[name]
+        if hops == 1:
+            def load_enclosing(env: Environment) -> KemValue:
+                enclosing = env.enclosing
+                if enclosing is None:
+                    raise RuntimeError(f"Undefined variable '{name}'")
+                return enclosing.values[name]
+            return load_enclosing
+
+        def load_outer(env: Environment) -> KemValue:
+            return _outer(env, hops).values[name]
+        return load_outer
+
+    def unary(self, expr: Unary) -> Evaluator:
+        operand = self.expression(expr.right)
+        unary_operation = self.interpreter.unary_operation
+        operator = expr.operator
+        integer_op = _INTEGER_UNARY_OPERATIONS.get(operator)
+        if integer_op is None:
+            return lambda env: unary_operation(operator, operand(env))
+
+        def unary(env: Environment) -> KemValue:
+            value = operand(env)
+            if type(value) is int:
+                return integer_op(value)
+            return unary_operation(operator, value)
+        return unary
+
+    def binary(self, expr: Binary) -> Evaluator:
+        """Pick a closure for the operator, inlining the integer and string cases.
+
+        Anything else goes through :meth:`Interpreter.binary_operation`, so
+        results and error messages match the tree-walker.
+        """
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        op = expr.operator
+        fallback = self.interpreter.binary_operation
+
+        if op == BinaryOp.ADD:
+            def add(env: Environment) -> KemValue:
+                a = left(env)
+                b = right(env)
+                if type(a) is int and type(b) is int:
+                    return a + b
+                if type(a) is str and type(b) is str:
+                    return a + b
+                return fallback(op, a, b)
+            return add
+        if op == BinaryOp.EQUAL:
+            return lambda env: left(env) == right(env)
+        if op == BinaryOp.NOT_EQUAL:
+            return lambda env: left(env) != right(env)
+
+        integer_op = _INTEGER_OPERATIONS.get(op)
+        if integer_op is None:
+            return lambda env: fallback(op, left(env), right(env))
+
+        def arithmetic(env: Environment) -> KemValue:
+            a = left(env)
+            b = right(env)
+            if type(a) is int and type(b) is int and (b or op != BinaryOp.MODULO):
+                return integer_op(a, b)
+            return fallback(op, a, b)
+        return arithmetic
+
+
+# Integer fast paths; DIVIDE always goes through binary_operation
+_INTEGER_OPERATIONS: Dict[BinaryOp, Callable[[int, int], KemValue]] = {
+    BinaryOp.SUBTRACT: int.__sub__,
+    BinaryOp.MULTIPLY: int.__mul__,
+    BinaryOp.MODULO: int.__mod__,
+    BinaryOp.LESS: int.__lt__,
+    BinaryOp.GREATER: int.__gt__,
+    BinaryOp.LESS_EQUAL: int.__le__,
+    BinaryOp.GREATER_EQUAL: int.__ge__,
+}
+_INTEGER_UNARY_OPERATIONS: Dict[UnaryOp, Callable[[int], KemValue]] = {
+    UnaryOp.NEGATE: int.__neg__,
+}
+
+
+def _outer(env: Environment, hops: int) -> Environment:
+    """The scope ``hops`` levels out from ``env``."""
+    for _ in range(hops):
+        enclosing = env.enclosing
+        if enclosing is None:
+            raise RuntimeError("Variable lookup left the global scope")
+        env = enclosing
+    return env
+
+
+class ClosureInterpreter(Interpreter):
+    """Runs a program compiled to closures by :class:`ClosureCompiler`."""
+
+    def interpret(self, program: Program) -> int:
+        """Compile and run a program. Returns 0 on success, 1 on error."""
+        return self.run_statements([program])
+
+    def execute(self, stmt: Stmt) -> None:
+        # interpret() passes the whole program; other statements run alone
+        program = stmt if isinstance(stmt, Program) else Program([stmt])
+        ClosureCompiler(self).compile(program)(self.environment)
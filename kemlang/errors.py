@@ -1,5 +1,7 @@
 from typing import Optional
 
+from .source import LineIndex, SourceData
+
 
 class KemError(Exception):
     def __init__(self, message: str, line: int = 0, col: int = 0):
@@ -21,6 +23,10 @@ class RuntimeError(KemError):
     pass
 
 
+class ScopeError(KemError):
+    pass
+
+
 class BreakError(Exception):
     pass
 
@@ -29,14 +35,20 @@ class ContinueError(Exception):
     pass
 
 
-def render_diagnostic(source: str, line: int, col: int, message: str, kind: str = "Error") -> str:
-    """Render a diagnostic with source context and caret pointing to the error."""
-    lines = source.split('\n')
+def render_diagnostic(source: SourceData, line: int, col: int, message: str, kind: str = "Error",
+                      lines: Optional[LineIndex] = None) -> str:
+    """Render a diagnostic with source context and caret pointing to the error.
+
+    Pass the source's ``lines`` index when rendering several diagnostics so
+    line starts are only collected once.
+    """
+    if lines is None:
+        lines = LineIndex(source)
 
     if line < 1 or line > len(lines):
         return f"{kind}: {message} (line {line}:{col})"
 
-    error_line = lines[line - 1]
+    error_line = lines.line_text(line)
     line_num_width = len(str(line))
 
     # Build the diagnostic output
@@ -49,4 +61,4 @@ def render_diagnostic(source: str, line: int, col: int, message: str, kind: str
     caret_line = " " * (line_num_width + 3) + " " * max(0, col - 1) + "^"
     result.append(caret_line)
 
-    return "\n".join(result)
\ No newline at end of file
+    return "\n".join(result)
@@ -1,26 +1,31 @@
-from typing import List
+from typing import Any, Iterable, List, Optional
 from .types import (
     Program, Block, Stmt, Expr,
     Print, Declaration, Assignment, If, While, Break, Continue,
-    Binary, Unary, Literal, Variable, Input, TokenType
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
 )
-from .parser import parse_program
+from .parser import OPERATOR_PRECEDENCE, parse_program
+from .arena import AstArena, ArenaVisitor, NodeKind
 
 
 class Formatter:
-    def __init__(self):
+    def __init__(self) -> None:
         self.indent_level = 0
         self.output: List[str] = []
 
     def format_program(self, program: Program) -> str:
         """Format a complete program."""
+        return self.format_statements(program.statements)
+
+    def format_statements(self, statements: Iterable[Any]) -> str:
+        """Format a program made of the given top-level statements."""
         self.output = []
         self.indent_level = 0
 
         self.emit("kem bhai")
         self.newline()
 
-        for stmt in program.statements:
+        for stmt in statements:
             self.format_statement(stmt)
             self.newline()
 
@@ -29,7 +34,7 @@ class Formatter:
 
         return "".join(self.output).rstrip() + "\n"
 
-    def format_statement(self, stmt: Stmt):
+    def format_statement(self, stmt: Stmt) -> None:
         """Format a statement."""
         if isinstance(stmt, Print):
             self.format_print(stmt)
@@ -48,19 +53,19 @@ class Formatter:
         elif isinstance(stmt, Continue):
             self.emit("aagal vado")
 
-    def format_print(self, stmt: Print):
+    def format_print(self, stmt: Print) -> None:
         self.emit("bhai bol ")
         self.format_expression(stmt.expression)
 
-    def format_declaration(self, stmt: Declaration):
+    def format_declaration(self, stmt: Declaration) -> None:
         self.emit(f"aa {stmt.name} che ")
         self.format_expression(stmt.initializer)
 
-    def format_assignment(self, stmt: Assignment):
+    def format_assignment(self, stmt: Assignment) -> None:
         self.emit(f"{stmt.name} che ")
         self.format_expression(stmt.value)
 
-    def format_if(self, stmt: If):
+    def format_if(self, stmt: If) -> None:
         self.emit("jo ")
         self.format_expression(stmt.condition)
         self.emit(" {")
@@ -78,7 +83,7 @@ class Formatter:
             self.dedent()
             self.emit("}")
 
-    def format_while(self, stmt: While):
+    def format_while(self, stmt: While) -> None:
         self.emit("farvu {")
         self.newline()
         self.indent()
@@ -87,7 +92,7 @@ class Formatter:
         self.emit("} jya sudhi ")
         self.format_expression(stmt.condition)
 
-    def format_block(self, block: Block):
+    def format_block(self, block: Block) -> None:
         self.emit("{")
         self.newline()
         self.indent()
@@ -95,13 +100,13 @@ class Formatter:
         self.dedent()
         self.emit("}")
 
-    def format_block_contents(self, block: Block):
+    def format_block_contents(self, block: Block) -> None:
         """Format the contents of a block without the braces."""
         for stmt in block.statements:
             self.format_statement(stmt)
             self.newline()
 
-    def format_expression(self, expr: Expr):
+    def format_expression(self, expr: Expr) -> None:
         """Format an expression."""
         if isinstance(expr, Literal):
             self.format_literal(expr)
@@ -114,8 +119,10 @@ class Formatter:
         elif isinstance(expr, Input):
             self.emit("bapu tame bolo")
 
-    def format_literal(self, expr: Literal):
-        value = expr.value
+    def format_literal(self, expr: Literal) -> None:
+        self.format_value(expr.value)
+
+    def format_value(self, value: Any) -> None:
         if isinstance(value, str):
             # Escape special characters
             escaped = value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n").replace("\t", "\\t")
@@ -125,7 +132,7 @@ class Formatter:
         else:
             self.emit(str(value))
 
-    def format_binary(self, expr: Binary):
+    def format_binary(self, expr: Binary) -> None:
         # Add parentheses for clarity with complex expressions
         needs_parens = isinstance(expr.left, Binary) and self.needs_parentheses(expr.left, expr)
 
@@ -135,7 +142,7 @@ class Formatter:
         if needs_parens:
             self.emit(")")
 
-        self.emit(f" {expr.operator.lexeme} ")
+        self.emit(f" {expr.operator.symbol} ")
 
         needs_parens = isinstance(expr.right, Binary) and self.needs_parentheses(expr.right, expr)
         if needs_parens:
@@ -144,8 +151,8 @@ class Formatter:
         if needs_parens:
             self.emit(")")
 
-    def format_unary(self, expr: Unary):
-        self.emit(expr.operator.lexeme)
+    def format_unary(self, expr: Unary) -> None:
+        self.emit(expr.operator.symbol)
         if isinstance(expr.right, Binary):
             self.emit("(")
             self.format_expression(expr.right)
@@ -155,38 +162,135 @@ class Formatter:
 
     def needs_parentheses(self, child: Binary, parent: Binary) -> bool:
         """Determine if child expression needs parentheses."""
-        precedence = {
-            TokenType.MULTIPLY: 3, TokenType.DIVIDE: 3, TokenType.MODULO: 3,
-            TokenType.PLUS: 2, TokenType.MINUS: 2,
-            TokenType.GREATER: 1, TokenType.GREATER_EQUAL: 1,
-            TokenType.LESS: 1, TokenType.LESS_EQUAL: 1,
-            TokenType.EQUAL: 0, TokenType.NOT_EQUAL: 0,
-        }
-
-        child_prec = precedence.get(child.operator.type, 0)
-        parent_prec = precedence.get(parent.operator.type, 0)
+        child_prec = OPERATOR_PRECEDENCE.get(child.operator, 0)
+        parent_prec = OPERATOR_PRECEDENCE.get(parent.operator, 0)
 
         return child_prec < parent_prec
 
-    def emit(self, text: str):
+    def emit(self, text: str) -> None:
         """Emit text at current indentation."""
         if self.output and self.output[-1].endswith("\n"):
             self.output.append("  " * self.indent_level)
         self.output.append(text)
 
-    def newline(self):
+    def newline(self) -> None:
         """Emit a newline."""
         self.output.append("\n")
 
-    def indent(self):
+    def indent(self) -> None:
         """Increase indentation level."""
         self.indent_level += 1
 
-    def dedent(self):
+    def dedent(self) -> None:
         """Decrease indentation level."""
         self.indent_level = max(0, self.indent_level - 1)
 
 
+class ArenaFormatter(ArenaVisitor, Formatter):
+    """Formatter that walks an :class:`~kemlang.arena.AstArena` directly."""
+
+    def __init__(self, arena: AstArena) -> None:
+        Formatter.__init__(self)
+        ArenaVisitor.__init__(self, arena)
+
+    def format_program(self, program: Optional[Program] = None) -> str:
+        """Format the arena's program."""
+        return self.format_statements(self.arena.statements(self.arena.root))
+
+    def format_statement(self, node: Any) -> None:
+        # format_statements() hands over node indices rather than Stmt nodes
+        self.visit(node)
+
+    def visit_print(self, node: int) -> None:
+        self.emit("bhai bol ")
+        self.visit(self.arena.first[node])
+
+    def visit_declaration(self, node: int) -> None:
+        arena = self.arena
+        self.emit(f"aa {arena.names[arena.first[node]]} che ")
+        self.visit(arena.second[node])
+
+    def visit_assignment(self, node: int) -> None:
+        arena = self.arena
+        self.emit(f"{arena.names[arena.first[node]]} che ")
+        self.visit(arena.second[node])
+
+    def visit_if(self, node: int) -> None:
+        arena = self.arena
+        self.emit("jo ")
+        self.visit(arena.first[node])
+        self.emit(" {")
+        self.format_arena_block(arena.second[node])
+
+        if arena.third[node] >= 0:
+            self.emit(" nahi to {")
+            self.format_arena_block(arena.third[node])
+
+    def visit_while(self, node: int) -> None:
+        self.emit("farvu {")
+        self.format_arena_block(self.arena.first[node])
+        self.emit(" jya sudhi ")
+        self.visit(self.arena.second[node])
+
+    def visit_block(self, node: int) -> None:
+        self.emit("{")
+        self.format_arena_block(node)
+
+    def format_arena_block(self, node: int) -> None:
+        """Format a block's statements and its closing brace."""
+        self.newline()
+        self.indent()
+        for stmt in self.arena.statements(node):
+            self.visit(stmt)
+            self.newline()
+        self.dedent()
+        self.emit("}")
+
+    def visit_break(self, node: int) -> None:
+        self.emit("tame jao")
+
+    def visit_continue(self, node: int) -> None:
+        self.emit("aagal vado")
+
+    def visit_binary(self, node: int) -> None:
+        arena = self.arena
+        operator = BinaryOp(arena.third[node])
+        self.format_operand(arena.first[node], operator)
+        self.emit(f" {operator.symbol} ")
+        self.format_operand(arena.second[node], operator)
+
+    def format_operand(self, node: int, parent_operator: BinaryOp) -> None:
+        arena = self.arena
+        needs_parens = (arena.kinds[node] == NodeKind.BINARY and
+                        OPERATOR_PRECEDENCE.get(BinaryOp(arena.third[node]), 0) <
+                        OPERATOR_PRECEDENCE.get(parent_operator, 0))
+        if needs_parens:
+            self.emit("(")
+        self.visit(node)
+        if needs_parens:
+            self.emit(")")
+
+    def visit_unary(self, node: int) -> None:
+        arena = self.arena
+        operand = arena.first[node]
+        self.emit(UnaryOp(arena.third[node]).symbol)
+        if arena.kinds[operand] == NodeKind.BINARY:
+            self.emit("(")
+            self.visit(operand)
+            self.emit(")")
+        else:
+            self.visit(operand)
+
+    def visit_literal(self, node: int) -> None:
+        self.format_value(self.arena.literals[self.arena.first[node]])
+
+    def visit_variable(self, node: int) -> None:
+        self.emit(self.arena.names[self.arena.first[node]])
+
+    def visit_input(self, node: int) -> None:
+        self.emit("bapu tame bolo")
+
+
 def format_code(source: str) -> str:
     """Format KemLang source code."""
     try:
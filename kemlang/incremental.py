@@ -0,0 +1,214 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Callable, List, Optional, Tuple
+
+from .types import Program, Stmt, TokenType
+from .lexer import KeywordTable, RegexLexer
+from .parser import Parser
+from .tokenbuffer import TokenBuffer, tokenize_buffer
+
+
+_NEWLINE = TokenType.NEWLINE.value
+
+
+def restart_token(buffer: TokenBuffer, offset: int) -> int:
+    """Index of the first token to re-lex for an edit at ``offset``.
+
+    Lexing can safely restart right after a NEWLINE token: that is always
+    a line start outside any string literal, and no token depends on the
+    text before it.
+    """
+    index = bisect_right(buffer.ends, offset)
+    types = buffer.types
+    while index > 0:
+        if types[index - 1] == _NEWLINE:
+            return index
+        index -= 1
+    return 0
+
+
+def relex(buffer: TokenBuffer, offset: int, removed: int, inserted: str,
+          keywords: Optional[KeywordTable] = None) -> TokenBuffer:
+    """Re-tokenize ``buffer.source`` after replacing ``removed`` characters at
+    ``offset`` with ``inserted``.
+
+    Only the tokens from the nearest safe restart point up to where the new
+    token stream lines up with the old one again are re-lexed; everything
+    after that is copied with shifted offsets. The result is identical to
+    running :func:`~kemlang.tokenbuffer.tokenize_buffer` on the new source.
+    """
+    return relex_range(buffer, offset, removed, inserted, keywords)[0]
+
+
+def relex_range(buffer: TokenBuffer, offset: int, removed: int, inserted: str,
+                keywords: Optional[KeywordTable] = None) -> Tuple[TokenBuffer, int, int, int]:
+    """Like :func:`relex`, also reporting which tokens were re-lexed.
+
+    Returns ``(tokens, first, resume, old_resume)``: tokens before ``first``
+    are the old ones unchanged, and from index ``resume`` on the new tokens
+    are the old ones from ``old_resume`` on, shifted. When the streams never
+    line up again, ``resume`` is ``len(tokens)`` and ``old_resume`` is
+    ``len(buffer)``.
+    """
+    old_source = buffer.source
+    if offset < 0 or removed < 0 or offset + removed > len(old_source):
+        raise ValueError("Edit range is outside the source")
+
+    source = old_source[:offset] + inserted + old_source[offset + removed:]
+    delta = len(inserted) - removed
+    edit_end = offset + len(inserted)  # end of the edit in new coordinates
+
+    first = restart_token(buffer, offset)
+    restart = buffer.ends[first - 1] if first else 0
+
+    result = buffer.derive(source)
+    result.copy_range(buffer, 0, first)
+
+    # Old tokens that start after the edit are candidates for resyncing
+    old_starts = buffer.starts
+    old_count = len(buffer)
+    candidate = bisect_right(old_starts, offset + removed - 1)
+
+    for token_type, start, end, literal in RegexLexer(source, keywords).scan(restart):
+        if start >= edit_end:
+            while candidate < old_count and old_starts[candidate] + delta < start:
+                candidate += 1
+            if candidate < old_count and old_starts[candidate] + delta == start:
+                # Lexing is position-determined, so from here on the old
+                # tokens are exactly what a full re-lex would produce.
+                resume = len(result)
+                result.copy_range(buffer, candidate, old_count, delta)
+                return result, first, resume, candidate
+        result.append(token_type, start, end, literal)
+
+    return result, first, len(result), old_count
+
+
+class ParsedSource:
+    """A parsed program plus the token spans of its top-level statements.
+
+    Every top-level ``Parser.statement()`` call is a unit: ``lengths[u]`` is
+    the number of tokens it consumed, starting from token index ``head``
+    for the first unit, and ``statements[u]`` is the statement it produced,
+    or None where error recovery dropped it. ``origins[u]`` is the source
+    offset of the unit's first token when it was parsed: statements reused
+    by :func:`reparse` keep the node offsets of the source they were parsed
+    from, and :meth:`offset_shift` maps those to the current source.
+    """
+
+    def __init__(self, tokens: TokenBuffer, head: int, lengths: "array[int]",
+                 statements: List[Optional[Stmt]], origins: "array[int]"):
+        self.tokens = tokens
+        self.head = head
+        self.lengths = lengths
+        self.statements = statements
+        self.origins = origins
+        self.program = Program([stmt for stmt in statements if stmt is not None])
+
+    @property
+    def source(self) -> str:
+        return self.tokens.source
+
+    def unit_starts(self) -> List[int]:
+        """Token index of each unit's first token, then of the token after the last unit."""
+        return list(accumulate(self.lengths, initial=self.head))
+
+    def offset_shift(self, index: int) -> int:
+        """Amount to add to node offsets in ``program.statements[index]``."""
+        unit = [u for u, stmt in enumerate(self.statements) if stmt is not None][index]
+        return self.tokens.starts[self.unit_starts()[unit]] - self.origins[unit]
+
+
+class _UnitParser(Parser):
+    """Parser over a TokenBuffer from a given token index, recording units."""
+
+    def __init__(self, tokens: TokenBuffer, start: int):
+        self.buffer = tokens
+        super().__init__(tokens[i] for i in range(start, len(tokens)))
+
+    def index(self) -> int:
+        """Token index of the current token."""
+        return bisect_left(self.buffer.starts, self.current_token.offset)
+
+    def parse_units(self, lengths: "array[int]", statements: List[Optional[Stmt]],
+                    origins: "array[int]",
+                    align: Optional[Callable[[int], Optional[int]]] = None) -> Optional[int]:
+        """Parse top-level statements up to 'aavjo bhai', appending units.
+
+        Stops early if ``align`` maps a unit's first token index to an old
+        unit to resume with, and returns that unit.
+        """
+        while not self.check(TokenType.AAVJO_BHAI) and not self.is_at_end():
+            start = self.index()
+            if align is not None:
+                resume = align(start)
+                if resume is not None:
+                    return resume
+            origins.append(self.current_token.offset)
+            statements.append(self.statement())
+            lengths.append(self.index() - start)
+
+        if not self.match(TokenType.AAVJO_BHAI):
+            self.error("Program must end with 'aavjo bhai'")
+        return None
+
+
+def _parse_tokens(tokens: TokenBuffer) -> ParsedSource:
+    parser = _UnitParser(tokens, 0)
+    if not parser.check(TokenType.KEM_BHAI):
+        parser.error("Program must start with 'kem bhai'")
+    parser.advance()
+
+    head = parser.index()
+    lengths, origins = array('i'), array('i')
+    statements: List[Optional[Stmt]] = []
+    parser.parse_units(lengths, statements, origins)
+    return ParsedSource(tokens, head, lengths, statements, origins)
+
+
+def parse_source(source: str, keywords: Optional[KeywordTable] = None) -> ParsedSource:
+    """Parse ``source`` like :func:`~kemlang.parser.parse_program`, keeping
+    the statement spans that :func:`reparse` needs."""
+    return _parse_tokens(tokenize_buffer(source, keywords))
+
+
+def reparse(parsed: ParsedSource, offset: int, removed: int, inserted: str,
+            keywords: Optional[KeywordTable] = None) -> ParsedSource:
+    """Parse ``parsed.source`` after replacing ``removed`` characters at
+    ``offset`` with ``inserted``.
+
+    The source is re-lexed with :func:`relex_range`. Top-level statements
+    whose tokens, including the one token of lookahead the parser used
+    after them, all come before the re-lexed tokens are kept as they are.
+    Parsing restarts after them and stops as soon as a statement would
+    start on an unchanged token where an old statement started: parsing at
+    the top level depends on nothing but the position, so the old
+    statements from there on are reused too. The resulting program equals
+    ``parse_program`` on the new source, and errors are raised the same way.
+    """
+    tokens, first, resume, old_resume = relex_range(parsed.tokens, offset, removed, inserted, keywords)
+    if first <= parsed.head:
+        # The edit touches 'kem bhai' or the token after it
+        return _parse_tokens(tokens)
+
+    starts = parsed.unit_starts()
+    units = len(parsed.lengths)
+    keep = bisect_left(starts, first, 1) - 1
+
+    def align(index: int) -> Optional[int]:
+        if index < resume:
+            return None
+        old_index = index - resume + old_resume
+        unit = bisect_left(starts, old_index, keep, units)
+        return unit if unit < units and starts[unit] == old_index else None
+
+    lengths = parsed.lengths[:keep]
+    statements = parsed.statements[:keep]
+    origins = parsed.origins[:keep]
+    unit = _UnitParser(tokens, starts[keep]).parse_units(lengths, statements, origins, align)
+    if unit is not None:
+        lengths.extend(parsed.lengths[unit:])
+        statements.extend(parsed.statements[unit:])
+        origins.extend(parsed.origins[unit:])
+    return ParsedSource(tokens, parsed.head, lengths, statements, origins)
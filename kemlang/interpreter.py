@@ -1,14 +1,16 @@
-from typing import Dict, Any, Callable, Optional, List
+from typing import Dict, Any, Callable, Iterable, Optional, List, Tuple, Type, Union
 import sys
 from io import StringIO
 
 from .types import (
     Program, Block, Stmt, Expr, KemValue,
     Print, Declaration, Assignment, If, While, Break, Continue,
-    Binary, Unary, Literal, Variable, Input, TokenType
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
 )
 from .errors import RuntimeError, BreakError, ContinueError
 from .parser import parse_program
+from .arena import AstArena, ArenaVisitor
+from .source import SourceData
 
 
 class Environment:
@@ -16,7 +18,7 @@ class Environment:
         self.values: Dict[str, KemValue] = {}
         self.enclosing = enclosing
 
-    def define(self, name: str, value: KemValue):
+    def define(self, name: str, value: KemValue) -> None:
         """Define a new variable. Error if already exists in current scope."""
         if name in self.values:
             raise RuntimeError(f"Variable '{name}' already declared in this scope")
@@ -30,7 +32,7 @@ class Environment:
             return self.enclosing.get(name)
         raise RuntimeError(f"Undefined variable '{name}'")
 
-    def assign(self, name: str, value: KemValue):
+    def assign(self, name: str, value: KemValue) -> None:
         """Assign to existing variable. Error if not found."""
         if name in self.values:
             self.values[name] = value
@@ -41,17 +43,33 @@ class Environment:
         raise RuntimeError(f"Undefined variable '{name}'")
 
 
+def declares(block: Block) -> bool:
+    """Whether ``block`` declares variables of its own.
+
+    A block that does not can run in the enclosing scope: it would leave
+    its own scope empty, and nested blocks still open theirs.
+    """
+    return any(isinstance(statement, Declaration) for statement in block.statements)
+
+
 class Interpreter:
     def __init__(self, input_fn: Callable[[], str] = input, output_fn: Callable[[str], None] = print):
         self.globals = Environment()
         self.environment = self.globals
         self.input_fn = input_fn
         self.output_fn = output_fn
+        # declares() of each block run so far, by id; holding the block
+        # keeps its id from being reused
+        self.block_scopes: Dict[int, Tuple[Block, bool]] = {}
 
     def interpret(self, program: Program) -> int:
         """Interpret a program. Returns 0 on success, 1 on error."""
+        return self.run_statements(program.statements)
+
+    def run_statements(self, statements: Iterable[Any]) -> int:
+        """Execute top-level statements, reporting errors through output_fn."""
         try:
-            for statement in program.statements:
+            for statement in statements:
                 self.execute(statement)
             return 0
         except RuntimeError as e:
@@ -61,7 +79,7 @@ class Interpreter:
             self.output_fn(f"Internal Error: {str(e)}")
             return 1
 
-    def execute(self, stmt: Stmt):
+    def execute(self, stmt: Stmt) -> None:
         """Execute a statement."""
         if isinstance(stmt, Print):
             self.execute_print(stmt)
@@ -82,34 +100,48 @@ class Interpreter:
         else:
             raise RuntimeError(f"Unknown statement type: {type(stmt)}")
 
-    def execute_print(self, stmt: Print):
+    def execute_print(self, stmt: Print) -> None:
         value = self.evaluate(stmt.expression)
         self.output_fn(self.stringify(value))
 
-    def execute_declaration(self, stmt: Declaration):
+    def execute_declaration(self, stmt: Declaration) -> None:
         value = self.evaluate(stmt.initializer)
         self.environment.define(stmt.name, value)
 
-    def execute_assignment(self, stmt: Assignment):
+    def execute_assignment(self, stmt: Assignment) -> None:
         value = self.evaluate(stmt.value)
         self.environment.assign(stmt.name, value)
 
-    def execute_if(self, stmt: If):
+    def execute_if(self, stmt: If) -> None:
         condition = self.evaluate(stmt.condition)
         if self.is_truthy(condition):
             self.execute(stmt.then_branch)
         elif stmt.else_branch:
             self.execute(stmt.else_branch)
 
-    def execute_while(self, stmt: While):
-        """Execute while loop: farvu { ... } jya sudhi <condition>"""
+    def execute_while(self, stmt: While) -> None:
+        """Execute while loop: farvu { ... } jya sudhi <condition>
+
+        A body that declares variables gets one scope for the whole loop,
+        emptied before each iteration.
+        """
+        body = stmt.body
+        scoped = self.needs_scope(body)
+        previous = self.environment
+        scope = Environment(previous) if scoped else previous
         try:
             while True:
                 # Execute body first
+                if scoped:
+                    scope.values.clear()
+                self.environment = scope
                 try:
-                    self.execute(stmt.body)
+                    for statement in body.statements:
+                        self.execute(statement)
                 except ContinueError:
                     pass  # Continue to condition check
+                finally:
+                    self.environment = previous
 
                 # Then check condition
                 condition = self.evaluate(stmt.condition)
@@ -119,8 +151,12 @@ class Interpreter:
         except BreakError:
             pass  # Exit the loop
 
-    def execute_block(self, stmt: Block):
-        """Execute a block with new environment scope."""
+    def execute_block(self, stmt: Block) -> None:
+        """Execute a block, in a new environment scope if it declares variables."""
+        if not self.needs_scope(stmt):
+            for statement in stmt.statements:
+                self.execute(statement)
+            return
         previous = self.environment
         try:
             self.environment = Environment(self.environment)
@@ -129,6 +165,12 @@ class Interpreter:
         finally:
             self.environment = previous
 
+    def needs_scope(self, block: Block) -> bool:
+        entry = self.block_scopes.get(id(block))
+        if entry is None:
+            entry = self.block_scopes[id(block)] = (block, declares(block))
+        return entry[1]
+
     def evaluate(self, expr: Expr) -> KemValue:
         """Evaluate an expression."""
         if isinstance(expr, Literal):
@@ -147,11 +189,12 @@ class Interpreter:
     def evaluate_binary(self, expr: Binary) -> KemValue:
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
+        return self.binary_operation(expr.operator, left, right)
 
-        op = expr.operator.type
-
+    def binary_operation(self, op: Union[BinaryOp, int], left: KemValue, right: KemValue) -> KemValue:
+        """Apply binary operator ``op``, given as a BinaryOp or its code."""
         # Arithmetic operators
-        if op == TokenType.PLUS:
+        if op == BinaryOp.ADD:
             if isinstance(left, str) and isinstance(right, str):
                 return left + right
             elif isinstance(left, (int, float)) and isinstance(right, (int, float)):
@@ -159,21 +202,21 @@ class Interpreter:
             else:
                 raise RuntimeError(f"TypeError: cannot `+` {type(left).__name__} and {type(right).__name__}")
 
-        elif op == TokenType.MINUS:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.SUBTRACT:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             return left - right
 
-        elif op == TokenType.MULTIPLY:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.MULTIPLY:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             return left * right
 
-        elif op == TokenType.DIVIDE:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.DIVIDE:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             if right == 0:
                 raise RuntimeError("Division by zero")
             return left / right  # Always returns float
 
-        elif op == TokenType.MODULO:
+        elif op == BinaryOp.MODULO:
             if not (isinstance(left, int) and isinstance(right, int)):
                 raise RuntimeError("Modulo operator requires integer operands")
             if right == 0:
@@ -181,39 +224,43 @@ class Interpreter:
             return left % right
 
         # Comparison operators
-        elif op == TokenType.EQUAL:
+        elif op == BinaryOp.EQUAL:
             return left == right
-        elif op == TokenType.NOT_EQUAL:
+        elif op == BinaryOp.NOT_EQUAL:
             return left != right
-        elif op == TokenType.GREATER:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.GREATER:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             return left > right
-        elif op == TokenType.GREATER_EQUAL:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.GREATER_EQUAL:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             return left >= right
-        elif op == TokenType.LESS:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.LESS:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             return left < right
-        elif op == TokenType.LESS_EQUAL:
-            self.check_number_operands(left, right, expr.operator.lexeme)
+        elif op == BinaryOp.LESS_EQUAL:
+            left, right = self.check_number_operands(left, right, BinaryOp(op).symbol)
             return left <= right
 
-        raise RuntimeError(f"Unknown binary operator: {expr.operator.lexeme}")
+        raise RuntimeError(f"Unknown binary operator: {op}")
 
     def evaluate_unary(self, expr: Unary) -> KemValue:
-        right = self.evaluate(expr.right)
+        return self.unary_operation(expr.operator, self.evaluate(expr.right))
 
-        if expr.operator.type == TokenType.MINUS:
+    def unary_operation(self, op: Union[UnaryOp, int], right: KemValue) -> KemValue:
+        """Apply unary operator ``op``, given as a UnaryOp or its code."""
+        if op == UnaryOp.NEGATE:
             if not isinstance(right, (int, float)):
                 raise RuntimeError("Unary minus requires numeric operand")
             return -right
 
-        raise RuntimeError(f"Unknown unary operator: {expr.operator.lexeme}")
+        raise RuntimeError(f"Unknown unary operator: {op}")
 
-    def check_number_operands(self, left: KemValue, right: KemValue, operator: str):
-        """Check that both operands are numbers."""
+    def check_number_operands(self, left: KemValue, right: KemValue,
+                              operator: str) -> Tuple[Union[int, float], Union[int, float]]:
+        """Check that both operands are numbers and return them."""
         if not isinstance(left, (int, float)) or not isinstance(right, (int, float)):
             raise RuntimeError(f"Operator '{operator}' requires numeric operands")
+        return left, right
 
     def is_truthy(self, value: KemValue) -> bool:
         """Determine truthiness of a value."""
@@ -241,11 +288,132 @@ class Interpreter:
         return str(value)
 
 
-def run(source: str, *, input_fn: Callable[[], str] = input, output_fn: Callable[[str], None] = print) -> int:
-    """Run KemLang source code. Returns exit code 0 on success, 1 on error."""
+class ArenaInterpreter(ArenaVisitor, Interpreter):
+    """Interpreter that executes an :class:`~kemlang.arena.AstArena` directly.
+
+    Statements and expressions are dispatched by node kind; operator
+    semantics, scoping and error reporting are shared with
+    :class:`Interpreter`.
+    """
+
+    def __init__(self, arena: AstArena, input_fn: Callable[[], str] = input,
+                 output_fn: Callable[[str], None] = print):
+        Interpreter.__init__(self, input_fn, output_fn)
+        ArenaVisitor.__init__(self, arena)
+
+    def interpret(self, program: Optional[Program] = None) -> int:
+        """Run the arena's program. Returns 0 on success, 1 on error."""
+        return self.run_statements(self.arena.statements(self.arena.root))
+
+    def execute(self, node: Any) -> None:
+        # run_statements() hands over node indices rather than Stmt nodes
+        self.visit(node)
+
+    def visit_print(self, node: int) -> None:
+        self.output_fn(self.stringify(self.visit(self.arena.first[node])))
+
+    def visit_declaration(self, node: int) -> None:
+        arena = self.arena
+        value = self.visit(arena.second[node])
+        self.environment.define(arena.names[arena.first[node]], value)
+
+    def visit_assignment(self, node: int) -> None:
+        arena = self.arena
+        value = self.visit(arena.second[node])
+        self.environment.assign(arena.names[arena.first[node]], value)
+
+    def visit_if(self, node: int) -> None:
+        arena = self.arena
+        if self.is_truthy(self.visit(arena.first[node])):
+            self.visit(arena.second[node])
+        elif arena.third[node] >= 0:
+            self.visit(arena.third[node])
+
+    def visit_while(self, node: int) -> None:
+        body = self.arena.first[node]
+        condition = self.arena.second[node]
+        try:
+            while True:
+                try:
+                    self.visit(body)
+                except ContinueError:
+                    pass
+                if not self.is_truthy(self.visit(condition)):
+                    break
+        except BreakError:
+            pass
+
+    def visit_block(self, node: int) -> None:
+        previous = self.environment
+        try:
+            self.environment = Environment(self.environment)
+            for statement in self.arena.statements(node):
+                self.visit(statement)
+        finally:
+            self.environment = previous
+
+    def visit_break(self, node: int) -> None:
+        raise BreakError()
+
+    def visit_continue(self, node: int) -> None:
+        raise ContinueError()
+
+    def visit_binary(self, node: int) -> KemValue:
+        arena = self.arena
+        left = self.visit(arena.first[node])
+        right = self.visit(arena.second[node])
+        return self.binary_operation(arena.third[node], left, right)
+
+    def visit_unary(self, node: int) -> KemValue:
+        return self.unary_operation(self.arena.third[node], self.visit(self.arena.first[node]))
+
+    def visit_literal(self, node: int) -> KemValue:
+        return self.arena.literals[self.arena.first[node]]
+
+    def visit_variable(self, node: int) -> KemValue:
+        return self.environment.get(self.arena.names[self.arena.first[node]])
+
+    def visit_input(self, node: int) -> KemValue:
+        return self.input_fn().rstrip('\n')
+
+
+EXECUTION_ENGINES = ("tree", "slots", "vm", "closure", "python")
+
+
+def engine_class(engine: str) -> Type[Interpreter]:
+    """Interpreter class for an execution engine in ``EXECUTION_ENGINES``."""
+    if engine == "tree":
+        return Interpreter
+    # The other engines build on Interpreter, so they are imported on first use
+    if engine == "slots":
+        from .resolver import SlotInterpreter
+        return SlotInterpreter
+    if engine == "vm":
+        from .vm import VirtualMachine
+        return VirtualMachine
+    if engine == "closure":
+        from .closures import ClosureInterpreter
+        return ClosureInterpreter
+    if engine == "python":
+        from .transpile import PythonInterpreter
+        return PythonInterpreter
+    raise ValueError(f"Unknown execution engine '{engine}'")
+
+
+def run(source: SourceData, *, input_fn: Callable[[], str] = input, output_fn: Callable[[str], None] = print,
+        engine: str = "tree") -> int:
+    """Run KemLang source code. Returns exit code 0 on success, 1 on error.
+
+    ``engine`` is ``"tree"`` to walk the AST, ``"slots"`` to walk it with
+    variables resolved to frame slots, ``"vm"`` to compile it to bytecode,
+    ``"closure"`` to compile it to Python closures or ``"python"`` to
+    transpile it to a Python module; all produce the same output and error
+    messages, except that ``"slots"`` reports undefined and redeclared
+    variables before running anything.
+    """
     try:
         program = parse_program(source)
-        interpreter = Interpreter(input_fn, output_fn)
+        interpreter = engine_class(engine)(input_fn, output_fn)
         return interpreter.interpret(program)
     except Exception as e:
         output_fn(f"Error: {str(e)}")
@@ -1,56 +1,264 @@
+import mmap
 import re
-from typing import List, Optional, Dict, Tuple
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
 
 from .types import Token, TokenType
 from .errors import LexerError
+from .source import LineIndex, SourceData
+
+
+_STRING_STOP = re.compile(r'["\\\n]')
+_ESCAPE_PATTERN = re.compile(r"\\(.)", re.DOTALL)
+_ESCAPES = {"n": "\n", "t": "\t", '"': '"', "\\": "\\"}
+
+
+# Character classes for the hand-written scanners. Identifiers start with a
+# letter or "_" and continue with letters, digits, other numerics and
+# combining marks (Mn/Mc), which Gujarati vowel signs and virama are.
+_OTHER, _DIGIT, _LETTER, _CONTINUE = range(4)
+
+
+def _classify(c: str) -> int:
+    if c.isalpha() or c == "_":
+        return _LETTER
+    if c.isdecimal():
+        return _DIGIT
+    if c.isalnum() or unicodedata.category(c) in ("Mn", "Mc"):
+        return _CONTINUE
+    return _OTHER
+
+
+# Byte table for ASCII, computed once
+_ASCII_CLASSES = bytes(_classify(chr(i)) for i in range(128))
+
+# Lookup cache seeded from the ASCII table; non-ASCII code points are
+# classified on first sight
+_char_classes: Dict[str, int] = {chr(i): cls for i, cls in enumerate(_ASCII_CLASSES)}
+
+
+def _char_class(c: str) -> int:
+    cls = _char_classes.get(c)
+    if cls is None:
+        cls = _char_classes[c] = _classify(c)
+    return cls
+
+
+def _string_problems(source: str, start: int) -> Tuple[int, List[Tuple[str, int]]]:
+    """Find what is wrong with the string literal whose quote is at ``start``.
+
+    Returns the offset where lexing resumes and ``(message, offset)`` pairs
+    in the order a left-to-right scan meets them. A terminated literal ends
+    after its closing quote; an unterminated one is cut at the end of its
+    first line, so the rest of the file is lexed as code again.
+    """
+    problems = []
+    length = len(source)
+    i = start + 1
+    while i < length:
+        c = source[i]
+        if c == "\\":
+            escaped = source[i + 1] if i + 1 < length else "\0"
+            if escaped not in _ESCAPES:
+                problems.append((f"Unknown escape sequence '\\{escaped}'", i))
+            i += 2
+        elif c == '"':
+            return i + 1, problems
+        else:
+            i += 1
+    problems.append(("Unterminated string", start))
+    line_end = source.find("\n", start)
+    return (line_end if line_end != -1 else length), problems
+
+
+def _identifier_end(source: str, pos: int) -> int:
+    """Offset just past the identifier characters starting at ``pos``."""
+    classes = _char_classes
+    length = len(source)
+    while pos < length:
+        c = source[pos]
+        cls = classes.get(c)
+        if cls is None:
+            cls = _char_class(c)
+        if cls == _OTHER:
+            break
+        pos += 1
+    return pos
+
+
+class _KeywordNode:
+    __slots__ = ("token_type", "children")
+
+    def __init__(self) -> None:
+        self.token_type: Optional[TokenType] = None
+        self.children: Dict[str, "_KeywordNode"] = {}
+
+
+class KeywordTable:
+    """Word-level trie over keyword phrases such as "bapu tame bolo".
+
+    Lookups start from an already-scanned identifier and only inspect the
+    following words when that identifier can begin a longer phrase, so plain
+    identifiers cost a single dict lookup. Dialect aliases can be added with
+    :meth:`register`.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, TokenType]] = ()):
+        self.root: Dict[str, _KeywordNode] = {}
+        # Single-word keywords, kept flat for the lexers' hot path
+        self.words: Dict[str, TokenType] = {}
+        # Every multi-word phrase, used to build RegexLexer's pattern
+        self.phrases: Dict[str, TokenType] = {}
+        self.version = 0
+        for phrase, token_type in entries:
+            self.register(phrase, token_type)
+
+    def register(self, phrase: str, token_type: TokenType) -> None:
+        """Add a keyword phrase. Words are separated by single spaces."""
+        words = phrase.split(" ")
+        if not all(words):
+            raise ValueError(f"Invalid keyword phrase '{phrase}'")
+
+        node = self.root.setdefault(words[0], _KeywordNode())
+        for word in words[1:]:
+            node = node.children.setdefault(word, _KeywordNode())
+        node.token_type = token_type
+
+        if len(words) == 1:
+            self.words[phrase] = token_type
+        else:
+            self.phrases[phrase] = token_type
+        self.version += 1
+
+    def copy(self) -> "KeywordTable":
+        table = KeywordTable(self.words.items())
+        for phrase, token_type in self.phrases.items():
+            table.register(phrase, token_type)
+        return table
+
+    def match(self, source: str, start: int, end: int) -> Tuple[Optional[TokenType], int]:
+        """Match the longest keyword starting with the word source[start:end].
+
+        Returns the keyword type (or None) and the offset where it ends.
+        """
+        node = self.root.get(source[start:end])
+        if node is None:
+            return None, end
+
+        best_type, best_end = node.token_type, end
+        length = len(source)
+        pos = end
+        while node.children and pos < length and source[pos] == " ":
+            word_end = _identifier_end(source, pos + 1)
+            node = node.children.get(source[pos + 1:word_end])
+            if node is None:
+                break
+            pos = word_end
+            if node.token_type is not None:
+                best_type, best_end = node.token_type, pos
+
+        return best_type, best_end
+
+
+# Gujarati-script spellings of every keyword
+GUJARATI_KEYWORDS = [
+    ("કેમ ભાઈ", TokenType.KEM_BHAI),
+    ("આવજો ભાઈ", TokenType.AAVJO_BHAI),
+    ("ભાઈ બોલ", TokenType.BHAI_BOL),
+    ("બાપુ તમે બોલો", TokenType.BAPU_TAME_BOLO),
+    ("ભાઈ છે", TokenType.BHAI_CHHE),
+    ("ભાઈ નથી", TokenType.BHAI_NATHI),
+    ("જ્યાં સુધી", TokenType.JYA_SUDHI),
+    ("તમે જાઓ", TokenType.TAME_JAO),
+    ("આગળ વધો", TokenType.AAGAL_VADO),
+    ("નહિ તો", TokenType.ELSE),
+    ("આ", TokenType.AA),
+    ("છે", TokenType.CHE),
+    ("જો", TokenType.JO),
+    ("નહિ", TokenType.NAHI),
+    ("તો", TokenType.TO),
+    ("ફરવું", TokenType.FARVU),
+]
+
+KEYWORDS = KeywordTable([
+    ("kem bhai", TokenType.KEM_BHAI),
+    ("aavjo bhai", TokenType.AAVJO_BHAI),
+    ("bhai bol", TokenType.BHAI_BOL),
+    ("bapu tame bolo", TokenType.BAPU_TAME_BOLO),
+    ("bhai chhe", TokenType.BHAI_CHHE),
+    ("bhai nathi", TokenType.BHAI_NATHI),
+    ("jya sudhi", TokenType.JYA_SUDHI),
+    ("tame jao", TokenType.TAME_JAO),
+    ("aagal vado", TokenType.AAGAL_VADO),
+    ("nahi to", TokenType.ELSE),
+    ("aa", TokenType.AA),
+    ("che", TokenType.CHE),
+    ("jo", TokenType.JO),
+    ("nahi", TokenType.NAHI),
+    ("to", TokenType.TO),
+    ("farvu", TokenType.FARVU),
+] + GUJARATI_KEYWORDS)
+
+
+_SINGLE_CHARS: Dict[str, TokenType] = {
+    '(': TokenType.LEFT_PAREN,
+    ')': TokenType.RIGHT_PAREN,
+    '{': TokenType.LEFT_BRACE,
+    '}': TokenType.RIGHT_BRACE,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+    '%': TokenType.MODULO,
+}
 
 
 class Lexer:
-    def __init__(self, source: str):
+    """Character-at-a-time reference lexer.
+
+    By default the first lexical error raises :class:`LexerError`. With
+    ``recover=True`` each error is recorded in ``errors`` instead, the bad
+    input becomes an ``ERROR`` token (its literal is the message) and
+    scanning continues.
+    """
+
+    def __init__(self, source: str, keywords: Optional[KeywordTable] = None,
+                 recover: bool = False):
         self.source = source
+        self.recover = recover
+        self.errors: List[LexerError] = []
         self.tokens: List[Token] = []
         self.start = 0
         self.current = 0
-        self.line = 1
-        self.col = 1
-
-        # Multi-word keywords (order matters - longer first)
-        self.multiword_keywords = [
-            ("kem bhai", TokenType.KEM_BHAI),
-            ("aavjo bhai", TokenType.AAVJO_BHAI),
-            ("bhai bol", TokenType.BHAI_BOL),
-            ("bapu tame bolo", TokenType.BAPU_TAME_BOLO),
-            ("bhai chhe", TokenType.BHAI_CHHE),
-            ("bhai nathi", TokenType.BHAI_NATHI),
-            ("jya sudhi", TokenType.JYA_SUDHI),
-            ("tame jao", TokenType.TAME_JAO),
-            ("aagal vado", TokenType.AAGAL_VADO),
-            ("nahi to", TokenType.ELSE),
-        ]
-
-        # Single-word keywords
-        self.keywords: Dict[str, TokenType] = {
-            "aa": TokenType.AA,
-            "che": TokenType.CHE,
-            "jo": TokenType.JO,
-            "nahi": TokenType.NAHI,
-            "to": TokenType.TO,
-            "farvu": TokenType.FARVU,
-        }
+        self.lines = LineIndex(source)
+        self.keywords = keywords if keywords is not None else KEYWORDS
+        # Per-compilation pool so repeated names and literals share one object
+        pool: Dict[str, str] = {}
+        self.intern = pool.setdefault
 
     def tokenize(self) -> List[Token]:
         while not self.is_at_end():
             self.start = self.current
             self.scan_token()
 
-        self.tokens.append(Token(TokenType.EOF, "", self.line, self.col))
+        self.tokens.append(Token(TokenType.EOF, "", self.current, None, self.lines))
         return self.tokens
 
+    def iter_tokens(self) -> Iterator[Token]:
+        """Yield tokens one at a time instead of building the full list."""
+        pending = self.tokens
+        while not self.is_at_end():
+            self.start = self.current
+            self.scan_token()
+            if pending:
+                yield pending.pop()
+
+        yield Token(TokenType.EOF, "", self.current, None, self.lines)
+
     def is_at_end(self) -> bool:
         return self.current >= len(self.source)
 
-    def scan_token(self):
-        start_col = self.col
+    def scan_token(self) -> None:
         c = self.advance()
 
         # Whitespace (except newlines)
@@ -60,25 +268,25 @@ class Lexer:
         # Newlines
         if c == '\n':
             self.add_token(TokenType.NEWLINE)
-            self.line += 1
-            self.col = 1
+            return
+
+        # Character class from the precomputed tables
+        cls = _char_class(c)
+
+        # Numbers
+        if cls == _DIGIT:
+            self.number()
+            return
+
+        # Identifiers and keywords
+        if cls == _LETTER:
+            self.identifier_or_keyword()
             return
 
         # Single character tokens
-        single_chars = {
-            '(': TokenType.LEFT_PAREN,
-            ')': TokenType.RIGHT_PAREN,
-            '{': TokenType.LEFT_BRACE,
-            '}': TokenType.RIGHT_BRACE,
-            '+': TokenType.PLUS,
-            '-': TokenType.MINUS,
-            '*': TokenType.MULTIPLY,
-            '/': TokenType.DIVIDE,
-            '%': TokenType.MODULO,
-        }
-
-        if c in single_chars:
-            self.add_token(single_chars[c])
+        token_type = _SINGLE_CHARS.get(c)
+        if token_type is not None:
+            self.add_token(token_type)
             return
 
         # Two character operators
@@ -86,14 +294,14 @@ class Lexer:
             if self.match('='):
                 self.add_token(TokenType.EQUAL)
             else:
-                self.error(f"Unexpected character '='")
+                self.error_token("Unexpected character '='")
             return
 
         if c == '!':
             if self.match('='):
                 self.add_token(TokenType.NOT_EQUAL)
             else:
-                self.error(f"Unexpected character '!'")
+                self.error_token("Unexpected character '!'")
             return
 
         if c == '<':
@@ -115,23 +323,12 @@ class Lexer:
             self.string()
             return
 
-        # Numbers
-        if c.isdigit():
-            self.number()
-            return
-
-        # Identifiers and keywords
-        if c.isalpha() or c == '_':
-            self.identifier_or_keyword()
-            return
-
-        self.error(f"Unexpected character '{c}'")
+        self.error_token(f"Unexpected character '{c}'")
 
     def advance(self) -> str:
         if self.is_at_end():
             return '\0'
         self.current += 1
-        self.col += 1
         return self.source[self.current - 1]
 
     def match(self, expected: str) -> bool:
@@ -140,7 +337,6 @@ class Lexer:
         if self.source[self.current] != expected:
             return False
         self.current += 1
-        self.col += 1
         return True
 
     def peek(self) -> str:
@@ -153,88 +349,508 @@ class Lexer:
             return '\0'
         return self.source[self.current + 1]
 
-    def string(self):
-        start_line = self.line
-        start_col = self.col - 1
-
-        value = ""
-        while self.peek() != '"' and not self.is_at_end():
-            if self.peek() == '\n':
-                self.line += 1
-                self.col = 1
-            elif self.peek() == '\\':
-                self.advance()  # consume backslash
-                escaped = self.peek()
-                if escaped == 'n':
-                    value += '\n'
-                elif escaped == 't':
-                    value += '\t'
-                elif escaped == '"':
-                    value += '"'
-                elif escaped == '\\':
-                    value += '\\'
-                else:
-                    self.error(f"Unknown escape sequence '\\{escaped}'")
-                    return
-                self.advance()  # consume escaped character
-            else:
-                value += self.advance()
-
-        if self.is_at_end():
-            self.error("Unterminated string", start_line, start_col)
-            return
+    def string(self) -> None:
+        # Copy whole runs between escapes/newlines in one slice and join at
+        # the end, keeping long literals linear in their length.
+        source = self.source
+        parts: List[str] = []
+        while True:
+            stop = _STRING_STOP.search(source, self.current)
+            run_end = stop.start() if stop else len(source)
+            if run_end != self.current:
+                parts.append(source[self.current:run_end])
+                self.current = run_end
+
+            if self.is_at_end():
+                self.string_error("Unterminated string", self.start)
+                return
+
+            c = self.peek()
+            if c == '"':
+                break
+            if c == '\n':
+                parts.append(self.advance())
+                continue
+
+            self.advance()  # consume backslash
+            escaped = self.peek()
+            if escaped not in _ESCAPES:
+                self.string_error(f"Unknown escape sequence '\\{escaped}'", self.current - 1)
+                return
+            parts.append(_ESCAPES[escaped])
+            self.advance()  # consume escaped character
 
         # Consume closing quote
         self.advance()
+        value = "".join(parts)
+        value = self.intern(value, value)
         self.add_token(TokenType.STRING, value)
 
-    def number(self):
-        while self.peek().isdigit():
-            self.advance()
+    def string_error(self, message: str, offset: int) -> None:
+        """Report a bad string literal.
+
+        In recover mode the literal is rescanned from its quote so that every
+        problem before the recovery point is reported, and it becomes one
+        ERROR token.
+        """
+        if not self.recover:
+            self.error(message, offset)
+        end, problems = _string_problems(self.source, self.start)
+        problems = [(message, offset) for message, offset in problems if offset < end]
+        for message, offset in problems:
+            self.error(message, offset)
+        self.current = end
+        self.add_token(TokenType.ERROR, problems[0][0])
+
+    def number(self) -> None:
+        source = self.source
+        while self.current < len(source) and _char_class(source[self.current]) == _DIGIT:
+            self.current += 1
 
         # Look for fractional part (not in spec but good for future)
         value = int(self.source[self.start:self.current])
         self.add_token(TokenType.INTEGER, value)
 
-    def identifier_or_keyword(self):
-        # First, try to match multi-word keywords
-        remaining_source = self.source[self.start:]
-
-        for keyword, token_type in self.multiword_keywords:
-            if remaining_source.startswith(keyword):
-                # Check if this is a complete word boundary
-                end_pos = self.start + len(keyword)
-                if (end_pos >= len(self.source) or
-                    not (self.source[end_pos].isalnum() or self.source[end_pos] == '_')):
-                    # Update position to end of keyword
-                    self.current = end_pos
-                    self.col = self.col - 1 + len(keyword)  # -1 because we already advanced once
-                    self.add_token(token_type)
-                    return
-
-        # If no multi-word keyword matches, scan a regular identifier
-        while (self.peek().isalnum() or self.peek() == '_'):
-            self.advance()
+    def identifier_or_keyword(self) -> None:
+        self.current = _identifier_end(self.source, self.current)
 
-        text = self.source[self.start:self.current]
-        token_type = self.keywords.get(text, TokenType.IDENTIFIER)
+        token_type, end = self.keywords.match(self.source, self.start, self.current)
+        if token_type is None:
+            text = self.source[self.start:self.current]
+            self.tokens.append(Token(TokenType.IDENTIFIER, self.intern(text, text), self.start,
+                                     None, self.lines))
+            return
+        # Multi-word keyword: jump to the end of the phrase
+        self.current = end
         self.add_token(token_type)
 
-    def add_token(self, token_type: TokenType, literal=None):
+    def add_token(self, token_type: TokenType, literal: Any = None) -> None:
         text = self.source[self.start:self.current]
-        # For multiword tokens, adjust the column to the start
-        col = self.col - len(text)
-        self.tokens.append(Token(token_type, text, self.line, col, literal))
-
-    def error(self, message: str, line: Optional[int] = None, col: Optional[int] = None):
-        if line is None:
-            line = self.line
-        if col is None:
-            col = self.col - 1
-        raise LexerError(message, line, col)
-
-
-def tokenize(source: str) -> List[Token]:
-    """Convenience function to tokenize source code."""
-    lexer = Lexer(source)
-    return lexer.tokenize()
\ No newline at end of file
+        self.tokens.append(Token(token_type, text, self.start, literal, self.lines))
+
+    def error_token(self, message: str) -> None:
+        """Report the last consumed character and, in recover mode, emit it as ERROR."""
+        self.error(message)
+        self.add_token(TokenType.ERROR, message)
+
+    def error(self, message: str, offset: Optional[int] = None) -> None:
+        """Report a LexerError at ``offset``, by default the last consumed character.
+
+        Raises unless recovering, in which case the error is recorded.
+        """
+        if offset is None:
+            offset = self.current - 1
+        line, col = self.lines.position(offset)
+        if not self.recover:
+            raise LexerError(message, line, col)
+        self.errors.append(LexerError(message, line, col))
+
+
+# Master pattern for RegexLexer. Leading whitespace is folded into every
+# match, so each iteration of the scanning loop yields a real token. The
+# multi-word keyword alternative is generated from a KeywordTable.
+_PATTERN_TEMPLATE = (
+    r"[ \t\r]*(?:"
+    r"(\n)"                                           # 1: newline
+    r"|((?:<phrases>)(?!\w))"                          # 2: multi-word keyword
+    r"|([^\W\d]\w*)"                                   # 3: identifier / keyword
+    r"|(\d+)"                                         # 4: integer
+    r'|("[^"\\]*(?:\\[nt"\\][^"\\]*)*")'                 # 5: string
+    r"|(==|!=|<=|>=|[-+*/%(){}<>])"                   # 6: operator / delimiter
+    r"|(.)"                                            # 7: anything else is an error
+    r"|(\Z))"                                         # 8: end of input
+)
+
+_patterns: Dict[int, Tuple[int, "re.Pattern[str]"]] = {}
+
+
+def _master_pattern(keywords: KeywordTable) -> "re.Pattern[str]":
+    """Compile (and cache per table version) the master token pattern."""
+    cached = _patterns.get(id(keywords))
+    if cached is not None and cached[0] == keywords.version:
+        return cached[1]
+
+    # Longest phrases first so that the alternation prefers them
+    phrases = sorted(keywords.phrases, key=len, reverse=True)
+    alternation = "|".join(re.escape(phrase) for phrase in phrases) or "(?!)"
+    pattern = re.compile(_PATTERN_TEMPLATE.replace("<phrases>", alternation), re.DOTALL)
+    _patterns[id(keywords)] = (keywords.version, pattern)
+    return pattern
+
+
+_NEWLINE, _MULTIWORD, _IDENT, _INT, _STRING, _OPERATOR, _ERROR, _END = range(1, 9)
+
+_OPERATORS: Dict[str, TokenType] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.MULTIPLY,
+    "/": TokenType.DIVIDE,
+    "%": TokenType.MODULO,
+    "==": TokenType.EQUAL,
+    "!=": TokenType.NOT_EQUAL,
+    "<": TokenType.LESS,
+    ">": TokenType.GREATER,
+    "<=": TokenType.LESS_EQUAL,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+
+def _unescape(match: "re.Match[str]") -> str:
+    return _ESCAPES[match.group(1)]
+
+
+class RegexLexer:
+    """Single-pass lexer driven by one compiled alternation pattern.
+
+    Produces exactly the same tokens and errors as :class:`Lexer`, but lets
+    the regex engine do the character-level work. ``recover`` works as for
+    :class:`Lexer`.
+    """
+
+    def __init__(self, source: str, keywords: Optional[KeywordTable] = None,
+                 recover: bool = False):
+        self.source = source
+        self.recover = recover
+        self.errors: List[LexerError] = []
+        self.keywords = keywords if keywords is not None else KEYWORDS
+        self.lines = LineIndex(source)
+        # Per-compilation pool so repeated names and literals share one object
+        pool: Dict[str, str] = {}
+        self.intern = pool.setdefault
+
+    def tokenize(self) -> List[Token]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Yield tokens one at a time instead of building the full list."""
+        source = self.source
+        intern = self.intern
+        lines = self.lines
+
+        for token_type, start, end, literal in self.scan():
+            text = source[start:end]
+            if token_type is TokenType.IDENTIFIER:
+                text = intern(text, text)
+            yield Token(token_type, text, start, literal, lines)
+
+    def scan(self, pos: int = 0) -> Iterator[Tuple[TokenType, int, int, Any]]:
+        """Yield raw ``(type, start, end, literal)`` tuples starting at ``pos``.
+
+        This is the engine behind :meth:`iter_tokens` and
+        :class:`~kemlang.tokenbuffer.TokenBuffer`; it never builds Token
+        objects.
+        """
+        source = self.source
+        length = len(source)
+        pattern = _master_pattern(self.keywords)
+        words = self.keywords.words
+        phrases = self.keywords.phrases
+        intern = self.intern
+
+        while True:
+            for m in pattern.finditer(source, pos):
+                kind = m.lastindex or 0
+                start, end = m.span(kind)
+
+                if kind == _IDENT or kind == _MULTIWORD:
+                    text = m.group(kind)
+                    if not text.isascii() and not (text[0] == "_" or text[0].isalpha()):
+                        message = f"Unexpected character '{text[0]}'"
+                        self.error(message, start)
+                        yield TokenType.ERROR, start, start + 1, message
+                        pos = start + 1
+                        break
+                    if end < length and source[end] > "\x7f" and _char_class(source[end]):
+                        # \w does not cover combining marks such as Gujarati
+                        # vowel signs, so finish the word with the tables and
+                        # restart the pattern after it
+                        token_type, pos = self.keywords.match(
+                            source, start, _identifier_end(source, start + 1))
+                        yield token_type or TokenType.IDENTIFIER, start, pos, None
+                        break
+                    if kind == _IDENT:
+                        yield words.get(text, TokenType.IDENTIFIER), start, end, None
+                    else:
+                        yield phrases[text], start, end, None
+                elif kind == _OPERATOR:
+                    yield _OPERATORS[m.group(kind)], start, end, None
+                elif kind == _NEWLINE:
+                    yield TokenType.NEWLINE, start, end, None
+                elif kind == _INT:
+                    yield TokenType.INTEGER, start, end, int(m.group(kind))
+                elif kind == _STRING:
+                    value = source[start + 1:end - 1]
+                    if "\\" in value:
+                        value = _ESCAPE_PATTERN.sub(_unescape, value)
+                    yield TokenType.STRING, start, end, intern(value, value)
+                elif kind == _ERROR:
+                    if m.group(kind) == '"':
+                        pos, message = self.string_error(start)
+                        yield TokenType.ERROR, start, pos, message
+                        break
+                    message = f"Unexpected character '{m.group(kind)}'"
+                    self.error(message, start)
+                    yield TokenType.ERROR, start, end, message
+                else:
+                    yield TokenType.EOF, start, end, None
+                    return
+
+    def string_error(self, start: int) -> Tuple[int, str]:
+        """Diagnose a string literal that the master pattern rejected.
+
+        Raises on the first problem unless recovering; then reports every
+        problem before the recovery point and returns that point and the
+        first message.
+        """
+        end, problems = _string_problems(self.source, start)
+        if not self.recover:
+            self.error(*problems[0])
+        problems = [(message, offset) for message, offset in problems if offset < end]
+        for message, offset in problems:
+            self.error(message, offset)
+        return end, problems[0][0]
+
+    def error(self, message: str, offset: int) -> None:
+        line, col = self.lines.position(offset)
+        if not self.recover:
+            raise LexerError(message, line, col)
+        self.errors.append(LexerError(message, line, col))
+
+
+# Bytes flavour of the master pattern for ByteLexer. ASCII is lexed
+# directly; any token touching a non-ASCII byte (group 3) is decoded and
+# handed to RegexLexer, so Unicode rules stay defined in one place.
+_BYTES_PATTERN_TEMPLATE = (
+    rb"[ \t\r]*(?:"
+    rb"(\n)"                                           # 1: newline
+    rb"|((?:<phrases>)(?!\w))"                          # 2: multi-word keyword
+    rb"|((?:[A-Za-z_]\w*|\d+)?[\x80-\xff])"            # 3: non-ASCII, decoded
+    rb"|([A-Za-z_]\w*)"                                # 4: identifier / keyword
+    rb"|(\d+)"                                         # 5: integer
+    rb'|("[^"\\]*(?:\\[nt"\\][^"\\]*)*")'                 # 6: string
+    rb"|(==|!=|<=|>=|[-+*/%(){}<>])"                   # 7: operator / delimiter
+    rb"|(.)"                                            # 8: anything else is an error
+    rb"|(\Z))"                                         # 9: end of input
+)
+
+_bytes_patterns: Dict[int, Tuple[int, "re.Pattern[bytes]", Dict[bytes, TokenType]]] = {}
+
+_B_NEWLINE, _B_MULTIWORD, _B_DECODE, _B_IDENT, _B_INT, _B_STRING, _B_OPERATOR, _B_ERROR, _B_END = \
+    range(1, 10)
+
+
+def _bytes_pattern(keywords: KeywordTable) -> Tuple["re.Pattern[bytes]", Dict[bytes, TokenType]]:
+    """Compile (and cache per table version) the bytes pattern and keyword map."""
+    cached = _bytes_patterns.get(id(keywords))
+    if cached is not None and cached[0] == keywords.version:
+        return cached[1], cached[2]
+
+    phrases = sorted((p.encode("utf-8") for p in keywords.phrases), key=len, reverse=True)
+    alternation = b"|".join(re.escape(phrase) for phrase in phrases) or b"(?!)"
+    pattern = re.compile(_BYTES_PATTERN_TEMPLATE.replace(b"<phrases>", alternation), re.DOTALL)
+    words = {word.encode("utf-8"): token_type for word, token_type in keywords.words.items()}
+    words.update((p.encode("utf-8"), t) for p, t in keywords.phrases.items())
+    _bytes_patterns[id(keywords)] = (keywords.version, pattern, words)
+    return pattern, words
+
+
+class ByteLexer:
+    """Lexer that works directly on UTF-8 bytes, e.g. a memory-mapped file.
+
+    Only identifier and literal slices are decoded. Token offsets are byte
+    offsets, but line and column numbers are counted in characters as for
+    :class:`Lexer`, so positions and errors match lexing the decoded text. Line breaks inside
+    string literals are normalized to ``\\n`` like a text-mode read.
+    """
+
+    def __init__(self, data: Union[bytes, mmap.mmap], keywords: Optional[KeywordTable] = None,
+                 recover: bool = False) -> None:
+        self.data = data
+        self.recover = recover
+        self.errors: List[LexerError] = []
+        self.keywords = keywords if keywords is not None else KEYWORDS
+        # Offsets are byte offsets; columns are still counted in characters
+        self.lines = LineIndex(data)
+        # Decoded lexemes by their bytes; doubles as the intern pool
+        self.lexemes: Dict[bytes, str] = {}
+
+    def tokenize(self) -> List[Token]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Yield tokens one at a time instead of building the full list."""
+        data = self.data
+        pattern, words = _bytes_pattern(self.keywords)
+        lexemes = self.lexemes
+        lines = self.lines
+        pos = 0
+
+        while True:
+            for m in pattern.finditer(data, pos):
+                kind = m.lastindex or 0
+                start, end = m.span(kind)
+
+                if kind == _B_MULTIWORD and end < len(data) and data[end] > 0x7f:
+                    # Whether a non-ASCII character continues the last word
+                    # is a Unicode question, so let the str lexer decide
+                    token, pos = self.decoded_token(start)
+                    yield token
+                    break
+                if kind == _B_IDENT or kind == _B_OPERATOR or kind == _B_MULTIWORD:
+                    raw = m.group(kind)
+                    text = lexemes.get(raw)
+                    if text is None:
+                        text = lexemes[raw] = raw.decode("utf-8")
+                    if kind == _B_OPERATOR:
+                        token_type = _OPERATORS[text]
+                    else:
+                        token_type = words.get(raw, TokenType.IDENTIFIER)
+                    yield Token(token_type, text, start, None, lines)
+                elif kind == _B_NEWLINE:
+                    yield Token(TokenType.NEWLINE, "\n", start, None, lines)
+                elif kind == _B_INT:
+                    text = m.group(kind).decode("ascii")
+                    yield Token(TokenType.INTEGER, text, start, int(text), lines)
+                elif kind == _B_STRING:
+                    raw = m.group(kind)
+                    text = raw.decode("utf-8")
+                    if "\r" in text:
+                        text = text.replace("\r\n", "\n").replace("\r", "\n")
+                    value = text[1:-1]
+                    if "\\" in value:
+                        value = _ESCAPE_PATTERN.sub(_unescape, value)
+                    yield Token(TokenType.STRING, text, start, lexemes.setdefault(raw, value), lines)
+                elif kind == _B_DECODE:
+                    token, pos = self.decoded_token(start)
+                    yield token
+                    # finditer cannot be repositioned, so restart it after the token
+                    break
+                elif kind == _B_ERROR:
+                    if m.group(kind) == b'"':
+                        pos, message = self.string_error(start)
+                        text = bytes(data[start:pos]).decode("utf-8")
+                        yield Token(TokenType.ERROR, text, start, message, lines)
+                        break
+                    text = m.group(kind).decode("ascii")
+                    message = f"Unexpected character '{text}'"
+                    self.error(message, start)
+                    yield Token(TokenType.ERROR, text, start, message, lines)
+                else:
+                    yield Token(TokenType.EOF, "", start, None, lines)
+                    return
+
+    def decoded_token(self, start: int) -> Tuple[Token, int]:
+        """Lex one token containing non-ASCII text with the str lexer.
+
+        Returns the token and the byte offset just after it.
+        """
+        data = self.data
+        end = data.find(b"\n", start)
+        segment = data[start:end if end != -1 else len(data)].decode("utf-8")
+        lexer = RegexLexer(segment, self.keywords, self.recover)
+        try:
+            token_type, token_start, token_end, literal = next(lexer.scan())
+        except LexerError as e:
+            line, col = self.lines.position(start)
+            raise LexerError(e.message, line, col + e.col - 1) from None
+        if lexer.errors:
+            line, col = self.lines.position(start)
+            self.errors.extend(LexerError(e.message, line, col + e.col - 1) for e in lexer.errors)
+        text = segment[token_start:token_end]
+        # Intern by the token's bytes, as iter_tokens() does
+        raw = text.encode("utf-8")
+        if token_type is TokenType.IDENTIFIER:
+            text = self.lexemes.setdefault(raw, text)
+        elif token_type is TokenType.STRING:
+            literal = self.lexemes.setdefault(raw, literal)
+        return Token(token_type, text, start, literal, self.lines), start + len(raw)
+
+    def string_error(self, start: int) -> Tuple[int, str]:
+        """Diagnose a string literal that the bytes pattern rejected.
+
+        Works like :meth:`RegexLexer.string_error` on the decoded literal.
+        """
+        data = self.data
+        # Find the literal's extent first; UTF-8 continuation bytes never
+        # look like a quote or a backslash
+        i = start + 1
+        while i < len(data):
+            c = data[i]
+            if c == 0x5C:  # backslash
+                i += 2
+            elif c == 0x22:  # closing quote
+                i += 1
+                break
+            else:
+                i += 1
+        text = bytes(data[start:i]).decode("utf-8")
+        end, problems = _string_problems(text, 0)
+
+        def byte_offset(offset: int) -> int:
+            return start + len(text[:offset].encode("utf-8"))
+
+        if not self.recover:
+            self.error(problems[0][0], byte_offset(problems[0][1]))
+        problems = [(message, offset) for message, offset in problems if offset < end]
+        for message, offset in problems:
+            self.error(message, byte_offset(offset))
+        return byte_offset(end), problems[0][0]
+
+    def error(self, message: str, offset: int) -> None:
+        line, col = self.lines.position(offset)
+        if not self.recover:
+            raise LexerError(message, line, col)
+        self.errors.append(LexerError(message, line, col))
+
+
+LEXER_ENGINES: Dict[str, Type[Union[Lexer, RegexLexer]]] = {
+    "classic": Lexer,
+    "regex": RegexLexer,
+}
+
+
+def make_lexer(source: SourceData, engine: str = "classic",
+               recover: bool = False) -> Union["Lexer", "RegexLexer", "ByteLexer"]:
+    """Create a lexer for ``source``; see :func:`tokenize` for ``engine``.
+
+    Byte sources always get a :class:`ByteLexer`. With ``recover`` the
+    lexer keeps going past bad input and collects its ``errors``.
+    """
+    if not isinstance(source, str):
+        # bytes, mmap or other UTF-8 buffers
+        return ByteLexer(source, recover=recover)
+    try:
+        lexer_class = LEXER_ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Unknown lexer engine '{engine}'") from None
+    return lexer_class(source, recover=recover)
+
+
+def tokenize(source: SourceData, engine: str = "classic") -> List[Token]:
+    """Convenience function to tokenize source code.
+
+    ``engine`` selects the lexer implementation: ``"classic"`` (the
+    character-at-a-time reference lexer) or ``"regex"`` (single-pass master
+    pattern). Both produce identical token streams and errors.
+    """
+    return make_lexer(source, engine).tokenize()
+
+
+def iter_tokens(source: SourceData, engine: str = "classic") -> Iterator[Token]:
+    """Lazily tokenize source code; see :func:`tokenize` for ``engine``."""
+    return make_lexer(source, engine).iter_tokens()
+
+
+def tokenize_with_errors(source: SourceData,
+                         engine: str = "classic") -> Tuple[List[Token], List[LexerError]]:
+    """Tokenize without stopping at lexical errors.
+
+    Returns the full token stream, with ``ERROR`` tokens covering bad input,
+    and every lexical error in the order they were found.
+    """
+    lexer = make_lexer(source, engine, recover=True)
+    return lexer.tokenize(), lexer.errors
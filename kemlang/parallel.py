@@ -0,0 +1,113 @@
+from bisect import bisect_left
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from .types import Token
+from .errors import LexerError
+from .lexer import KeywordTable, RegexLexer
+from .tokenbuffer import TokenBuffer, tokenize_buffer
+
+
+# Sources that fit in one chunk are lexed in-process
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def split_chunks(source: str, chunk_size: int) -> List[int]:
+    """Start offsets of roughly ``chunk_size`` chunks, each beginning a line."""
+    starts = [0]
+    while True:
+        newline = source.find('\n', starts[-1] + chunk_size)
+        if newline == -1 or newline + 1 >= len(source):
+            return starts
+        starts.append(newline + 1)
+
+
+def _lex_chunk(text: str, keywords: Optional[KeywordTable]) -> Tuple[TokenBuffer, bool]:
+    """Worker: tokenize one chunk as if it were a whole source.
+
+    Returns the tokens (with the source dropped, so only the arrays travel
+    back) and whether the chunk lexed without error. Lexing stops at the
+    first error, which at a seam is usually a string literal that continues
+    into the next chunk.
+    """
+    buffer = TokenBuffer("")
+    append = buffer.append
+    complete = True
+    try:
+        for token_type, start, end, literal in RegexLexer(text, keywords).scan():
+            append(token_type, start, end, literal)
+    except LexerError:
+        complete = False
+    return buffer, complete
+
+
+def tokenize_buffer_parallel(source: str, workers: Optional[int] = None,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             keywords: Optional[KeywordTable] = None,
+                             executor: Optional[Executor] = None) -> TokenBuffer:
+    """Tokenize ``source`` in newline-aligned chunks across a process pool.
+
+    Chunks are lexed independently and stitched together with their offsets
+    rebased. Where a chunk stopped on an error, e.g. because a multi-line
+    string literal crosses into the next chunk, lexing continues serially
+    on the full source from the last good token until a token lines up with
+    one a later chunk produced; the regex lexer carries no state between
+    tokens, so everything after that point is already correct. Genuine
+    errors surface from that serial pass with their real position. The
+    result is identical to :func:`~kemlang.tokenbuffer.tokenize_buffer`.
+
+    ``executor`` lets callers reuse a pool across calls; otherwise one with
+    ``workers`` processes is started for this call.
+    """
+    starts = split_chunks(source, chunk_size)
+    if len(starts) == 1 or workers == 1:
+        return tokenize_buffer(source, keywords)
+
+    texts = [source[start:end] for start, end in zip(starts, starts[1:] + [len(source)], strict=True)]
+    if executor is not None:
+        chunks = list(executor.map(_lex_chunk, texts, [keywords] * len(texts)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_lex_chunk, texts, [keywords] * len(texts)))
+
+    buffer = TokenBuffer(source)
+    last = len(chunks) - 1
+    index = 0
+    first = 0  # first trustworthy token of the current chunk
+    while True:
+        chunk, complete = chunks[index]
+        base = starts[index]
+        count = len(chunk)
+        if index != last and complete:
+            count -= 1  # a chunk's EOF is not the end of the source
+        buffer.merge_range(chunk, first, count, base)
+        if complete:
+            if index == last:
+                return buffer
+            index += 1
+            first = 0
+            continue
+
+        # Re-lex across the seam until the stream lines up with a later chunk
+        failed = index
+        resume = buffer.ends[-1] if len(buffer) else base
+        for token_type, start, end, literal in RegexLexer(source, keywords).scan(resume):
+            while index < last and start >= starts[index + 1]:
+                index += 1
+            if index > failed:
+                chunk_starts = chunks[index][0].starts
+                first = bisect_left(chunk_starts, start - starts[index])
+                if first < len(chunk_starts) and chunk_starts[first] == start - starts[index]:
+                    break
+            buffer.append(token_type, start, end, literal)
+        else:
+            return buffer
+
+
+def tokenize_parallel(source: str, workers: Optional[int] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      keywords: Optional[KeywordTable] = None,
+                      executor: Optional[Executor] = None) -> List[Token]:
+    """Parallel counterpart of :func:`~kemlang.lexer.tokenize`; see
+    :func:`tokenize_buffer_parallel`."""
+    return tokenize_buffer_parallel(source, workers, chunk_size, keywords, executor).to_tokens()
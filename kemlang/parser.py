@@ -1,37 +1,75 @@
-from typing import List, Optional, Callable, Dict
+from typing import Iterable, Iterator, List, NoReturn, Optional, Callable, Dict, cast
 
 from .types import (
     Token, TokenType, Program, Block, Stmt, Expr,
     Print, Declaration, Assignment, If, While, Break, Continue,
-    Binary, Unary, Literal, Variable, Input
+    Binary, Unary, Literal, Variable, Input,
+    BinaryOp, UnaryOp, BINARY_OPERATORS
 )
 from .errors import ParseError
-from .lexer import tokenize
+from .lexer import iter_tokens
+from .source import SourceData
+
+
+# Binding power of each binary operator; higher binds tighter. Shared with
+# the formatter so precedence is defined in one place.
+BINARY_PRECEDENCE: Dict[TokenType, int] = {
+    TokenType.EQUAL: 1, TokenType.NOT_EQUAL: 1,
+    TokenType.GREATER: 2, TokenType.GREATER_EQUAL: 2,
+    TokenType.LESS: 2, TokenType.LESS_EQUAL: 2,
+    TokenType.PLUS: 3, TokenType.MINUS: 3,
+    TokenType.MULTIPLY: 4, TokenType.DIVIDE: 4, TokenType.MODULO: 4,
+}
+
+# The same binding powers keyed by the operator codes stored in the AST
+OPERATOR_PRECEDENCE: Dict[BinaryOp, int] = {
+    BINARY_OPERATORS[token_type]: precedence
+    for token_type, precedence in BINARY_PRECEDENCE.items()
+}
+
+_STATEMENT_STARTS = frozenset({
+    TokenType.BHAI_BOL, TokenType.AA, TokenType.JO,
+    TokenType.FARVU, TokenType.TAME_JAO, TokenType.AAGAL_VADO,
+})
+_BLOCK_ENDS = frozenset({TokenType.RIGHT_BRACE, TokenType.AAVJO_BHAI})
+_COLLECTING_STOPS = _STATEMENT_STARTS | _BLOCK_ENDS
+
+_LITERAL_TOKENS = frozenset({
+    TokenType.BHAI_CHHE, TokenType.BHAI_NATHI, TokenType.INTEGER, TokenType.STRING,
+})
 
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = [t for t in tokens if t.type != TokenType.NEWLINE]  # Filter out newlines
-        self.current = 0
+    def __init__(self, tokens: Iterable[Token], collect_errors: bool = False):
+        # Tokens are pulled on demand with one token of lookahead, so a lazy
+        # stream such as Lexer.iter_tokens() is never materialized in full.
+        self.tokens = (t for t in tokens if t.type != TokenType.NEWLINE)  # Filter out newlines
+        self.current_token = next(self.tokens)
+        self.previous_token = self.current_token
+        # With collect_errors, every syntax error is recorded here instead of
+        # being dropped by error recovery or ending the parse
+        self.errors: Optional[List[ParseError]] = [] if collect_errors else None
 
     def parse(self) -> Program:
         """Parse a complete program."""
+        return Program(list(self.iter_statements()))
+
+    def iter_statements(self) -> Iterator[Stmt]:
+        """Parse a complete program, yielding top-level statements as they
+        are parsed."""
         # Skip to program start
         if not self.check(TokenType.KEM_BHAI):
-            self.error("Program must start with 'kem bhai'")
-
-        self.advance()  # consume 'kem bhai'
+            self.report("Program must start with 'kem bhai'")
+        else:
+            self.advance()  # consume 'kem bhai'
 
-        statements = []
         while not self.check(TokenType.AAVJO_BHAI) and not self.is_at_end():
             stmt = self.statement()
             if stmt:
-                statements.append(stmt)
+                yield stmt
 
         if not self.match(TokenType.AAVJO_BHAI):
-            self.error("Program must end with 'aavjo bhai'")
-
-        return Program(statements)
+            self.report("Program must end with 'aavjo bhai'")
 
     def statement(self) -> Optional[Stmt]:
         """Parse a statement."""
@@ -55,8 +93,8 @@ class Parser:
             self.advance()
             return None
 
-        except ParseError:
-            self.synchronize()
+        except ParseError as error:
+            self.recover(error)
             return None
 
     def print_statement(self) -> Print:
@@ -69,23 +107,23 @@ class Parser:
         if not self.check(TokenType.IDENTIFIER):
             self.error("Expected variable name after 'aa'")
 
-        name = self.advance().lexeme
+        name = self.advance()
 
         if not self.match(TokenType.CHE):
             self.error("Expected 'che' after variable name")
 
         expr = self.expression()
-        return Declaration(name, expr)
+        return Declaration(name.lexeme, expr, name.offset)
 
     def assignment(self) -> Assignment:
         """Parse: <id> che <expr>"""
-        name = self.advance().lexeme
+        name = self.advance()
 
         if not self.match(TokenType.CHE):
             self.error("Expected 'che' after variable name")
 
         expr = self.expression()
-        return Assignment(name, expr)
+        return Assignment(name.lexeme, expr, name.offset)
 
     def if_statement(self) -> If:
         """Parse: jo <expr> { ... } [nahi to { ... }]"""
@@ -131,92 +169,60 @@ class Parser:
 
         return Block(statements)
 
-    # Expression parsing using Pratt parser precedence
-    def expression(self) -> Expr:
-        """Parse expression (lowest precedence)."""
-        return self.equality()
-
-    def equality(self) -> Expr:
-        """Parse equality: ==, !="""
-        expr = self.comparison()
-
-        while self.match(TokenType.EQUAL, TokenType.NOT_EQUAL):
-            operator = self.previous()
-            right = self.comparison()
-            expr = Binary(expr, operator, right)
-
-        return expr
-
-    def comparison(self) -> Expr:
-        """Parse comparison: >, >=, <, <="""
-        expr = self.term()
-
-        while self.match(TokenType.GREATER, TokenType.GREATER_EQUAL,
-                         TokenType.LESS, TokenType.LESS_EQUAL):
-            operator = self.previous()
-            right = self.term()
-            expr = Binary(expr, operator, right)
-
-        return expr
-
-    def term(self) -> Expr:
-        """Parse addition/subtraction: +, -"""
-        expr = self.factor()
-
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            operator = self.previous()
-            right = self.factor()
-            expr = Binary(expr, operator, right)
-
-        return expr
-
-    def factor(self) -> Expr:
-        """Parse multiplication/division/modulo: *, /, %"""
+    # Expression parsing: one precedence-climbing loop over BINARY_PRECEDENCE
+    def expression(self, min_precedence: int = 1) -> Expr:
+        """Parse a binary expression whose operators bind at least as
+        tightly as ``min_precedence``; all binary operators are left
+        associative."""
         expr = self.unary()
 
-        while self.match(TokenType.MULTIPLY, TokenType.DIVIDE, TokenType.MODULO):
-            operator = self.previous()
-            right = self.unary()
-            expr = Binary(expr, operator, right)
-
-        return expr
+        while True:
+            operator = self.current_token
+            precedence = BINARY_PRECEDENCE.get(operator.type, 0)
+            if precedence < min_precedence:
+                return expr
+            self.advance()
+            right = self.expression(precedence + 1)
+            expr = Binary(expr, BINARY_OPERATORS[operator.type], right, operator.offset)
 
     def unary(self) -> Expr:
         """Parse unary operators: -"""
-        if self.match(TokenType.MINUS):
-            operator = self.previous()
+        if self.current_token.type == TokenType.MINUS:
+            operator = self.advance()
             right = self.unary()
-            return Unary(operator, right)
+            return Unary(UnaryOp.NEGATE, right, operator.offset)
 
         return self.primary()
 
     def primary(self) -> Expr:
         """Parse primary expressions."""
-        if self.match(TokenType.BHAI_CHHE):
-            return Literal(True)
+        token = self.current_token
+        token_type = token.type
 
-        if self.match(TokenType.BHAI_NATHI):
-            return Literal(False)
-
-        if self.match(TokenType.INTEGER):
-            return Literal(self.previous().literal)
-
-        if self.match(TokenType.STRING):
-            return Literal(self.previous().literal)
+        if token_type in _LITERAL_TOKENS:
+            self.advance()
+            if token_type == TokenType.BHAI_CHHE:
+                return Literal(True)
+            if token_type == TokenType.BHAI_NATHI:
+                return Literal(False)
+            return Literal(token.literal)
 
-        if self.match(TokenType.IDENTIFIER):
-            return Variable(self.previous().lexeme)
+        if token_type == TokenType.IDENTIFIER:
+            self.advance()
+            return Variable(token.lexeme, token.offset)
 
-        if self.match(TokenType.BAPU_TAME_BOLO):
+        if token_type == TokenType.BAPU_TAME_BOLO:
+            self.advance()
             return Input()
 
-        if self.match(TokenType.LEFT_PAREN):
+        if token_type == TokenType.LEFT_PAREN:
+            self.advance()
             expr = self.expression()
             if not self.match(TokenType.RIGHT_PAREN):
                 self.error("Expected ')' after expression")
             return expr
 
-        self.error(f"Unexpected token '{self.peek().lexeme}'")
+        self.error(f"Unexpected token '{token.lexeme}'")
 
     # Utility methods
     def match(self, *types: TokenType) -> bool:
@@ -236,7 +242,8 @@ class Parser:
     def advance(self) -> Token:
         """Consume current token and return it."""
         if not self.is_at_end():
-            self.current += 1
+            self.previous_token = self.current_token
+            self.current_token = next(self.tokens)
         return self.previous()
 
     def is_at_end(self) -> bool:
@@ -245,31 +252,248 @@ class Parser:
 
     def peek(self) -> Token:
         """Return current token without advancing."""
-        return self.tokens[self.current]
+        return self.current_token
 
     def previous(self) -> Token:
         """Return previous token."""
-        return self.tokens[self.current - 1]
+        return self.previous_token
 
-    def error(self, message: str):
+    def error(self, message: str) -> NoReturn:
         """Raise a parse error."""
         current = self.peek()
         raise ParseError(message, current.line, current.col)
 
-    def synchronize(self):
+    def report(self, message: str) -> None:
+        """Raise a parse error, or just record it when collecting errors."""
+        if self.errors is None:
+            self.error(message)
+        current = self.peek()
+        self.record(ParseError(message, current.line, current.col))
+
+    def record(self, error: ParseError) -> None:
+        # An ERROR token was already reported by the lexer
+        if self.errors is not None and self.peek().type != TokenType.ERROR:
+            self.errors.append(error)
+
+    def recover(self, error: ParseError) -> None:
+        """Handle a statement's parse error: record it, then synchronize."""
+        self.record(error)
+        self.synchronize()
+
+    def synchronize(self) -> None:
         """Recover from a parse error by advancing to next statement."""
+        # When collecting errors, also stop where a block or the program
+        # ends, so that one error does not cause more
+        if self.errors is not None:
+            stops = _COLLECTING_STOPS
+            if self.peek().type in _BLOCK_ENDS:
+                return
+        else:
+            stops = _STATEMENT_STARTS
         self.advance()
 
         while not self.is_at_end():
             # Look for statement starters
-            if self.peek().type in [TokenType.BHAI_BOL, TokenType.AA, TokenType.JO,
-                                   TokenType.FARVU, TokenType.TAME_JAO, TokenType.AAGAL_VADO]:
+            if self.peek().type in stops:
                 return
             self.advance()
 
 
-def parse_program(source: str) -> Program:
-    """Convenience function to parse source code into an AST."""
-    tokens = tokenize(source)
-    parser = Parser(tokens)
-    return parser.parse()
\ No newline at end of file
+# StackParser frame states
+_IF_START, _IF_THEN, _IF_ELSE, _WHILE_START, _WHILE_BODY = range(5)
+
+# Entries on StackParser's operator stack are (precedence, operator, offset)
+_PAREN = (0, None, -1)
+_UNARY_PRECEDENCE = 100
+
+
+class _Frame:
+    """A compound statement being parsed by StackParser."""
+    __slots__ = ("state", "condition", "branch", "block")
+
+    def __init__(self, state: int) -> None:
+        self.state = state
+        self.condition: Optional[Expr] = None
+        self.branch: Optional[Block] = None
+        self.block: List[Stmt] = []  # statements of the open block
+
+
+class StackParser(Parser):
+    """Parser that keeps nesting on explicit stacks instead of the Python
+    call stack.
+
+    Blocks, parentheses and unary minus can nest arbitrarily deep, in time
+    linear in the input. The AST, errors and error recovery are the same
+    as :class:`Parser`'s.
+    """
+
+    def statement(self) -> Optional[Stmt]:
+        """Parse a statement, including any nested blocks."""
+        frames: List[_Frame] = []
+        stmt = self.begin_statement(frames)
+        while frames:
+            frame = frames[-1]
+            try:
+                stmt = self.advance_frame(frame, frames)
+            except ParseError as error:
+                # The innermost compound statement gives up, as statement() would
+                frames.pop()
+                self.recover(error)
+                stmt = None
+                continue
+            if stmt is None:
+                continue
+            frames.pop()
+            if not frames:
+                break
+            frames[-1].block.append(stmt)
+        return stmt
+
+    def begin_statement(self, frames: List[_Frame]) -> Optional[Stmt]:
+        """Parse a simple statement, or push a frame for a compound one."""
+        try:
+            if self.match(TokenType.BHAI_BOL):
+                return self.print_statement()
+            if self.match(TokenType.AA):
+                return self.declaration()
+            if self.match(TokenType.JO):
+                frames.append(_Frame(_IF_START))
+                return None
+            if self.match(TokenType.FARVU):
+                frames.append(_Frame(_WHILE_START))
+                return None
+            if self.match(TokenType.TAME_JAO):
+                return Break()
+            if self.match(TokenType.AAGAL_VADO):
+                return Continue()
+            if self.check(TokenType.IDENTIFIER):
+                return self.assignment()
+
+            # Skip unknown tokens for error recovery
+            self.advance()
+            return None
+
+        except ParseError as error:
+            self.recover(error)
+            return None
+
+    def advance_frame(self, frame: _Frame, frames: List[_Frame]) -> Optional[Stmt]:
+        """Take one step on ``frame``; returns its statement once complete."""
+        state = frame.state
+        if state == _IF_START:
+            frame.condition = self.expression()
+            if not self.match(TokenType.LEFT_BRACE):
+                self.error("Expected '{' after if condition")
+            frame.state = _IF_THEN
+            return None
+        if state == _WHILE_START:
+            if not self.match(TokenType.LEFT_BRACE):
+                self.error("Expected '{' after 'farvu'")
+            frame.state = _WHILE_BODY
+            return None
+
+        # A block is open: parse its next statement or close it
+        if not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
+            stmt = self.begin_statement(frames)
+            if stmt is not None:
+                frame.block.append(stmt)
+            return None
+        if not self.match(TokenType.RIGHT_BRACE):
+            self.error("Expected '}' after block")
+        block = Block(frame.block)
+        frame.block = []
+
+        # The condition and then-branch were stored by this frame's earlier steps
+        if state == _IF_THEN:
+            if self.match(TokenType.ELSE):
+                if not self.match(TokenType.LEFT_BRACE):
+                    self.error("Expected '{' after 'nahi to'")
+                frame.branch = block
+                frame.state = _IF_ELSE
+                return None
+            return If(cast(Expr, frame.condition), block, None)
+        if state == _IF_ELSE:
+            return If(cast(Expr, frame.condition), cast(Block, frame.branch), block)
+
+        if not self.match(TokenType.JYA_SUDHI):
+            self.error("Expected 'jya sudhi' after while body")
+        return While(block, self.expression())
+
+    def expression(self, min_precedence: int = 1) -> Expr:
+        """Parse an expression with operand and operator stacks."""
+        operands: List[Expr] = []
+        operators: List[tuple] = []
+        open_parens = 0
+
+        while True:
+            # Prefix position: unary minus, '(' or a primary expression
+            token = self.current_token
+            if token.type == TokenType.MINUS:
+                operators.append((_UNARY_PRECEDENCE, UnaryOp.NEGATE, token.offset))
+                self.advance()
+                continue
+            if token.type == TokenType.LEFT_PAREN:
+                operators.append(_PAREN)
+                open_parens += 1
+                self.advance()
+                continue
+            operand = self.primary()
+
+            while True:
+                # Unary minus binds tighter than any binary operator
+                while operators and operators[-1][0] == _UNARY_PRECEDENCE:
+                    operand = Unary(UnaryOp.NEGATE, operand, operators.pop()[2])
+
+                operator = self.current_token
+                precedence = BINARY_PRECEDENCE.get(operator.type, 0)
+                if precedence >= (min_precedence if not open_parens else 1):
+                    # Left associative: reduce operators that bind at least as tightly
+                    while operators and operators[-1][0] >= precedence:
+                        _, op, offset = operators.pop()
+                        operand = Binary(operands.pop(), op, operand, offset)
+                    operands.append(operand)
+                    operators.append((precedence, BINARY_OPERATORS[operator.type], operator.offset))
+                    self.advance()
+                    break
+
+                # End of the innermost (sub)expression
+                while operators and operators[-1] is not _PAREN:
+                    _, op, offset = operators.pop()
+                    operand = Binary(operands.pop(), op, operand, offset)
+                if not open_parens:
+                    return operand
+                if not self.match(TokenType.RIGHT_PAREN):
+                    self.error("Expected ')' after expression")
+                operators.pop()
+                open_parens -= 1
+
+
+PARSER_MODES = {
+    "recursive": Parser,
+    "stack": StackParser,
+}
+
+
+def parse_program(source: SourceData, engine: str = "classic", mode: str = "recursive") -> Program:
+    """Convenience function to parse source code into an AST.
+
+    Tokens are streamed from the lexer selected by ``engine`` straight into
+    the parser, so the full token list is never held in memory. ``source``
+    may also be UTF-8 bytes or a memory-mapped file, which are lexed in place.
+    ``mode`` selects the parser; use ``"stack"`` for deeply nested programs.
+
+    As when the whole file was tokenized up front, a lexical error anywhere
+    in the source is reported in preference to a syntax error.
+    """
+    try:
+        parser_class = PARSER_MODES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown parser mode '{mode}'") from None
+    parser = parser_class(iter_tokens(source, engine))
+    try:
+        return parser.parse()
+    except ParseError:
+        # Lex the rest of the source; a LexerError raised here wins
+        for _ in parser.tokens:
+            pass
+        raise
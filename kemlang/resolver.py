@@ -0,0 +1,239 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, cast
+
+from .types import (
+    Program, Block, Stmt, Expr, KemValue,
+    Print, Declaration, Assignment, If, While,
+    Binary, Unary, Literal, Variable
+)
+from .errors import RuntimeError, ScopeError, BreakError, ContinueError
+from .interpreter import Interpreter, declares
+from .source import LineIndex
+
+
+# (depth, slot): the frame's nesting depth, 0 for globals, and the index in it
+Binding = Tuple[int, int]
+
+
+# Resolved nodes, produced by Resolver in place of blocks and named nodes
+@dataclass(frozen=True, slots=True)
+class Scope(Block):
+    """A block that runs in a new frame of ``size`` slots, or in the
+    enclosing frame if ``size`` is 0."""
+    size: int
+
+
+@dataclass(frozen=True, slots=True)
+class LocalDeclaration(Stmt):
+    """Declaration into ``slot`` of the innermost frame."""
+    name: str
+    slot: int
+    initializer: Expr
+    offset: int = field(default=-1, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class LocalAssignment(Stmt):
+    name: str
+    depth: int
+    slot: int
+    value: Expr
+    offset: int = field(default=-1, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class LocalVariable(Expr):
+    name: str
+    depth: int
+    slot: int
+    offset: int = field(default=-1, compare=False)
+
+
+@dataclass
+class Resolution:
+    program: Program
+    size: int                   # slots in the global frame
+    errors: List[ScopeError]
+
+
+class Resolver:
+    """Binds every declaration and use of a variable to a frame slot.
+
+    Mirrors the interpreter's scoping: every block opens a scope, a
+    declaration's initializer is resolved before the name is defined, and
+    a loop condition sees only the scope around the loop. A use binds to
+    the innermost scope declaring the name textually before it, which is
+    where :meth:`Environment.get` finds it at run time.
+
+    Blocks without declarations of their own get no scope, so they add
+    no depth. Undefined and redeclared variables are collected as errors;
+    their nodes are left unresolved.
+    """
+
+    def __init__(self, lines: Optional[LineIndex] = None):
+        self.lines = lines
+        # Slot of each name declared so far, per open scope, innermost last
+        self.scopes: List[Dict[str, int]] = [{}]
+        self.errors: List[ScopeError] = []
+
+    def resolve(self, program: Program) -> Resolution:
+        statements = [self.statement(stmt) for stmt in program.statements]
+        return Resolution(Program(statements), len(self.scopes[0]), self.errors)
+
+    def error(self, message: str, offset: int) -> None:
+        if self.lines is not None and offset >= 0:
+            line, col = self.lines.position(offset)
+        else:
+            line, col = 0, 0
+        self.errors.append(ScopeError(message, line, col))
+
+    def lookup(self, name: str) -> Optional[Binding]:
+        for depth in range(len(self.scopes) - 1, -1, -1):
+            slot = self.scopes[depth].get(name)
+            if slot is not None:
+                return depth, slot
+        return None
+
+    def statement(self, stmt: Stmt) -> Stmt:
+        if isinstance(stmt, Print):
+            return Print(self.expression(stmt.expression))
+        if isinstance(stmt, Declaration):
+            initializer = self.expression(stmt.initializer)
+            scope = self.scopes[-1]
+            if stmt.name in scope:
+                self.error(f"Variable '{stmt.name}' already declared in this scope", stmt.offset)
+                return Declaration(stmt.name, initializer, stmt.offset)
+            scope[stmt.name] = slot = len(scope)
+            return LocalDeclaration(stmt.name, slot, initializer, stmt.offset)
+        if isinstance(stmt, Assignment):
+            value = self.expression(stmt.value)
+            binding = self.lookup(stmt.name)
+            if binding is None:
+                self.error(f"Undefined variable '{stmt.name}'", stmt.offset)
+                return Assignment(stmt.name, value, stmt.offset)
+            return LocalAssignment(stmt.name, *binding, value, stmt.offset)
+        if isinstance(stmt, If):
+            else_branch = stmt.else_branch
+            return If(self.expression(stmt.condition), self.block(stmt.then_branch),
+                      self.block(else_branch) if else_branch else else_branch)
+        if isinstance(stmt, While):
+            body = self.block(stmt.body)
+            return While(body, self.expression(stmt.condition))
+        if isinstance(stmt, Block):
+            return self.block(stmt)
+        return stmt
+
+    def block(self, block: Block) -> Scope:
+        if not declares(block):
+            return Scope([self.statement(stmt) for stmt in block.statements], 0)
+        self.scopes.append({})
+        statements = [self.statement(stmt) for stmt in block.statements]
+        return Scope(statements, len(self.scopes.pop()))
+
+    def expression(self, expr: Expr) -> Expr:
+        if isinstance(expr, Variable):
+            binding = self.lookup(expr.name)
+            if binding is None:
+                self.error(f"Undefined variable '{expr.name}'", expr.offset)
+                return expr
+            return LocalVariable(expr.name, *binding, expr.offset)
+        if isinstance(expr, Binary):
+            return Binary(self.expression(expr.left), expr.operator, self.expression(expr.right), expr.offset)
+        if isinstance(expr, Unary):
+            return Unary(expr.operator, self.expression(expr.right), expr.offset)
+        return expr
+
+
+def resolve(program: Program, source: Optional[str] = None) -> Resolution:
+    """Resolve ``program``; ``source`` gives errors their line and column."""
+    return Resolver(LineIndex(source) if source is not None else None).resolve(program)
+
+
+class SlotInterpreter(Interpreter):
+    """Tree-walker over resolved programs, with one list per scope.
+
+    ``frames[depth]`` is the innermost running frame at each nesting
+    depth, so every variable access is two indexed loads however deeply
+    blocks nest. A loop allocates one frame for its body and reuses it on
+    every iteration. Scope errors are reported before anything runs.
+    """
+
+    def __init__(self, input_fn: Callable[[], str] = input, output_fn: Callable[[str], None] = print):
+        super().__init__(input_fn, output_fn)
+        self.frames: List[List[KemValue]] = []
+
+    def interpret(self, program: Program) -> int:
+        """Resolve and run a program. Returns 0 on success, 1 on error."""
+        return self.run_statements([program])
+
+    def execute(self, stmt: Stmt) -> None:
+        if isinstance(stmt, LocalAssignment):
+            self.frames[stmt.depth][stmt.slot] = self.evaluate(stmt.value)
+        elif isinstance(stmt, Print):
+            self.execute_print(stmt)
+        elif isinstance(stmt, If):
+            self.execute_if(stmt)
+        elif isinstance(stmt, LocalDeclaration):
+            self.frames[-1][stmt.slot] = self.evaluate(stmt.initializer)
+        elif isinstance(stmt, Scope):
+            self.execute_scope(stmt)
+        elif isinstance(stmt, Program):
+            self.execute_program(stmt)
+        else:
+            super().execute(stmt)
+
+    def execute_program(self, program: Program) -> None:
+        resolution = Resolver().resolve(program)
+        if resolution.errors:
+            error = resolution.errors[0]
+            raise RuntimeError(error.message, error.line, error.col)
+        self.frames = [[None] * resolution.size]
+        for statement in resolution.program.statements:
+            self.execute(statement)
+
+    def execute_while(self, stmt: While) -> None:
+        # Resolved loops always have a Scope body
+        body = cast(Scope, stmt.body)
+        size = body.size
+        frames = self.frames
+        if size:
+            # No reset between iterations: a slot is only ever read after
+            # its declaration has run in the same iteration
+            frames.append([None] * size)
+        try:
+            while True:
+                try:
+                    for statement in body.statements:
+                        self.execute(statement)
+                except ContinueError:
+                    pass
+                # The condition's bindings never refer to the body's frame
+                if not self.is_truthy(self.evaluate(stmt.condition)):
+                    break
+        except BreakError:
+            pass
+        finally:
+            if size:
+                frames.pop()
+
+    def execute_scope(self, scope: Scope) -> None:
+        if not scope.size:
+            for statement in scope.statements:
+                self.execute(statement)
+            return
+        frames = self.frames
+        frames.append([None] * scope.size)
+        try:
+            for statement in scope.statements:
+                self.execute(statement)
+        finally:
+            frames.pop()
+
+    def evaluate(self, expr: Expr) -> KemValue:
+        if isinstance(expr, LocalVariable):
+            return self.frames[expr.depth][expr.slot]
+        if isinstance(expr, Binary):
+            return self.binary_operation(expr.operator, self.evaluate(expr.left), self.evaluate(expr.right))
+        if isinstance(expr, Literal):
+            return expr.value
+        return super().evaluate(expr)
@@ -0,0 +1,377 @@
+import json
+import struct
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Type, Union
+
+from .types import (
+    Token, ASTNode, Program, Block, Stmt,
+    Print, Declaration, Assignment, If, While, Break, Continue,
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
+)
+
+
+OUTPUT_FORMATS = ("jsonl", "json", "binary")
+
+# Binary streams are a magic number followed by records. A record is a
+# little-endian uint32 byte count, then that many bytes of tagged values:
+#
+#   N        None
+#   T / F    True / False
+#   i        int32
+#   I        uint32 n, then an n-byte two's complement integer
+#   s        uint32 n, then n bytes of UTF-8
+#   l        uint32 n, then n of the values above (lists do not nest)
+#
+# All integers are little-endian. A token record is (type, lexeme, line,
+# col, offset, literal); an AST record is the node's class code followed
+# by its field values.
+_TOKENS_MAGIC = b"KEMT\x02"
+_AST_MAGIC = b"KEMA\x02"
+_BATCH_SIZE = 4096
+
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_I32_MIN, _I32_MAX = -2 ** 31, 2 ** 31 - 1
+
+_NODE_CLASSES = (
+    Program, Block, Print, Declaration, Assignment, If, While, Break, Continue,
+    Binary, Unary, Literal, Variable, Input,
+)
+_NODE_CODES: Dict[Type[ASTNode], int] = {cls: code for code, cls in enumerate(_NODE_CLASSES)}
+_NODE_NAMES: Dict[str, Type[ASTNode]] = {cls.__name__: cls for cls in _NODE_CLASSES}
+_NODE_FIELDS: Dict[Type[ASTNode], Tuple[str, ...]] = {
+    cls: tuple(f.name for f in fields(cls)) for cls in _NODE_CLASSES
+}
+_OPERATORS: Dict[Type[ASTNode], Dict[str, Union[BinaryOp, UnaryOp]]] = {
+    Binary: {op.symbol: op for op in BinaryOp},
+    Unary: {op.symbol: op for op in UnaryOp},
+}
+
+# A node record: node class plus field values, with children as record ids
+NodeRecord = Tuple[Type[ASTNode], Tuple[Any, ...]]
+
+
+def token_record(token: Token) -> Dict[str, Any]:
+    return {
+        "type": token.type.name,
+        "lexeme": token.lexeme,
+        "line": token.line,
+        "col": token.col,
+        "offset": token.offset,
+        "literal": token.literal,
+    }
+
+
+class _NodeEncoder:
+    """Numbers nodes in post-order, so children are written before parents.
+
+    Walks with an explicit stack, so programs nested too deeply for the
+    recursive AST walkers can still be written.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.records: List[NodeRecord] = []
+
+    def add(self, root: ASTNode) -> int:
+        ids: List[int] = []
+        # Entries are a node to expand, or (node, field values, child count)
+        # once its children have been pushed
+        stack: List[Any] = [root]
+        while stack:
+            entry = stack.pop()
+            if isinstance(entry, tuple):
+                node, values, count = entry
+                child_ids = iter(ids[len(ids) - count:])
+                del ids[len(ids) - count:]
+                for i, value in enumerate(values):
+                    if isinstance(value, ASTNode):
+                        values[i] = next(child_ids)
+                    elif isinstance(value, list):
+                        values[i] = [next(child_ids) for _ in value]
+                self.records.append((type(node), tuple(values)))
+                ids.append(self.count)
+                self.count += 1
+                continue
+
+            values = [getattr(entry, name) for name in _NODE_FIELDS[type(entry)]]
+            children: List[ASTNode] = []
+            for value in values:
+                if isinstance(value, ASTNode):
+                    children.append(value)
+                elif isinstance(value, list):
+                    children.extend(value)
+            stack.append((entry, values, len(children)))
+            stack.extend(reversed(children))
+        return ids[0]
+
+    def take(self) -> List[NodeRecord]:
+        records, self.records = self.records, []
+        return records
+
+
+def iter_node_records(statements: Iterable[Stmt]) -> Iterator[NodeRecord]:
+    """Records for each top-level statement as it arrives, then the Program.
+
+    Record ``i`` describes node id ``i``; a field holding a child node (or
+    a list of them) holds its id instead.
+    """
+    encoder = _NodeEncoder()
+    top_level = []
+    for statement in statements:
+        top_level.append(encoder.add(statement))
+        yield from encoder.take()
+    yield Program, (top_level,)
+
+
+def node_json(node_id: int, record: NodeRecord) -> Dict[str, Any]:
+    cls, values = record
+    data: Dict[str, Any] = {"id": node_id, "node": cls.__name__}
+    for name, value in zip(_NODE_FIELDS[cls], values, strict=True):
+        data[name] = value.symbol if isinstance(value, (BinaryOp, UnaryOp)) else value
+    return data
+
+
+def _encode_value(value: Any, out: bytearray) -> None:
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int):
+        if _I32_MIN <= value <= _I32_MAX:
+            out += b"i"
+            out += _I32.pack(value)
+        else:
+            data = value.to_bytes(value.bit_length() // 8 + 1, "little", signed=True)
+            out += b"I"
+            out += _U32.pack(len(data))
+            out += data
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out += b"s"
+        out += _U32.pack(len(data))
+        out += data
+    else:
+        raise TypeError(f"Cannot write a {type(value).__name__} to a binary stream")
+
+
+def _encode_record(values: Tuple[Any, ...]) -> bytes:
+    """One length-prefixed binary record holding ``values``."""
+    out = bytearray()
+    for value in values:
+        if isinstance(value, list):
+            out += b"l"
+            out += _U32.pack(len(value))
+            for item in value:
+                _encode_value(item, out)
+        else:
+            _encode_value(value, out)
+    return _U32.pack(len(out)) + out
+
+
+def _decode_value(data: bytes, pos: int) -> Tuple[Any, int]:
+    tag = data[pos:pos + 1]
+    pos += 1
+    if tag == b"i":
+        return _I32.unpack_from(data, pos)[0], pos + _I32.size
+    if tag == b"s" or tag == b"I":
+        (size,) = _U32.unpack_from(data, pos)
+        pos += _U32.size
+        raw = data[pos:pos + size]
+        if len(raw) != size:
+            raise ValueError("Truncated binary value")
+        value = raw.decode("utf-8") if tag == b"s" else int.from_bytes(raw, "little", signed=True)
+        return value, pos + size
+    if tag == b"N":
+        return None, pos
+    if tag == b"T" or tag == b"F":
+        return tag == b"T", pos
+    raise ValueError(f"Unknown binary value tag {tag!r}")
+
+
+def _decode_record(data: bytes) -> List[Any]:
+    """The values of one binary record, without its length prefix."""
+    values: List[Any] = []
+    pos = 0
+    try:
+        while pos < len(data):
+            if data[pos:pos + 1] == b"l":
+                (count,) = _U32.unpack_from(data, pos + 1)
+                pos += 1 + _U32.size
+                items = []
+                for _ in range(count):
+                    item, pos = _decode_value(data, pos)
+                    items.append(item)
+                values.append(items)
+            else:
+                value, pos = _decode_value(data, pos)
+                values.append(value)
+    except struct.error:
+        raise ValueError("Truncated binary value") from None
+    return values
+
+
+class _Writer:
+    def __init__(self, stream: BinaryIO, fmt: str, magic: bytes):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'")
+        self.stream = stream
+        self.fmt = fmt
+        self.batch: List[bytes] = []
+        self.first = True
+        if fmt == "binary":
+            stream.write(magic)
+        elif fmt == "json":
+            stream.write(b"[")
+
+    def write(self, text_record: Any, binary_record: Tuple[Any, ...]) -> None:
+        if self.fmt == "binary":
+            self.batch.append(_encode_record(binary_record))
+            if len(self.batch) >= _BATCH_SIZE:
+                self.flush()
+            return
+        line = json.dumps(text_record, ensure_ascii=False).encode("utf-8")
+        if self.fmt == "json":
+            line = (b"\n" if self.first else b",\n") + line
+        else:
+            line += b"\n"
+        self.stream.write(line)
+        self.first = False
+
+    def flush(self) -> None:
+        if self.batch:
+            self.stream.write(b"".join(self.batch))
+            self.batch = []
+
+    def close(self) -> None:
+        if self.fmt == "binary":
+            self.flush()
+        elif self.fmt == "json":
+            self.stream.write(b"\n]\n" if not self.first else b"]\n")
+        self.stream.flush()
+
+
+def write_tokens(tokens: Iterable[Token], stream: BinaryIO, fmt: str = "jsonl") -> int:
+    """Stream tokens to ``stream`` in ``fmt``; returns the number written.
+
+    Tokens are written as they are pulled from ``tokens``, so a lazy token
+    iterator is never collected into a list.
+    """
+    writer = _Writer(stream, fmt, _TOKENS_MAGIC)
+    count = 0
+    for token in tokens:
+        writer.write(
+            token_record(token),
+            (token.type.value, token.lexeme, token.line, token.col, token.offset, token.literal))
+        count += 1
+    writer.close()
+    return count
+
+
+def write_program(statements: Iterable[Stmt], stream: BinaryIO, fmt: str = "jsonl") -> int:
+    """Stream the AST of ``statements`` to ``stream`` as flat node records.
+
+    ``statements`` may be a lazy top-level statement iterator, such as
+    :meth:`Parser.iter_statements`; each statement is written as soon as it
+    is parsed. Returns the number of node records written.
+    """
+    writer = _Writer(stream, fmt, _AST_MAGIC)
+    count = 0
+    for cls, values in iter_node_records(statements):
+        writer.write(
+            node_json(count, (cls, values)),
+            (_NODE_CODES[cls],) + tuple(int(v) if isinstance(v, (BinaryOp, UnaryOp)) else v
+                                        for v in values))
+        count += 1
+    writer.close()
+    return count
+
+
+def _child(nodes: List[ASTNode], node_id: Any) -> ASTNode:
+    # Children are always written before their parent
+    if type(node_id) is not int or not 0 <= node_id < len(nodes):
+        raise IndexError(f"child id {node_id!r} is not an earlier record")
+    return nodes[node_id]
+
+
+def _build_node(cls: Type[ASTNode], items: Iterable[Tuple[str, Any]], nodes: List[ASTNode]) -> ASTNode:
+    if cls is Literal:
+        return Literal(**dict(items))
+    args = {}
+    for name, value in items:
+        if name == "operator":
+            value = _OPERATORS[cls][value] if isinstance(value, str) else \
+                (BinaryOp if cls is Binary else UnaryOp)(value)
+        elif name in ("name", "offset") or value is None:
+            pass
+        elif isinstance(value, list):
+            value = [_child(nodes, child) for child in value]
+        else:
+            value = _child(nodes, value)
+        args[name] = value
+    return cls(**args)
+
+
+def _json_node(data: Dict[str, Any], nodes: List[ASTNode]) -> ASTNode:
+    try:
+        cls = _NODE_NAMES[data["node"]]
+        return _build_node(cls, [(name, data[name]) for name in _NODE_FIELDS[cls] if name in data], nodes)
+    except (KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"Malformed AST record {len(nodes)}: {e!r}") from e
+
+
+def _binary_records(stream: BinaryIO) -> Iterator[List[Any]]:
+    while True:
+        head = stream.read(_U32.size)
+        if not head:
+            return
+        if len(head) != _U32.size:
+            raise ValueError("Truncated record length")
+        (size,) = _U32.unpack(head)
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError("Truncated record")
+        yield _decode_record(data)
+
+
+def read_program(stream: BinaryIO) -> Program:
+    """Rebuild a :class:`Program` written by :func:`write_program`.
+
+    The format (binary, JSON lines or a JSON array) is detected from the
+    first bytes of ``stream``.
+    """
+    nodes: List[ASTNode] = []
+    head = stream.read(len(_AST_MAGIC))
+    if head == _AST_MAGIC:
+        try:
+            for code, *values in _binary_records(stream):
+                if type(code) is not int or not 0 <= code < len(_NODE_CLASSES):
+                    raise ValueError(f"unknown node code {code!r}")
+                cls = _NODE_CLASSES[code]
+                nodes.append(_build_node(cls, zip(_NODE_FIELDS[cls], values, strict=True), nodes))
+        except (IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed AST record {len(nodes)}: {e!r}") from e
+    elif head[:4] == _TOKENS_MAGIC[:4]:
+        raise ValueError("Stream holds tokens, not an AST")
+    elif head[:4] == _AST_MAGIC[:4]:
+        raise ValueError(f"Unsupported binary AST version {head[4:]!r}")
+    else:
+        text = (head + stream.read()).decode("utf-8")
+        if text.lstrip().startswith("["):
+            records = json.loads(text)
+        else:
+            records = (json.loads(line) for line in text.splitlines() if line.strip())
+        for data in records:
+            nodes.append(_json_node(data, nodes))
+
+    if not nodes or not isinstance(nodes[-1], Program):
+        raise ValueError("AST stream does not end with a Program record")
+    return nodes[-1]
+
+
+def load_program(path: Union[str, Path]) -> Program:
+    with open(path, "rb") as f:
+        return read_program(f)
@@ -0,0 +1,92 @@
+import mmap
+import re
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+
+# Anything the lexers accept: text, or UTF-8 bytes such as a mapped file
+SourceData = Union[str, bytes, mmap.mmap]
+
+
+def load_source(path: Union[str, Path]) -> Union[bytes, mmap.mmap]:
+    """Memory-map a source file read-only.
+
+    The result is lexed in place by :class:`~kemlang.lexer.ByteLexer`, so
+    the file is never decoded into one large ``str``. Empty files cannot be
+    mapped and are returned as ``b""``.
+    """
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""
+
+
+def source_text(data: SourceData) -> str:
+    """Decode loaded source the way ``Path.read_text()`` would, for diagnostics."""
+    if isinstance(data, str):
+        return data
+    text = bytes(data).decode('utf-8')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+# "\r\n", "\n" and a lone "\r" each end a line, as in source_text()
+_LINE_BREAK = re.compile("\r\n?|\n")
+_LINE_BREAK_BYTES = re.compile(b"\r\n?|\n")
+
+
+class LineIndex:
+    """Sorted line-start offsets of a source, for on-demand line/column lookup.
+
+    Tokens only record offsets and share one index per source, so the lexers
+    never count lines. The offsets are collected on the first lookup. For
+    byte sources offsets are byte offsets, while columns are still counted
+    in characters. Lines end the way :func:`source_text` splits them, so
+    positions in mapped files agree with those in decoded text.
+    """
+
+    def __init__(self, source: SourceData):
+        self.source = source
+        self._starts: Optional[array] = None
+
+    @property
+    def starts(self) -> array:
+        if self._starts is None:
+            source = self.source
+            starts = array('q', [0])
+            if isinstance(source, str):
+                starts.extend(m.end() for m in _LINE_BREAK.finditer(source))
+            else:
+                starts.extend(m.end() for m in _LINE_BREAK_BYTES.finditer(source))
+            self._starts = starts
+        return self._starts
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line(self, offset: int) -> int:
+        """Return the 1-based line containing ``offset``."""
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Return the 1-based (line, col) of ``offset``."""
+        starts = self.starts
+        line = bisect_right(starts, offset)
+        line_start = starts[line - 1]
+        if isinstance(self.source, str):
+            return line, offset - line_start + 1
+        prefix = self.source[line_start:offset]
+        if not prefix.isascii():
+            return line, len(bytes(prefix).decode('utf-8')) + 1
+        return line, offset - line_start + 1
+
+    def line_text(self, line: int) -> str:
+        """Return the text of a 1-based line without its line break."""
+        starts = self.starts
+        end = starts[line] if line < len(starts) else len(self.source)
+        text = self.source[starts[line - 1]:end]
+        if not isinstance(text, str):
+            text = bytes(text).decode('utf-8')
+        return text.rstrip('\r\n')
@@ -0,0 +1,141 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .types import Token, TokenType
+from .lexer import KeywordTable, RegexLexer
+from .source import LineIndex
+
+
+# TokenType members indexed by their value, for decoding type codes
+_TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+_IDENTIFIER = TokenType.IDENTIFIER.value
+
+
+class TokenBuffer:
+    """Compact struct-of-arrays token storage.
+
+    Each token is a type code plus start/end offsets into ``source`` and an
+    index into the ``literals`` side table (-1 when the token has no
+    literal). Equal literals share one slot. Token objects are only built,
+    as views, when a token is read through indexing or iteration; identifier
+    lexemes in views are interned so equal names are the same object.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.literal_indices = array('i')
+        self.literals: List[Any] = []
+        self._literal_slots: Dict[Any, int] = {}
+        self.lines = LineIndex(source)
+        # Pool so that equal identifier lexemes in views are one object
+        pool: Dict[str, str] = {}
+        self.intern = pool.setdefault
+
+    def append(self, token_type: TokenType, start: int, end: int, literal: Any = None) -> None:
+        self.types.append(token_type.value)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.literal_indices.append(-1 if literal is None else self.literal_slot(literal))
+
+    def literal_slot(self, literal: Any) -> int:
+        """Index of ``literal`` in the side table, adding it if needed."""
+        slot = self._literal_slots.get(literal)
+        if slot is None:
+            slot = self._literal_slots[literal] = len(self.literals)
+            self.literals.append(literal)
+        return slot
+
+    def derive(self, source: str) -> "TokenBuffer":
+        """Return an empty buffer for ``source`` sharing this buffer's literal slots.
+
+        Literal indices copied from this buffer with :meth:`copy_range` stay
+        valid in the derived buffer.
+        """
+        derived = TokenBuffer(source)
+        derived.literals = self.literals.copy()
+        derived._literal_slots = self._literal_slots.copy()
+        return derived
+
+    def copy_range(self, other: "TokenBuffer", start: int, stop: int, shift: int = 0) -> None:
+        """Append tokens ``start:stop`` of ``other``, moving their offsets by ``shift``."""
+        self.types.extend(other.types[start:stop])
+        self.literal_indices.extend(other.literal_indices[start:stop])
+        self._extend_offsets(other, start, stop, shift)
+
+    def merge_range(self, other: "TokenBuffer", start: int, stop: int, shift: int = 0) -> None:
+        """Like :meth:`copy_range`, for a buffer with its own literal slots."""
+        slots = [self.literal_slot(literal) for literal in other.literals]
+        self.types.extend(other.types[start:stop])
+        self.literal_indices.extend(
+            array('i', [slots[i] if i >= 0 else -1 for i in other.literal_indices[start:stop]]))
+        self._extend_offsets(other, start, stop, shift)
+
+    def _extend_offsets(self, other: "TokenBuffer", start: int, stop: int, shift: int) -> None:
+        if shift:
+            self.starts.extend(array('i', [pos + shift for pos in other.starts[start:stop]]))
+            self.ends.extend(array('i', [pos + shift for pos in other.ends[start:stop]]))
+        else:
+            self.starts.extend(other.starts[start:stop])
+            self.ends.extend(other.ends[start:stop])
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def type_at(self, index: int) -> TokenType:
+        return _TOKEN_TYPES[self.types[index]]
+
+    def lexeme_at(self, index: int) -> str:
+        lexeme = self.source[self.starts[index]:self.ends[index]]
+        if self.types[index] == _IDENTIFIER:
+            lexeme = self.intern(lexeme, lexeme)
+        return lexeme
+
+    def literal_at(self, index: int) -> Any:
+        literal_index = self.literal_indices[index]
+        return None if literal_index < 0 else self.literals[literal_index]
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Return the 1-based (line, col) of a source offset."""
+        return self.lines.position(offset)
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self)
+        return Token(self.type_at(index), self.lexeme_at(index), self.starts[index],
+                     self.literal_at(index), self.lines)
+
+    def __iter__(self) -> Iterator[Token]:
+        source = self.source
+        intern = self.intern
+        starts = self.starts
+        ends = self.ends
+        lines = self.lines
+
+        for i, code in enumerate(self.types):
+            start = starts[i]
+            lexeme = source[start:ends[i]]
+            if code == _IDENTIFIER:
+                lexeme = intern(lexeme, lexeme)
+            literal_index = self.literal_indices[i]
+            yield Token(
+                _TOKEN_TYPES[code],
+                lexeme,
+                start,
+                None if literal_index < 0 else self.literals[literal_index],
+                lines,
+            )
+
+    def to_tokens(self) -> List[Token]:
+        return list(self)
+
+
+def tokenize_buffer(source: str, keywords: Optional[KeywordTable] = None) -> TokenBuffer:
+    """Tokenize source straight into a TokenBuffer, without Token objects."""
+    buffer = TokenBuffer(source)
+    append = buffer.append
+    for token_type, start, end, literal in RegexLexer(source, keywords).scan():
+        append(token_type, start, end, literal)
+    return buffer
@@ -0,0 +1,340 @@
+import ast
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Sequence
+
+from .types import (
+    ASTNode, Program, Block, Stmt,
+    Print, Declaration, Assignment, If, While, Break, Continue,
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
+)
+from .errors import KemError, RuntimeError, BreakError, ContinueError
+from .interpreter import Interpreter
+from .source import LineIndex, SourceData
+
+
+_INDENT = "    "
+_COMPARISONS = (BinaryOp.EQUAL, BinaryOp.NOT_EQUAL, BinaryOp.LESS, BinaryOp.GREATER,
+                BinaryOp.LESS_EQUAL, BinaryOp.GREATER_EQUAL)
+# Operators inlined for int operands; everything else calls binary_operation
+_INLINE_OPERATORS = {
+    BinaryOp.ADD: "+", BinaryOp.SUBTRACT: "-", BinaryOp.MULTIPLY: "*", BinaryOp.MODULO: "%",
+    BinaryOp.LESS: "<", BinaryOp.GREATER: ">", BinaryOp.LESS_EQUAL: "<=", BinaryOp.GREATER_EQUAL: ">=",
+}
+
+
+@dataclass
+class PythonModule:
+    """Generated Python source defining ``_main()``.
+
+    ``lines[i]`` is the ``.jsk`` line that generated line ``i + 1`` came
+    from, or 0 when unknown.
+    """
+
+    text: str
+    lines: List[int] = field(default_factory=list)
+
+    def compile(self, filename: str = "<kemlang>") -> CodeType:
+        """Compile with line numbers pointing at the ``.jsk`` source."""
+        if not any(self.lines):
+            return compile(self.text, filename, "exec")
+        tree = ast.parse(self.text, filename)
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.stmt, ast.expr)):
+                line = self.lines[node.lineno - 1] or 1
+                node.lineno = node.end_lineno = line
+                node.col_offset = node.end_col_offset = 0
+        return compile(tree, filename, "exec")
+
+
+def _first_offset(node: ASTNode) -> int:
+    """Offset of the first positioned node under ``node``, or -1."""
+    offset = getattr(node, "offset", -1)
+    if offset >= 0:
+        return offset
+    for name in ("left", "right", "expression", "initializer", "value", "condition"):
+        child = getattr(node, name, None)
+        if child is not None:
+            offset = _first_offset(child)
+            if offset >= 0:
+                return offset
+    return -1
+
+
+def _continues(statements: Sequence[ASTNode]) -> bool:
+    """Whether ``aagal vado`` applies to the loop directly around ``statements``."""
+    for stmt in statements:
+        if isinstance(stmt, Continue):
+            return True
+        if isinstance(stmt, Block) and _continues(stmt.statements):
+            return True
+        if isinstance(stmt, If) and _continues([stmt.then_branch] + ([stmt.else_branch] if stmt.else_branch else [])):
+            return True
+    return False
+
+
+class Transpiler:
+    """Translates a :class:`Program` into a Python module.
+
+    Each KemLang declaration becomes its own Python local, bound the way
+    :class:`~kemlang.closures.ClosureCompiler` binds variables, so block
+    scoping needs no runtime environments. Integer arithmetic and
+    comparisons run inline; other operands go through the interpreter's
+    operator methods, which keeps KemLang's type errors and messages.
+    """
+
+    def __init__(self, lines: Optional[LineIndex] = None) -> None:
+        self.source_lines = lines
+        self.output: List[str] = []
+        self.line_map: List[int] = []
+        self.depth = 1
+        self.line = 0
+        self.scopes: List[Dict[str, str]] = [{}]
+        self.locals = 0
+        self.temps = 0
+        self.loops = 0
+
+    def transpile(self, program: Program) -> PythonModule:
+        self.emit_line("def _main():", depth=0)
+        for statement in program.statements:
+            self.statement(statement)
+        if len(self.output) == 1:
+            self.emit_line("pass")
+        return PythonModule("\n".join(self.output) + "\n", self.line_map)
+
+    def emit_line(self, text: str, depth: Optional[int] = None) -> None:
+        depth = self.depth if depth is None else depth
+        comment = f"  # line {self.line}" if self.line and depth else ""
+        self.output.append(_INDENT * depth + text + comment)
+        self.line_map.append(self.line)
+
+    def locate(self, node: ASTNode) -> None:
+        offset = _first_offset(node)
+        if offset >= 0 and self.source_lines is not None:
+            self.line = self.source_lines.position(offset)[0]
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f"_t{self.temps}"
+
+    def declare(self, name: str) -> str:
+        self.locals += 1
+        local = f"{name}_{self.locals}" if name.isascii() else f"_v{self.locals}"
+        self.scopes[-1][name] = local
+        return local
+
+    def resolve(self, name: str) -> Optional[str]:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    # Statements
+    def statement(self, stmt: ASTNode) -> None:
+        self.locate(stmt)
+        if isinstance(stmt, Print):
+            self.emit_line(f"_print(_str({self.expression(stmt.expression)}))")
+        elif isinstance(stmt, Declaration):
+            value = self.expression(stmt.initializer)
+            if stmt.name in self.scopes[-1]:
+                self.emit_line(f"_redeclared({stmt.name!r}, {value})")
+            else:
+                self.emit_line(f"{self.declare(stmt.name)} = {value}")
+        elif isinstance(stmt, Assignment):
+            value = self.expression(stmt.value)
+            local = self.resolve(stmt.name)
+            if local is None:
+                self.emit_line(f"_undefined({stmt.name!r}, {value})")
+            else:
+                self.emit_line(f"{local} = {value}")
+        elif isinstance(stmt, If):
+            self.if_statement(stmt)
+        elif isinstance(stmt, While):
+            self.while_statement(stmt)
+        elif isinstance(stmt, Block):
+            self.block(stmt)
+        elif isinstance(stmt, Break):
+            # Outside a loop the tree-walker's exception escapes as an internal error
+            self.emit_line("break" if self.loops else "raise _BreakError()")
+        elif isinstance(stmt, Continue):
+            self.emit_line("continue" if self.loops else "raise _ContinueError()")
+        else:
+            raise RuntimeError(f"Unknown statement type: {type(stmt)}")
+
+    def block(self, block: Block) -> None:
+        self.scopes.append({})
+        for statement in block.statements:
+            self.statement(statement)
+        self.scopes.pop()
+
+    def body(self, stmt: ASTNode) -> None:
+        """Emit a nested statement one level deeper, never leaving it empty."""
+        start = len(self.output)
+        self.depth += 1
+        self.statement(stmt)
+        if len(self.output) == start:
+            self.emit_line("pass")
+        self.depth -= 1
+
+    def if_statement(self, stmt: If) -> None:
+        self.emit_line(f"if {self.truth(stmt.condition)}:")
+        self.body(stmt.then_branch)
+        if stmt.else_branch:
+            self.locate(stmt.condition)
+            self.emit_line("else:")
+            self.body(stmt.else_branch)
+
+    def while_statement(self, stmt: While) -> None:
+        """``farvu {...} jya sudhi c`` becomes ``while True: ...; if not c: break``.
+
+        ``continue`` in Python skips the rest of the loop, condition
+        included, so a body with ``aagal vado`` instead tests the
+        condition at the top from the second pass on.
+        """
+        body = stmt.body.statements if isinstance(stmt.body, Block) else [stmt.body]
+        self.locate(stmt.condition)
+        flag = self.temp() if _continues(body) else None
+        if flag:
+            self.emit_line(f"{flag} = False")
+        self.emit_line("while True:")
+        self.loops += 1
+        self.depth += 1
+        if flag:
+            self.emit_line(f"if {flag} and not {self.truth(stmt.condition)}:")
+            self.emit_line(_INDENT + "break")
+            self.emit_line(f"{flag} = True")
+            self.statement(stmt.body)
+        else:
+            self.statement(stmt.body)
+            self.locate(stmt.condition)
+            self.emit_line(f"if not {self.truth(stmt.condition)}:")
+            self.emit_line(_INDENT + "break")
+        self.depth -= 1
+        self.loops -= 1
+
+    # Expressions
+    def truth(self, expr: ASTNode) -> str:
+        """A Python condition with KemLang truthiness for ``expr``."""
+        code = self.expression(expr)
+        if isinstance(expr, Binary) and expr.operator in _COMPARISONS:
+            return code  # comparisons always produce a bool
+        value = self.temp()
+        return f"(({value} := {code}) is True or {value} is not False and _truthy({value}))"
+
+    def expression(self, expr: ASTNode) -> str:
+        if isinstance(expr, Literal):
+            return repr(expr.value)
+        if isinstance(expr, Variable):
+            local = self.resolve(expr.name)
+            return local if local is not None else f"_undefined({expr.name!r})"
+        if isinstance(expr, Binary):
+            return self.binary(expr)
+        if isinstance(expr, Unary):
+            operand = self.expression(expr.right)
+            if expr.operator != UnaryOp.NEGATE:
+                raise RuntimeError(f"Unknown unary operator: {expr.operator}")
+            value = self.temp()
+            return f"(-{value} if type({value} := {operand}) is int else _unop({int(expr.operator)}, {value}))"
+        if isinstance(expr, Input):
+            return "_input().rstrip('\\n')"
+        raise RuntimeError(f"Unknown expression type: {type(expr)}")
+
+    def binary(self, expr: Binary) -> str:
+        left = self.expression(expr.left)
+        right = self.expression(expr.right)
+        op = expr.operator
+        if op == BinaryOp.EQUAL:
+            return f"({left} == {right})"
+        if op == BinaryOp.NOT_EQUAL:
+            return f"({left} != {right})"
+        symbol = _INLINE_OPERATORS.get(op)
+        if symbol is None:
+            return f"_binop({int(op)}, {left}, {right})"
+
+        a = self.temp()
+        if isinstance(expr.right, Literal) and type(expr.right.value) is int \
+                and (expr.right.value or op != BinaryOp.MODULO):
+            # An int literal on the right only needs the left operand checked
+            return f"({a} {symbol} {right} if type({a} := {left}) is int else _binop({int(op)}, {a}, {right}))"
+        b = self.temp()
+        check = f"type({a} := {left}) is type({b} := {right}) is int"
+        if op == BinaryOp.MODULO:
+            check += f" and {b}"
+        return f"({a} {symbol} {b} if {check} else _binop({int(op)}, {a}, {b}))"
+
+
+def transpile(program: Program, source: Optional[SourceData] = None) -> PythonModule:
+    """Translate ``program`` to Python; ``source`` enables ``.jsk`` line mapping."""
+    return Transpiler(LineIndex(source) if source is not None else None).transpile(program)
+
+
+def _undefined(name: str, value: Any = None) -> NoReturn:
+    raise RuntimeError(f"Undefined variable '{name}'")
+
+
+def _redeclared(name: str, value: Any) -> NoReturn:
+    raise RuntimeError(f"Variable '{name}' already declared in this scope")
+
+
+class PythonInterpreter(Interpreter):
+    """Runs programs transpiled to Python and compiled with :func:`compile`.
+
+    Pass the ``source`` (and a ``filename``) to have runtime errors and
+    Python tracebacks point at ``.jsk`` lines. Modules CPython refuses to
+    compile, such as ones with more than 20 nested loops, run on the
+    closure engine instead.
+    """
+
+    def __init__(self, input_fn: Callable[[], str] = input, output_fn: Callable[[str], None] = print,
+                 source: Optional[SourceData] = None, filename: str = "<kemlang>"):
+        super().__init__(input_fn, output_fn)
+        self.source = source
+        self.filename = filename
+
+    def interpret(self, program: Program) -> int:
+        """Transpile, compile and run a program. Returns 0 on success, 1 on error."""
+        return self.run_statements([program])
+
+    def namespace(self) -> Dict[str, Any]:
+        """Globals of the generated module: the KemLang runtime helpers."""
+        return {
+            "__builtins__": {"type": type, "int": int},
+            "_print": self.output_fn,
+            "_input": self.input_fn,
+            "_str": self.stringify,
+            "_truthy": self.is_truthy,
+            "_binop": self.binary_operation,
+            "_unop": self.unary_operation,
+            "_undefined": _undefined,
+            "_redeclared": _redeclared,
+            "_BreakError": BreakError,
+            "_ContinueError": ContinueError,
+        }
+
+    def compile(self, program: Program) -> Callable[[], None]:
+        try:
+            code = transpile(program, self.source).compile(self.filename)
+        except (SyntaxError, RecursionError, MemoryError):
+            from .closures import ClosureCompiler
+            action = ClosureCompiler(self).compile(program)
+            return lambda: action(self.environment)
+        namespace = self.namespace()
+        exec(code, namespace)
+        main: Callable[[], None] = namespace["_main"]
+        return main
+
+    def execute(self, stmt: Stmt) -> None:
+        # run_statements() hands over the whole program; other statements run alone
+        main = self.compile(stmt if isinstance(stmt, Program) else Program([stmt]))
+        try:
+            main()
+        except KemError as error:
+            if self.source is not None:
+                # The innermost frame of the generated code holds the .jsk line
+                traceback, line = error.__traceback__, 0
+                while traceback is not None:
+                    if traceback.tb_frame.f_code.co_filename == self.filename:
+                        line = traceback.tb_lineno
+                    traceback = traceback.tb_next
+                error.line = error.line or line
+            raise
@@ -1,7 +1,9 @@
-from dataclasses import dataclass
-from enum import Enum, auto
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum, auto
 from typing import Any, List, Optional, Union
 
+from .source import LineIndex
+
 
 class TokenType(Enum):
     # Literals
@@ -50,109 +52,166 @@ class TokenType(Enum):
     # Special
     NEWLINE = auto()
     EOF = auto()
+    ERROR = auto()         # malformed input, only in recovering lexers
 
 
 @dataclass
 class Token:
     type: TokenType
     lexeme: str
-    line: int
-    col: int
+    offset: int
     literal: Any = None
-
-
-# AST Node base classes
-@dataclass
+    # Shared by all tokens of a source; line/col are looked up on demand
+    lines: Optional[LineIndex] = field(default=None, repr=False, compare=False)
+
+    @property
+    def line(self) -> int:
+        return self.lines.line(self.offset) if self.lines is not None else 1
+
+    @property
+    def col(self) -> int:
+        return self.lines.position(self.offset)[1] if self.lines is not None else self.offset + 1
+
+
+# Operator codes stored in the AST in place of their tokens
+class BinaryOp(IntEnum):
+    ADD = 0
+    SUBTRACT = 1
+    MULTIPLY = 2
+    DIVIDE = 3
+    MODULO = 4
+    EQUAL = 5
+    NOT_EQUAL = 6
+    LESS = 7
+    GREATER = 8
+    LESS_EQUAL = 9
+    GREATER_EQUAL = 10
+
+    @property
+    def symbol(self) -> str:
+        return _BINARY_SYMBOLS[self]
+
+
+class UnaryOp(IntEnum):
+    NEGATE = 0
+
+    @property
+    def symbol(self) -> str:
+        return _UNARY_SYMBOLS[self]
+
+
+_BINARY_SYMBOLS = ("+", "-", "*", "/", "%", "==", "!=", "<", ">", "<=", ">=")
+_UNARY_SYMBOLS = ("-",)
+
+BINARY_OPERATORS = {
+    TokenType.PLUS: BinaryOp.ADD, TokenType.MINUS: BinaryOp.SUBTRACT,
+    TokenType.MULTIPLY: BinaryOp.MULTIPLY, TokenType.DIVIDE: BinaryOp.DIVIDE,
+    TokenType.MODULO: BinaryOp.MODULO,
+    TokenType.EQUAL: BinaryOp.EQUAL, TokenType.NOT_EQUAL: BinaryOp.NOT_EQUAL,
+    TokenType.LESS: BinaryOp.LESS, TokenType.GREATER: BinaryOp.GREATER,
+    TokenType.LESS_EQUAL: BinaryOp.LESS_EQUAL, TokenType.GREATER_EQUAL: BinaryOp.GREATER_EQUAL,
+}
+
+
+# AST Node base classes. Nodes are immutable and slotted to keep large trees
+# small; operator nodes record the source offset of their operator and
+# named nodes that of their name.
+@dataclass(frozen=True, slots=True)
 class ASTNode:
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Stmt(ASTNode):
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Expr(ASTNode):
     pass
 
 
 # Statements
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Program(ASTNode):
     statements: List[Stmt]
 
 
-@dataclass
-class Block(ASTNode):
+@dataclass(frozen=True, slots=True)
+class Block(Stmt):
     statements: List[Stmt]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Print(Stmt):
     expression: Expr
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Declaration(Stmt):
     name: str
     initializer: Expr
+    offset: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Assignment(Stmt):
     name: str
     value: Expr
+    offset: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class If(Stmt):
     condition: Expr
     then_branch: Block
     else_branch: Optional[Block] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class While(Stmt):
     body: Block
     condition: Expr
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Break(Stmt):
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Continue(Stmt):
     pass
 
 
 # Expressions
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Binary(Expr):
     left: Expr
-    operator: Token
+    operator: BinaryOp
     right: Expr
+    offset: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Unary(Expr):
-    operator: Token
+    operator: UnaryOp
     right: Expr
+    offset: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Literal(Expr):
-    value: Any
+    value: "KemValue"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Variable(Expr):
     name: str
+    offset: int = field(default=-1, compare=False)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Input(Expr):
     pass
 
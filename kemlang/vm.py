@@ -0,0 +1,390 @@
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Tuple
+
+from .types import (
+    ASTNode, Program, Block, Stmt, KemValue,
+    Print, Declaration, Assignment, If, While, Break, Continue,
+    Binary, Unary, Literal, Variable, Input, BinaryOp, UnaryOp
+)
+from .errors import RuntimeError, BreakError, ContinueError
+from .interpreter import Environment, Interpreter, declares
+
+
+class Opcode(IntEnum):
+    LOAD_CONST = 0       # push constants[arg]
+    LOAD_NAME = 1        # push the variable names[arg]
+    DEFINE_NAME = 2      # pop a value and declare names[arg] in the current scope
+    STORE_NAME = 3       # pop a value and assign it to names[arg]
+    # Binary operators, in BinaryOp order: opcode - ADD is the BinaryOp code
+    ADD = 4
+    SUBTRACT = 5
+    MULTIPLY = 6
+    DIVIDE = 7
+    MODULO = 8
+    EQUAL = 9
+    NOT_EQUAL = 10
+    LESS = 11
+    GREATER = 12
+    LESS_EQUAL = 13
+    GREATER_EQUAL = 14
+    NEGATE = 15
+    INPUT = 16
+    PRINT = 17
+    JUMP = 18            # continue at instruction offset arg
+    JUMP_IF_FALSE = 19   # pop a value and jump if it is falsy
+    JUMP_IF_TRUE = 20    # pop a value and jump if it is truthy
+    ENTER_SCOPE = 21
+    EXIT_SCOPE = 22      # leave arg scopes
+    BREAK = 23           # `tame jao` outside any loop
+    CONTINUE = 24        # `aagal vado` outside any loop
+    HALT = 25
+
+
+# Opcodes as plain ints for the dispatch loop in VirtualMachine.run:
+# comparing with an IntEnum member on every instruction costs more
+_LOAD_CONST = int(Opcode.LOAD_CONST)
+_LOAD_NAME = int(Opcode.LOAD_NAME)
+_DEFINE_NAME = int(Opcode.DEFINE_NAME)
+_STORE_NAME = int(Opcode.STORE_NAME)
+_ADD = int(Opcode.ADD)
+_SUBTRACT = int(Opcode.SUBTRACT)
+_MULTIPLY = int(Opcode.MULTIPLY)
+_DIVIDE = int(Opcode.DIVIDE)
+_MODULO = int(Opcode.MODULO)
+_EQUAL = int(Opcode.EQUAL)
+_NOT_EQUAL = int(Opcode.NOT_EQUAL)
+_LESS = int(Opcode.LESS)
+_GREATER = int(Opcode.GREATER)
+_LESS_EQUAL = int(Opcode.LESS_EQUAL)
+_GREATER_EQUAL = int(Opcode.GREATER_EQUAL)
+_NEGATE = int(Opcode.NEGATE)
+_INPUT = int(Opcode.INPUT)
+_PRINT = int(Opcode.PRINT)
+_JUMP = int(Opcode.JUMP)
+_JUMP_IF_FALSE = int(Opcode.JUMP_IF_FALSE)
+_JUMP_IF_TRUE = int(Opcode.JUMP_IF_TRUE)
+_ENTER_SCOPE = int(Opcode.ENTER_SCOPE)
+_EXIT_SCOPE = int(Opcode.EXIT_SCOPE)
+_BREAK = int(Opcode.BREAK)
+_CONTINUE = int(Opcode.CONTINUE)
+_HALT = int(Opcode.HALT)
+
+
+@dataclass
+class Code:
+    """Compiled program: ``(opcode, arg)`` pairs in ``ops``, plus side tables.
+
+    Jump targets are offsets into ``ops``, so they are always even.
+    """
+
+    ops: array = field(default_factory=lambda: array('i'))
+    constants: List[KemValue] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+
+
+class _Loop:
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.breaks: List[int] = []
+        self.continues: List[int] = []
+
+
+class Compiler:
+    """Compiles a :class:`Program` to :class:`Code`.
+
+    Loops become jumps; ``tame jao`` and ``aagal vado`` leave the scopes
+    opened inside the loop body before jumping. Blocks that declare
+    nothing open no scope.
+    """
+
+    def __init__(self) -> None:
+        self.code = Code()
+        self.depth = 0
+        self.loops: List[_Loop] = []
+        # Keyed by (type, value) so that True and 1 get separate slots
+        self._constants: Dict[Tuple[type, Any], int] = {}
+        self._names: Dict[str, int] = {}
+
+    def compile(self, program: Program) -> Code:
+        for statement in program.statements:
+            self.statement(statement)
+        self.emit(Opcode.HALT)
+        return self.code
+
+    def emit(self, opcode: Opcode, arg: int = 0) -> int:
+        """Append an instruction and return its offset."""
+        ops = self.code.ops
+        ops.append(opcode)
+        ops.append(arg)
+        return len(ops) - 2
+
+    def patch(self, offset: int, target: int) -> None:
+        self.code.ops[offset + 1] = target
+
+    def constant(self, value: KemValue) -> int:
+        key = (value.__class__, value)
+        slot = self._constants.get(key)
+        if slot is None:
+            slot = self._constants[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return slot
+
+    def name(self, name: str) -> int:
+        slot = self._names.get(name)
+        if slot is None:
+            slot = self._names[name] = len(self.code.names)
+            self.code.names.append(name)
+        return slot
+
+    def statement(self, stmt: ASTNode) -> None:
+        if isinstance(stmt, Print):
+            self.expression(stmt.expression)
+            self.emit(Opcode.PRINT)
+        elif isinstance(stmt, Declaration):
+            self.expression(stmt.initializer)
+            self.emit(Opcode.DEFINE_NAME, self.name(stmt.name))
+        elif isinstance(stmt, Assignment):
+            self.expression(stmt.value)
+            self.emit(Opcode.STORE_NAME, self.name(stmt.name))
+        elif isinstance(stmt, If):
+            self.if_statement(stmt)
+        elif isinstance(stmt, While):
+            self.while_statement(stmt)
+        elif isinstance(stmt, Block):
+            self.block(stmt)
+        elif isinstance(stmt, Break):
+            self.jump_out(Opcode.BREAK, "breaks")
+        elif isinstance(stmt, Continue):
+            self.jump_out(Opcode.CONTINUE, "continues")
+        else:
+            raise RuntimeError(f"Unknown statement type: {type(stmt)}")
+
+    def block(self, block: Block) -> None:
+        if not declares(block):
+            for statement in block.statements:
+                self.statement(statement)
+            return
+        self.emit(Opcode.ENTER_SCOPE)
+        self.depth += 1
+        for statement in block.statements:
+            self.statement(statement)
+        self.depth -= 1
+        self.emit(Opcode.EXIT_SCOPE, 1)
+
+    def if_statement(self, stmt: If) -> None:
+        self.expression(stmt.condition)
+        to_else = self.emit(Opcode.JUMP_IF_FALSE)
+        self.statement(stmt.then_branch)
+        if stmt.else_branch:
+            to_end = self.emit(Opcode.JUMP)
+            self.patch(to_else, len(self.code.ops))
+            self.statement(stmt.else_branch)
+            self.patch(to_end, len(self.code.ops))
+        else:
+            self.patch(to_else, len(self.code.ops))
+
+    def while_statement(self, stmt: While) -> None:
+        """``farvu`` runs the body first, then loops while the condition holds."""
+        loop = _Loop(self.depth)
+        self.loops.append(loop)
+        start = len(self.code.ops)
+        self.statement(stmt.body)
+        self.loops.pop()
+
+        condition = len(self.code.ops)
+        self.expression(stmt.condition)
+        self.emit(Opcode.JUMP_IF_TRUE, start)
+        end = len(self.code.ops)
+        for offset in loop.continues:
+            self.patch(offset, condition)
+        for offset in loop.breaks:
+            self.patch(offset, end)
+
+    def jump_out(self, opcode: Opcode, kind: str) -> None:
+        if not self.loops:
+            # The tree-walker raises here and reports an internal error
+            self.emit(opcode)
+            return
+        loop = self.loops[-1]
+        if self.depth > loop.depth:
+            self.emit(Opcode.EXIT_SCOPE, self.depth - loop.depth)
+        getattr(loop, kind).append(self.emit(Opcode.JUMP))
+
+    def expression(self, expr: ASTNode) -> None:
+        if isinstance(expr, Literal):
+            self.emit(Opcode.LOAD_CONST, self.constant(expr.value))
+        elif isinstance(expr, Variable):
+            self.emit(Opcode.LOAD_NAME, self.name(expr.name))
+        elif isinstance(expr, Binary):
+            self.expression(expr.left)
+            self.expression(expr.right)
+            self.emit(Opcode(Opcode.ADD + expr.operator))
+        elif isinstance(expr, Unary):
+            self.expression(expr.right)
+            if expr.operator != UnaryOp.NEGATE:
+                raise RuntimeError(f"Unknown unary operator: {expr.operator}")
+            self.emit(Opcode.NEGATE)
+        elif isinstance(expr, Input):
+            self.emit(Opcode.INPUT)
+        else:
+            raise RuntimeError(f"Unknown expression type: {type(expr)}")
+
+
+def compile_program(program: Program) -> Code:
+    return Compiler().compile(program)
+
+
+def disassemble(code: Code) -> List[str]:
+    """One line per instruction: offset, opcode and decoded argument."""
+    lines = []
+    ops = code.ops
+    for offset in range(0, len(ops), 2):
+        opcode, arg = Opcode(ops[offset]), ops[offset + 1]
+        if opcode == Opcode.LOAD_CONST:
+            operand = repr(code.constants[arg])
+        elif opcode in (Opcode.LOAD_NAME, Opcode.DEFINE_NAME, Opcode.STORE_NAME):
+            operand = code.names[arg]
+        elif opcode in (Opcode.JUMP, Opcode.JUMP_IF_FALSE, Opcode.JUMP_IF_TRUE, Opcode.EXIT_SCOPE):
+            operand = str(arg)
+        else:
+            operand = ""
+        lines.append(f"{offset:5} {opcode.name:14} {operand}".rstrip())
+    return lines
+
+
+class VirtualMachine(Interpreter):
+    """Runs programs compiled to :class:`Code` in a single dispatch loop.
+
+    Scoping and operator semantics are those of :class:`Interpreter`: the
+    loop inlines the common integer and string cases and defers everything
+    else, including error reporting, to the inherited operator methods.
+    """
+
+    def interpret(self, program: Program) -> int:
+        """Compile and run a program. Returns 0 on success, 1 on error."""
+        return self.run_statements([program])
+
+    def execute(self, stmt: Stmt) -> None:
+        # interpret() passes the whole program; other statements run alone
+        program = stmt if isinstance(stmt, Program) else Program([stmt])
+        self.run(compile_program(program))
+
+    def run(self, code: Code) -> None:
+        """Execute compiled code in the current environment."""
+        ops = code.ops.tolist()
+        constants = code.constants
+        names = code.names
+        stack: List[KemValue] = []
+        push = stack.append
+        pop = stack.pop
+        env = self.environment
+        binary_operation = self.binary_operation
+        is_truthy = self.is_truthy
+        output_fn = self.output_fn
+        stringify = self.stringify
+        pc = 0
+
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+
+            if op == _LOAD_NAME:
+                name = names[arg]
+                scope = env
+                while name not in scope.values:
+                    enclosing = scope.enclosing
+                    if enclosing is None:
+                        raise RuntimeError(f"Undefined variable '{name}'")
+                    scope = enclosing
+                push(scope.values[name])
+            elif op == _LOAD_CONST:
+                push(constants[arg])
+            elif op == _ADD:
+                right = pop()
+                left = pop()
+                if type(left) is int and type(right) is int:
+                    push(left + right)
+                elif type(left) is str and type(right) is str:
+                    push(left + right)
+                else:
+                    push(binary_operation(BinaryOp.ADD, left, right))
+            elif op == _JUMP_IF_FALSE:
+                value = pop()
+                if value is False or (value is not True and not is_truthy(value)):
+                    pc = arg
+            elif op == _JUMP_IF_TRUE:
+                value = pop()
+                if value is True or (value is not False and is_truthy(value)):
+                    pc = arg
+            elif _EQUAL <= op <= _GREATER_EQUAL:
+                right = pop()
+                left = pop()
+                if op == _EQUAL:
+                    push(left == right)
+                elif op == _NOT_EQUAL:
+                    push(left != right)
+                elif type(left) is int and type(right) is int:
+                    if op == _LESS:
+                        push(left < right)
+                    elif op == _GREATER:
+                        push(left > right)
+                    elif op == _LESS_EQUAL:
+                        push(left <= right)
+                    else:
+                        push(left >= right)
+                else:
+                    push(binary_operation(op - _ADD, left, right))
+            elif op == _STORE_NAME:
+                name = names[arg]
+                scope = env
+                while name not in scope.values:
+                    enclosing = scope.enclosing
+                    if enclosing is None:
+                        raise RuntimeError(f"Undefined variable '{name}'")
+                    scope = enclosing
+                scope.values[name] = pop()
+            elif _SUBTRACT <= op <= _MODULO:
+                right = pop()
+                left = pop()
+                if (op != _DIVIDE and type(left) is int and type(right) is int
+                        and (op != _MODULO or right)):
+                    if op == _SUBTRACT:
+                        push(left - right)
+                    elif op == _MULTIPLY:
+                        push(left * right)
+                    else:
+                        push(left % right)
+                else:
+                    push(binary_operation(op - _ADD, left, right))
+            elif op == _JUMP:
+                pc = arg
+            elif op == _ENTER_SCOPE:
+                env = Environment(env)
+            elif op == _EXIT_SCOPE:
+                for _ in range(arg):
+                    enclosing = env.enclosing
+                    if enclosing is None:
+                        raise RuntimeError("Cannot leave the global scope")
+                    env = enclosing
+            elif op == _DEFINE_NAME:
+                name = names[arg]
+                if name in env.values:
+                    raise RuntimeError(f"Variable '{name}' already declared in this scope")
+                env.values[name] = pop()
+            elif op == _PRINT:
+                output_fn(stringify(pop()))
+            elif op == _NEGATE:
+                push(self.unary_operation(UnaryOp.NEGATE, pop()))
+            elif op == _INPUT:
+                push(self.input_fn().rstrip('\n'))
+            elif op == _HALT:
+                return
+            elif op == _BREAK:
+                raise BreakError()
+            elif op == _CONTINUE:
+                raise ContinueError()
+            else:
+                raise RuntimeError(f"Unknown opcode: {op}")
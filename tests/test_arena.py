@@ -0,0 +1,92 @@
+import pickle
+
+import pytest
+
+from kemlang.arena import AstArena, ArenaVisitor, NodeKind, parse_arena
+from kemlang.fmt import ArenaFormatter, Formatter
+from kemlang.interpreter import ArenaInterpreter, Interpreter
+from kemlang.parser import parse_program
+
+
+SOURCE = '''kem bhai
+aa x che 0
+aa name che "kem"
+farvu {
+  x che x + 1
+  jo x % 2 == 0 {
+    aagal vado
+  } nahi to {
+    bhai bol -(x * 3) - -1
+  }
+  jo x > 6 {
+    tame jao
+  }
+} jya sudhi bhai chhe
+bhai bol name + " bhai"
+bhai bol bhai chhe == 1
+bhai bol bapu tame bolo
+aavjo bhai'''
+
+
+def run_program(interpreter, program=None):
+    output = []
+    interpreter.output_fn = output.append
+    return interpreter.interpret(program), output
+
+
+class TestAstArena:
+    def test_round_trip(self):
+        program = parse_program(SOURCE)
+        assert AstArena.from_program(program).to_program() == program
+        assert parse_arena(SOURCE, "regex").to_program() == program
+
+    def test_layout(self):
+        arena = parse_arena('kem bhai\nbhai bol a + 2\nbhai bol a\naavjo bhai')
+
+        assert arena.kinds[arena.root] == NodeKind.PROGRAM
+        first, second = arena.statements(arena.root)
+        binary = arena.first[first]
+        assert arena.kinds[binary] == NodeKind.BINARY
+        assert arena.offsets[binary] == len('kem bhai\nbhai bol a ')
+        # Both uses of 'a' share one name slot
+        assert arena.names == ["a"]
+
+    def test_literal_slots_keep_types_apart(self):
+        arena = parse_arena('kem bhai\nbhai bol 1\nbhai bol bhai chhe\nbhai bol 1\naavjo bhai')
+        assert arena.literals == [1, True]
+        assert arena.to_program() == parse_program(
+            'kem bhai\nbhai bol 1\nbhai bol bhai chhe\nbhai bol 1\naavjo bhai')
+
+    def test_pickle(self):
+        arena = pickle.loads(pickle.dumps(parse_arena(SOURCE)))
+        assert arena.to_program() == parse_program(SOURCE)
+        assert arena.literal_slot("kem") == arena.literals.index("kem")
+
+    def test_formatter_matches(self):
+        program = parse_program(SOURCE)
+        assert ArenaFormatter(parse_arena(SOURCE)).format_program() == \
+            Formatter().format_program(program)
+
+    def test_interpreter_matches(self):
+        expected = run_program(Interpreter(lambda: "input"), parse_program(SOURCE))
+        assert expected[0] == 0
+        assert run_program(ArenaInterpreter(parse_arena(SOURCE), lambda: "input")) == expected
+
+    def test_runtime_error(self):
+        output = []
+        arena = parse_arena('kem bhai\nbhai bol 1\nbhai bol y\naavjo bhai')
+        assert ArenaInterpreter(arena, output_fn=output.append).interpret() == 1
+        assert output == ["1", "Runtime Error: Undefined variable 'y'"]
+
+    def test_visitor_without_handler(self):
+        class Counter(ArenaVisitor):
+            def visit_program(self, node):
+                return sum(self.visit(stmt) for stmt in self.arena.statements(node))
+
+            def visit_print(self, node):
+                return 1
+
+        arena = parse_arena('kem bhai\nbhai bol 1\nbhai bol 2\naavjo bhai')
+        assert Counter(arena).visit(arena.root) == 2
+        with pytest.raises(NotImplementedError):
+            Counter(parse_arena('kem bhai\ntame jao\naavjo bhai')).visit(0)
@@ -0,0 +1,52 @@
+import pytest
+
+from benchmarks.generator import SHAPES, generate_program
+from benchmarks.runner import run_suite, scaling_exponent
+from kemlang.fmt import format_code
+from kemlang.interpreter import run
+
+
+class TestProgramGenerator:
+    @pytest.mark.parametrize("shape", SHAPES)
+    def test_generated_programs_run_cleanly(self, shape):
+        source = generate_program(4096, shape, seed=7)
+        output = []
+        assert run(source, input_fn=lambda: "", output_fn=output.append) == 0
+        assert not any(line.startswith(("Runtime Error", "Error")) for line in output)
+
+    @pytest.mark.parametrize("shape", SHAPES)
+    def test_generated_programs_format_idempotently(self, shape):
+        formatted = format_code(generate_program(2048, shape, seed=3))
+        assert format_code(formatted) == formatted
+
+    def test_seed_makes_output_deterministic(self):
+        assert generate_program(2048, seed=1) == generate_program(2048, seed=1)
+        assert generate_program(2048, seed=1) != generate_program(2048, seed=2)
+
+    def test_target_size_is_reached(self):
+        source = generate_program(10_000, "declarations")
+        assert 10_000 <= len(source) < 12_000
+
+    def test_deep_shape_nests_to_max_depth(self):
+        source = generate_program(100, "deep", max_depth=12)
+        indents = [len(line) - len(line.lstrip(" ")) for line in source.splitlines()]
+        assert max(indents) == 2 * 12
+
+    def test_unknown_shape(self):
+        with pytest.raises(ValueError, match="Unknown shape"):
+            generate_program(100, "spiral")
+
+
+class TestRunner:
+    def test_scaling_exponent_of_linear_curve(self):
+        points = [{"bytes": size, "seconds": size / 1000} for size in (1000, 4000, 16000)]
+        assert scaling_exponent(points) == pytest.approx(1.0)
+
+    def test_report_shape(self):
+        report = run_suite([1, 2], ["declarations"], ["tokenize-regex", "parse"],
+                           repeat=1, memory=False)
+        assert len(report["results"]) == 4
+        assert {row["stage"] for row in report["results"]} == {"tokenize-regex", "parse"}
+        assert all(row["tokens"] > 0 and row["mb_per_s"] > 0 for row in report["results"])
+        assert len(report["scaling"]) == 2
+        assert all(curve["exponent"] is not None for curve in report["scaling"])
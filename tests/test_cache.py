@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from kemlang import cache
+from kemlang.cache import (
+    CACHE_DIR, cache_key, cache_path, compile_cached, prune_cache, read_entry, source_digest
+)
+from kemlang.parser import ParseError, parse_program
+
+
+SOURCE = 'kem bhai\naa x che 15\njo x > 1 {\n  bhai bol "big" + -x\n} nahi to {\n  bhai bol sach\n}\naavjo bhai\n'
+
+
+class TestCompileCache:
+    def write(self, directory, name, text):
+        path = directory / name
+        path.write_text(text)
+        return path
+
+    def entries(self, directory):
+        return sorted(p.name for p in (directory / CACHE_DIR).iterdir())
+
+    def test_hit_matches_parse(self, tmp_path):
+        path = self.write(tmp_path, "prog.jsk", SOURCE)
+        first = compile_cached(path, SOURCE)
+        assert self.entries(tmp_path) == [f"prog.jsk.{cache_key(source_digest(SOURCE))}.kemc"]
+
+        target = cache_path(path, cache_key(source_digest(SOURCE)))
+        assert read_entry(target, source_digest(SOURCE)) is not None
+        assert compile_cached(path, SOURCE) == first == parse_program(SOURCE)
+
+    def test_key_covers_source_options_and_version(self, tmp_path, monkeypatch):
+        digest = source_digest(SOURCE)
+        key = cache_key(digest)
+        assert cache_key(source_digest(SOURCE + "\n")) != key
+        assert cache_key(digest, {"engine": "vm"}) != key
+        monkeypatch.setattr(cache, "__version__", "9.9.9")
+        assert cache_key(digest) != key
+
+    def test_stale_or_corrupt_entries_are_misses(self, tmp_path):
+        path = self.write(tmp_path, "prog.jsk", SOURCE)
+        compile_cached(path, SOURCE)
+        target = cache_path(path, cache_key(source_digest(SOURCE)))
+
+        assert read_entry(target, source_digest("other")) is None
+        assert read_entry(target, source_digest(SOURCE), {"engine": "vm"}) is None
+        target.write_bytes(target.read_bytes()[:20])
+        assert read_entry(target, source_digest(SOURCE)) is None
+        assert compile_cached(path, SOURCE) == parse_program(SOURCE)
+        assert read_entry(target, source_digest(SOURCE)) is not None
+
+    def test_parse_errors_are_not_cached(self, tmp_path):
+        path = self.write(tmp_path, "bad.jsk", "kem bhai\naa che 1\naavjo bhai")
+        with pytest.raises(ParseError):
+            compile_cached(path, path.read_text())
+        assert not (tmp_path / CACHE_DIR).exists()
+
+    @pytest.mark.skipif(os.name == "nt" or os.geteuid() == 0, reason="needs a read-only directory")
+    def test_unwritable_cache_still_compiles(self, tmp_path):
+        path = self.write(tmp_path, "prog.jsk", SOURCE)
+        tmp_path.chmod(0o500)
+        try:
+            assert compile_cached(path, SOURCE) == parse_program(SOURCE)
+        finally:
+            tmp_path.chmod(0o700)
+
+    def test_prune(self, tmp_path):
+        (tmp_path / "sub").mkdir()
+        kept = self.write(tmp_path, "kept.jsk", SOURCE)
+        changed = self.write(tmp_path / "sub", "changed.jsk", SOURCE)
+        deleted = self.write(tmp_path / "sub", "deleted.jsk", SOURCE)
+        for path in (kept, changed, deleted):
+            compile_cached(path, SOURCE)
+        changed.write_text(SOURCE + "\n")
+        deleted.unlink()
+        (tmp_path / CACHE_DIR / "kept.jsk.tmp").write_bytes(b"partial")
+
+        removed = prune_cache(tmp_path)
+        assert sorted(p.name.split(".")[0] for p in removed) == ["changed", "deleted", "kept"]
+        assert self.entries(tmp_path) == [f"kept.jsk.{cache_key(source_digest(SOURCE))}.kemc"]
+        assert not (tmp_path / "sub" / CACHE_DIR).exists()
+
+        assert len(prune_cache(tmp_path, everything=True)) == 1
+        assert not (tmp_path / CACHE_DIR).exists()
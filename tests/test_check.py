@@ -0,0 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from kemlang.check import CheckCache, Diagnostic, check_files, check_source
+
+
+SOURCE = '''kem bhai
+aa x che y
+aa x che 1
+bhai bol (1 + @
+jo x {
+  aa q che 1
+  bhai bol q +
+}
+bhai bol q
+bhai bol "open
+aavjo bhai'''
+
+
+class TestCheckSource:
+    def test_reports_every_diagnostic_in_order(self):
+        assert check_source(SOURCE) == [
+            Diagnostic("ScopeError", "Undefined variable 'y'", 2, 10),
+            Diagnostic("ScopeError", "Variable 'x' already declared in this scope", 3, 4),
+            # The parser does not repeat the lexer's error for '@'
+            Diagnostic("LexerError", "Unexpected character '@'", 4, 15),
+            Diagnostic("ParseError", "Unexpected token '}'", 8, 1),
+            Diagnostic("ScopeError", "Undefined variable 'q'", 9, 10),
+            Diagnostic("LexerError", "Unterminated string", 10, 10),
+        ]
+
+    def test_clean_source(self):
+        assert check_source('kem bhai\naa x che 1\nfarvu {\n  aa y che x\n} jya sudhi x < 0\naavjo bhai') == []
+
+    def test_scopes_follow_the_interpreter(self):
+        source = '''kem bhai
+farvu {
+  aa i che 1
+} jya sudhi i < 3
+jo bhai chhe {
+  aa x che 1
+} nahi to {
+  aa x che 2
+}
+aa x che x
+aavjo bhai'''
+        assert check_source(source) == [
+            Diagnostic("ScopeError", "Undefined variable 'i'", 4, 13),
+            Diagnostic("ScopeError", "Undefined variable 'x'", 10, 10),
+        ]
+
+    def test_missing_program_fences(self):
+        assert check_source('bhai bol 1') == [
+            Diagnostic("ParseError", "Program must start with 'kem bhai'", 1, 1),
+            Diagnostic("ParseError", "Program must end with 'aavjo bhai'", 1, 11),
+        ]
+
+
+class TestCheckFiles:
+    def write(self, directory, name, text):
+        path = directory / name
+        path.write_text(text)
+        return path
+
+    def test_pool_and_cache(self, tmp_path):
+        good = self.write(tmp_path, "good.jsk", 'kem bhai\nbhai bol 1\naavjo bhai')
+        bad = self.write(tmp_path, "bad.jsk", 'kem bhai\nbhai bol z\naavjo bhai')
+        copy = self.write(tmp_path, "copy.jsk", 'kem bhai\nbhai bol z\naavjo bhai')
+        cache = CheckCache(tmp_path / "cache.json")
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = check_files([good, bad, copy], cache=cache, executor=pool)
+        assert list(results) == [good, bad, copy]
+        assert results[good] == []
+        assert results[bad] == results[copy] == [Diagnostic("ScopeError", "Undefined variable 'z'", 2, 10)]
+        assert len(cache.entries) == 2
+        cache.save()
+
+        # A fresh run is served from the cache without re-checking
+        reloaded = CheckCache(tmp_path / "cache.json")
+        assert reloaded.entries == cache.entries
+        assert check_files([good, bad], workers=1, cache=reloaded) == {good: [], bad: results[bad]}
+        assert not reloaded.changed
+
+    def test_stale_cache_is_ignored(self, tmp_path):
+        path = tmp_path / "cache.json"
+        path.write_text('{"version": "0.0.0", "entries": {"abc": []}}')
+        assert CheckCache(path).entries == {}
+        path.write_text('not json')
+        assert CheckCache(path).entries == {}
+
+    def test_undecodable_file(self, tmp_path):
+        path = tmp_path / "latin.jsk"
+        path.write_bytes(b'kem bhai\nbhai bol "\xe9"\naavjo bhai')
+        [diagnostic] = check_files([path])[path]
+        assert diagnostic.kind == "Error"
+        assert "UTF-8" in diagnostic.message
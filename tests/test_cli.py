@@ -1,3 +1,4 @@
+import json
 import pytest
 import tempfile
 from pathlib import Path
@@ -22,7 +23,7 @@ class TestCLI:
             aavjo bhai''')
             f.flush()
 
-            result = self.runner.invoke(app, ["run-file", f.name])
+            result = self.runner.invoke(app, ["run-file", f.name, "--no-cache"])
             assert result.exit_code == 0
             assert "Hello from CLI!" in result.stdout
 
@@ -36,7 +37,7 @@ class TestCLI:
             aavjo bhai''')
             f.flush()
 
-            result = self.runner.invoke(app, ["run-file", f.name, "--trace"])
+            result = self.runner.invoke(app, ["run-file", f.name, "--trace", "--no-cache"])
             assert result.exit_code == 0
             assert "Tokens:" in result.stdout
             assert "AST:" in result.stdout
@@ -44,6 +45,33 @@ class TestCLI:
 
         Path(f.name).unlink()
 
+    def test_run_file_vm_engine(self):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsk', delete=False) as f:
+            f.write('kem bhai\naa i che 0\nfarvu { i che i + 1 } jya sudhi i < 5\nbhai bol i\nbhai bol 1 / 0\naavjo bhai')
+            f.flush()
+
+            result = self.runner.invoke(app, ["run-file", f.name, "--engine", "vm", "--no-cache"])
+            assert result.exit_code == 1
+            assert result.stdout.splitlines() == ["5", "Runtime Error: Division by zero"]
+
+            result = self.runner.invoke(app, ["run-file", f.name, "--engine", "jit"])
+            assert result.exit_code == 1
+            assert "Unknown engine 'jit'" in result.stdout
+
+        Path(f.name).unlink()
+
+    def test_run_file_python_engine(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = Path(directory) / "prog.jsk"
+            dumped = Path(directory) / "prog.py"
+            source.write_text('kem bhai\naa x che 2\nbhai bol x * 21\n\nbhai bol x + "s"\naavjo bhai')
+
+            result = self.runner.invoke(app, ["run-file", str(source), "--engine", "python",
+                                              "--dump-python", str(dumped), "--no-cache"])
+            assert result.exit_code == 1
+            assert result.stdout.splitlines() == ["42", "Runtime Error: TypeError: cannot `+` int and str"]
+            assert "# line 3" in dumped.read_text()
+
     def test_run_nonexistent_file(self):
         result = self.runner.invoke(app, ["run-file", "nonexistent.jsk"])
         assert result.exit_code == 1
@@ -56,7 +84,7 @@ class TestCLI:
             aavjo bhai''')
             f.flush()
 
-            result = self.runner.invoke(app, ["run-file", f.name])
+            result = self.runner.invoke(app, ["run-file", f.name, "--no-cache"])
             assert result.exit_code == 1
 
         Path(f.name).unlink()
@@ -186,6 +214,94 @@ aavjo bhai''')
 
         Path(f.name).unlink()
 
+    def test_tokens_command_recover_reports_all_errors(self):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsk', delete=False) as f:
+            f.write('kem bhai\naa x che @\nbhai bol "open\naa y che 2\naavjo bhai')
+            f.flush()
+
+            result = self.runner.invoke(app, ["tokens", f.name, "--recover"])
+            assert result.exit_code == 1
+            assert "ERROR" in result.stdout
+            assert "AAVJO_BHAI" in result.stdout
+            assert "Unexpected character '@'" in result.stdout
+            assert "Unterminated string" in result.stdout
+
+        Path(f.name).unlink()
+
+    def test_machine_readable_output(self):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsk', delete=False) as f:
+            f.write('kem bhai\naa x che 42\nbhai bol x\naavjo bhai')
+            f.flush()
+
+            result = self.runner.invoke(app, ["tokens", f.name, "--format", "jsonl"])
+            assert result.exit_code == 0
+            records = [json.loads(line) for line in result.stdout.splitlines()]
+            assert records[0]["type"] == "KEM_BHAI"
+            assert records[-1]["type"] == "EOF"
+
+            result = self.runner.invoke(app, ["ast", f.name, "--format", "json"])
+            assert result.exit_code == 0
+            assert json.loads(result.stdout)[-1] == {"id": 4, "node": "Program", "statements": [1, 3]}
+
+            result = self.runner.invoke(app, ["ast", f.name, "--format", "binary"])
+            assert result.exit_code == 0
+            assert result.stdout_bytes.startswith(b"KEMA")
+
+            result = self.runner.invoke(app, ["ast", f.name, "--format", "xml"])
+            assert result.exit_code == 1
+            assert "Unknown format 'xml'" in result.stdout
+
+        Path(f.name).unlink()
+
+    def test_check_command_reports_all_problems(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "nested").mkdir()
+            (root / "ok.jsk").write_text('kem bhai\nbhai bol 1\naavjo bhai')
+            (root / "nested" / "bad.jsk").write_text('kem bhai\naa x che y\nbhai bol @\naavjo bhai')
+
+            result = self.runner.invoke(app, ["check", tmpdir, "--jobs", "2"])
+            assert result.exit_code == 1
+            assert "Undefined variable 'y'" in result.stdout
+            assert "Unexpected character '@'" in result.stdout
+            assert "2 problem(s) in 1 of 2 file(s)" in result.stdout
+            assert (root / ".kemcheck_cache.json").exists()
+
+            result = self.runner.invoke(app, ["check", tmpdir, "--json"])
+            assert result.exit_code == 1
+            problems = json.loads(result.stdout)
+            assert [(Path(p["file"]).name, p["kind"], p["line"], p["col"]) for p in problems] == [
+                ("bad.jsk", "ScopeError", 2, 10),
+                ("bad.jsk", "LexerError", 3, 10),
+            ]
+
+            result = self.runner.invoke(app, ["check", str(root / "ok.jsk"), "--no-cache"])
+            assert result.exit_code == 0
+            assert "No problems found" in result.stdout
+
+    def test_run_file_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            program = root / "prog.jsk"
+            program.write_text('kem bhai\naa x che 6\nbhai bol x * 7\naavjo bhai')
+
+            result = self.runner.invoke(app, ["run-file", str(program), "--no-cache"])
+            assert result.exit_code == 0
+            assert "42" in result.stdout
+            assert not (root / "__kemcache__").exists()
+
+            for _ in range(2):
+                result = self.runner.invoke(app, ["run-file", str(program)])
+                assert result.exit_code == 0
+                assert "42" in result.stdout
+            assert len(list((root / "__kemcache__").glob("prog.jsk.*.kemc"))) == 1
+
+            program.write_text('kem bhai\nbhai bol 1\naavjo bhai')
+            result = self.runner.invoke(app, ["cache-prune", tmpdir])
+            assert result.exit_code == 0
+            assert "Removed 1 cache file(s)" in result.stdout
+            assert not (root / "__kemcache__").exists()
+
     def test_repl_help_message(self):
         # Test that REPL shows help message on start
         # Note: This is a basic test since REPL is interactive
@@ -213,7 +329,7 @@ aavjo bhai''')
             aavjo bhai''')
             f.flush()
 
-            result = self.runner.invoke(app, ["run-file", f.name])
+            result = self.runner.invoke(app, ["run-file", f.name, "--no-cache"])
             assert result.exit_code == 1
             assert "Division by zero" in result.stdout
 
@@ -226,7 +342,7 @@ aavjo bhai''')
             aavjo bhai''')
             f.flush()
 
-            result = self.runner.invoke(app, ["run-file", f.name])
+            result = self.runner.invoke(app, ["run-file", f.name, "--no-cache"])
             assert result.exit_code == 0
             assert "Warning" in result.stdout
             assert ".jsk extension" in result.stdout
@@ -2,10 +2,13 @@ import pytest
 from io import StringIO
 from kemlang.interpreter import run, Interpreter, Environment
 from kemlang.parser import parse_program
+from kemlang.resolver import resolve
 from kemlang.errors import RuntimeError
 
 
 class TestExecution:
+    engine = "tree"
+
     def capture_output(self, source, input_data=""):
         """Helper to capture output and input for testing."""
         output = StringIO()
@@ -21,7 +24,7 @@ class TestExecution:
         def mock_print(text):
             output.write(str(text) + '\n')
 
-        exit_code = run(source, input_fn=mock_input, output_fn=mock_print)
+        exit_code = run(source, input_fn=mock_input, output_fn=mock_print, engine=self.engine)
         return output.getvalue(), exit_code
 
     def test_hello_world(self):
@@ -379,4 +382,132 @@ class TestExecution:
         output, exit_code = self.capture_output(source)
         assert exit_code == 0
         lines = output.strip().split('\n')
-        assert lines == ["0", "1", "2", "3", "4", "panch ma masti!"]
\ No newline at end of file
+        assert lines == ["0", "1", "2", "3", "4", "panch ma masti!"]
+
+
+class TestSlotExecution(TestExecution):
+    """The whole execution suite, run on programs resolved to frame slots."""
+    engine = "slots"
+
+
+class TestVMExecution(TestExecution):
+    """The whole execution suite, run on the bytecode VM."""
+    engine = "vm"
+
+
+class TestClosureExecution(TestExecution):
+    """The whole execution suite, run on closure-compiled programs."""
+    engine = "closure"
+
+
+class TestPythonExecution(TestExecution):
+    """The whole execution suite, run on programs transpiled to Python."""
+    engine = "python"
+
+
+class TestEngineParity:
+    PROGRAMS = [
+        # Control flow through nested scopes
+        '''kem bhai
+        aa i che 0
+        farvu {
+            aa j che i
+            i che i + 1
+            jo j % 2 == 0 { aagal vado }
+            farvu { aa k che j  j che j - 1  jo j < 2 { tame jao } } jya sudhi j > 0
+            bhai bol j
+            jo i > 6 { tame jao } nahi to { bhai bol -i }
+        } jya sudhi i < 10
+        bhai bol i
+        aavjo bhai''',
+        # Scoping: shadowing in blocks, redeclaration at top level
+        'kem bhai\naa x che 1\njo bhai chhe { aa x che 2\nbhai bol x }\nbhai bol x\naa x che 3\naavjo bhai',
+        'kem bhai\njo 1 { aa y che 1 }\nbhai bol y\naavjo bhai',
+        # A read before a declaration in the same block sees the outer variable
+        '''kem bhai
+        aa x che 1
+        aa n che 0
+        farvu {
+            bhai bol x
+            aa x che n * 10
+            jo 1 { jo 1 { x che x + 1 } }
+            bhai bol x
+            n che n + 1
+        } jya sudhi n < 3
+        bhai bol x
+        aavjo bhai''',
+        'kem bhai\njo 1 { bhai bol w\naa w che 1 }\naavjo bhai',
+        'kem bhai\nz che 1\naavjo bhai',
+        # Declarations stay inside their block and iteration
+        'kem bhai\naa n che 0\nfarvu { jo 1 { aa t che n } n che n + 1 } jya sudhi n < 2\nbhai bol t\naavjo bhai',
+        'kem bhai\naa n che 0\nfarvu { aa v che n  n che n + 1  farvu { aa v che 0  tame jao } jya sudhi 1 } '
+        'jya sudhi n < 3\nbhai bol n\naavjo bhai',
+        # Values and operator errors
+        'kem bhai\nbhai bol 7 / 2\nbhai bol 6 / 3\nbhai bol 5 % 0\naavjo bhai',
+        'kem bhai\nbhai bol 1 + bhai chhe\nbhai bol bhai chhe + bhai nathi\nbhai bol "a" + 1\naavjo bhai',
+        'kem bhai\nbhai bol "a" < "b"\naavjo bhai',
+        'kem bhai\nbhai bol -"a"\naavjo bhai',
+        'kem bhai\nbhai bol "" == 0\nbhai bol 1 == bhai chhe\njo "" { bhai bol 1 } nahi to { bhai bol 0 }\naavjo bhai',
+        'kem bhai\nbhai bol 2 * 3 - 4 / 4 + 7 % 4\nbhai bol 5 / 2 * 2\naavjo bhai',
+        # Loop control outside any loop
+        'kem bhai\nbhai bol 1\ntame jao\nbhai bol 2\naavjo bhai',
+        'kem bhai\njo 1 { aagal vado }\naavjo bhai',
+    ]
+
+    def outputs(self, source, engine):
+        output = []
+        exit_code = run(source, input_fn=lambda: "5", output_fn=output.append, engine=engine)
+        return output, exit_code
+
+    @pytest.mark.parametrize("engine", ["vm", "closure", "python"])
+    @pytest.mark.parametrize("source", PROGRAMS)
+    def test_matches_tree_walker(self, source, engine):
+        assert self.outputs(source, engine) == self.outputs(source, "tree")
+
+    @pytest.mark.parametrize("source", PROGRAMS)
+    def test_slots_match_tree_walker_or_fail_first(self, source):
+        errors = resolve(parse_program(source)).errors
+        if errors:
+            assert self.outputs(source, "slots") == ([f"Runtime Error: {errors[0].message}"], 1)
+        else:
+            assert self.outputs(source, "slots") == self.outputs(source, "tree")
+
+    @pytest.mark.parametrize("engine", ["slots", "vm", "closure", "python"])
+    @pytest.mark.parametrize("seed", range(4))
+    def test_generated_programs(self, seed, engine):
+        from benchmarks.generator import generate_program
+        source = generate_program(4096, seed=seed)
+        assert self.outputs(source, engine) == self.outputs(source, "tree")
+
+    def test_unknown_engine(self):
+        output, exit_code = self.outputs("kem bhai\naavjo bhai", "jit")
+        assert exit_code == 1
+        assert output == ["Error: Unknown execution engine 'jit'"]
+
+
+class TestScopeAllocation:
+    SOURCE = '''kem bhai
+    aa i che 0
+    farvu {
+        jo i % 2 == 0 { i che i + 1 } nahi to { i che i + 3 }
+    } jya sudhi i < 100
+    farvu {
+        aa j che i
+        i che j - 1
+        jo i % 7 == 0 { aagal vado }
+    } jya sudhi i > 0
+    bhai bol i
+    aavjo bhai'''
+
+    @pytest.mark.parametrize("engine", ["tree", "vm", "closure"])
+    def test_loops_allocate_at_most_one_scope(self, engine, monkeypatch):
+        created = []
+        init = Environment.__init__
+        monkeypatch.setattr(Environment, "__init__", lambda self, *args: created.append(self) or init(self, *args))
+
+        output = []
+        assert run(self.SOURCE, output_fn=output.append, engine=engine) == 0
+        assert output == ["0"]
+        # Globals, plus one scope for the loop that declares j; the VM
+        # still allocates that one for each of its 100 iterations
+        assert len(created) == (2 if engine != "vm" else 1 + 100)
@@ -0,0 +1,121 @@
+import pytest
+from kemlang.errors import KemError
+from kemlang.incremental import parse_source, relex, reparse, restart_token
+from kemlang.lexer import LexerError, tokenize
+from kemlang.parser import parse_program
+from kemlang.tokenbuffer import tokenize_buffer
+
+
+class TestIncrementalRelex:
+    SOURCE = 'kem bhai\naa x che 1\nbhai bol "a\nb"\nbhai bol x\naavjo bhai'
+
+    def test_restart_is_start_of_edited_line(self):
+        buffer = tokenize_buffer(self.SOURCE)
+        offset = self.SOURCE.index("che")
+
+        index = restart_token(buffer, offset)
+        assert buffer.lexeme_at(index) == "aa"
+
+    def test_restart_skips_multiline_string(self):
+        buffer = tokenize_buffer(self.SOURCE)
+        # The newline inside the string literal is not a restart point
+        offset = self.SOURCE.index("b\"")
+
+        index = restart_token(buffer, offset)
+        assert buffer.lexeme_at(index) == "bhai bol"
+
+    @pytest.mark.parametrize("anchor,removed,inserted", [
+        ("kem", 0, "\n"),
+        ("x che", 1, "count"),            # rename x
+        ("1\n", 1, "1 + 2 * 3"),           # longer expression
+        ("bhai bol \"", 0, 'bhai bol "new"\n'),
+        ("bhai bol x", 0, '"'),            # opens a string that swallows later lines
+        ('"a', 3, ""),                     # cuts a multi-line string open
+        ("kem", 56, ""),                   # delete everything
+    ])
+    def test_matches_full_tokenize(self, anchor, removed, inserted):
+        offset = self.SOURCE.index(anchor)
+        new_source = self.SOURCE[:offset] + inserted + self.SOURCE[offset + removed:]
+        try:
+            expected = tokenize(new_source)
+        except LexerError:
+            with pytest.raises(LexerError):
+                relex(tokenize_buffer(self.SOURCE), offset, removed, inserted)
+            return
+
+        assert list(relex(tokenize_buffer(self.SOURCE), offset, removed, inserted)) == expected
+
+    def test_invalid_edit_range(self):
+        with pytest.raises(ValueError):
+            relex(tokenize_buffer("x"), 1, 5, "")
+
+
+class TestIncrementalReparse:
+    SOURCE = """kem bhai
+aa x che 1
+bhai bol x + 2
+jo x > 0 {
+  bhai bol "positive"
+} nahi to {
+  bhai bol "other"
+}
+aa y che "a
+b"
+farvu {
+  x che x + 1
+} jya sudhi x < 3
+bhai bol y
+aavjo bhai"""
+
+    @staticmethod
+    def outcome(fn):
+        try:
+            return fn()
+        except KemError as e:
+            return (type(e).__name__, e.message, e.line, e.col)
+
+    @pytest.mark.parametrize("anchor,removed,inserted", [
+        ("x che 1", 1, "count"),             # rename in a declaration
+        ("\nbhai bol x", 0, "\n+ 3"),          # extends the statement before the edit
+        ('"positive"', 10, '"pos" + x'),     # inside a nested block
+        ("} nahi to", 9, "}"),               # drops the else branch
+        ("jo x", 0, "bhai bol 0\n"),          # inserts a statement
+        ('"a\nb"', 0, "1 +"),                # edits before a multi-line string
+        ('a\nb"', 0, '"\n'),                 # closes the string early
+        ("farvu {", 7, "farvu {{"),           # unbalanced braces
+        ("aavjo bhai", 10, ""),               # removes the program end
+        ("kem bhai", 3, "kim"),               # breaks the program start
+        ("bhai bol y", 0, "@"),               # lexical error
+    ])
+    def test_matches_full_parse(self, anchor, removed, inserted):
+        offset = self.SOURCE.index(anchor)
+        new_source = self.SOURCE[:offset] + inserted + self.SOURCE[offset + removed:]
+
+        expected = self.outcome(lambda: parse_program(new_source))
+        actual = self.outcome(lambda: reparse(parse_source(self.SOURCE), offset, removed, inserted).program)
+        assert actual == expected
+
+    def test_reuses_untouched_statements(self):
+        parsed = parse_source(self.SOURCE)
+        offset = self.SOURCE.index("x + 1")
+        edited = reparse(parsed, offset, 1, "y")
+
+        old, new = parsed.program.statements, edited.program.statements
+        assert new[:3] == old[:3] and all(a is b for a, b in zip(new[:3], old[:3], strict=True))
+        assert new[4] is not old[4]  # the loop holding the edit
+        assert new[5] is old[5]
+        assert edited.program == parse_program(edited.source)
+
+    def test_offsets_of_reused_statements(self):
+        parsed = parse_source(self.SOURCE)
+        edited = reparse(parsed, self.SOURCE.index("\naa x"), 0, "\n\n\n")
+        for index, stmt in enumerate(edited.program.statements):
+            if hasattr(stmt, "name"):
+                start = stmt.offset + edited.offset_shift(index)
+                assert edited.source[start:].startswith(stmt.name)
+
+    def test_chained_edits(self):
+        parsed = parse_source(self.SOURCE)
+        for anchor, inserted in [("bhai bol y", "bhai bol 1\n"), ("x < 3", "1 + "), ("aa x", "tame jao\n")]:
+            parsed = reparse(parsed, parsed.source.index(anchor), 0, inserted)
+            assert parsed.program == parse_program(parsed.source)
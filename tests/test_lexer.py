@@ -1,5 +1,9 @@
 import pytest
-from kemlang.lexer import Lexer, tokenize, LexerError
+from kemlang.lexer import (KEYWORDS, ByteLexer, KeywordTable, Lexer, RegexLexer, make_lexer, tokenize,
+                           tokenize_with_errors, LexerError)
+from kemlang.errors import render_diagnostic
+from kemlang.interpreter import run
+from kemlang.source import LineIndex, load_source, source_text
 from kemlang.types import TokenType
 
 
@@ -190,4 +194,322 @@ class TestLexer:
             TokenType.IDENTIFIER, TokenType.AAVJO_BHAI, TokenType.EOF
         ]
 
-        assert token_types == expected
\ No newline at end of file
+        assert token_types == expected
+
+
+class TestRegexLexer:
+    SOURCES = [
+        "kem bhai aavjo bhai bhai bol bapu tame bolo",
+        "nahi to jya sudhi tame jao aagal vado nahi tox bhai bolx",
+        "+ - * / % == != < > <= >= ( ) { }",
+        'aa x che "tab\\there" + "q\\"uote\\\\"\r\nbhai bol x',
+        '"line1\nline2" after',
+        "name123 _under 42 007 \t\n\n  trailing   ",
+        "",
+    ]
+
+    @staticmethod
+    def snapshot(tokens):
+        return [(t.type, t.lexeme, t.line, t.col, t.literal) for t in tokens]
+
+    @pytest.mark.parametrize("source", SOURCES)
+    def test_matches_classic_lexer(self, source):
+        assert self.snapshot(tokenize(source, "regex")) == self.snapshot(tokenize(source))
+
+    @pytest.mark.parametrize("source", [
+        "valid @ invalid",
+        "x = 1",
+        "a\n  !b",
+        '"unterminated\nstring',
+        'ok\n"bad\\x escape"',
+        '"ends with backslash\\',
+        "aa ² che 1",
+    ])
+    def test_matches_classic_errors(self, source):
+        with pytest.raises(LexerError) as classic:
+            tokenize(source)
+        with pytest.raises(LexerError) as regex:
+            tokenize(source, "regex")
+
+        assert (regex.value.message, regex.value.line, regex.value.col) == \
+            (classic.value.message, classic.value.line, classic.value.col)
+
+    def test_multiline_string_position(self):
+        tokens = tokenize('x "a\nb" y', "regex")
+
+        assert (tokens[1].line, tokens[1].col) == (1, 3)
+        assert (tokens[2].line, tokens[2].col) == (2, 4)
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            tokenize("x", "nope")
+
+
+class TestKeywordTable:
+    def test_longest_phrase_wins(self):
+        table = KeywordTable([("nahi", TokenType.NAHI), ("nahi to", TokenType.ELSE)])
+        source = "nahi to x"
+
+        assert table.match(source, 0, 4) == (TokenType.ELSE, 7)
+
+    def test_partial_phrase_falls_back_to_first_word(self):
+        source = "bapu tame x"
+
+        assert KEYWORDS.match(source, 0, 4) == (None, 4)
+        assert KEYWORDS.match("nahi tox", 0, 4) == (TokenType.NAHI, 4)
+
+    def test_registered_alias(self):
+        table = KEYWORDS.copy()
+        table.register("bolo bhai", TokenType.BHAI_BOL)
+        source = 'kem bhai bolo bhai "hi" aavjo bhai'
+
+        for lexer_class in (Lexer, RegexLexer):
+            tokens = lexer_class(source, table).tokenize()
+            assert tokens[1].type == TokenType.BHAI_BOL
+            assert tokens[1].lexeme == "bolo bhai"
+
+        # The shared default table is untouched
+        assert tokenize(source)[1].type == TokenType.IDENTIFIER
+
+    def test_invalid_phrase(self):
+        with pytest.raises(ValueError):
+            KeywordTable([("kem  bhai", TokenType.KEM_BHAI)])
+
+
+class TestStringScanningAndInterning:
+    @pytest.mark.parametrize("engine", ["classic", "regex"])
+    def test_long_string_with_escapes(self, engine):
+        body = "word \\n\\t\\\"q\\\" \\\\ " * 2000
+        tokens = tokenize(f'"{body}"', engine)
+
+        assert tokens[0].literal == "word \n\t\"q\" \\ " * 2000
+
+    @pytest.mark.parametrize("engine", ["classic", "regex"])
+    def test_identifiers_and_literals_are_interned(self, engine):
+        tokens = tokenize('aa total che "x"\ntotal che total + "x"', engine)
+        names = [t.lexeme for t in tokens if t.type == TokenType.IDENTIFIER]
+        literals = [t.literal for t in tokens if t.type == TokenType.STRING]
+
+        assert len(names) == 3 and all(name is names[0] for name in names)
+        assert literals[0] is literals[1]
+
+
+class TestByteLexer:
+    SOURCES = [
+        'kem bhai\naa naam che "કેમ છો"\nbhai bol naam + "!"\naavjo bhai',
+        "aa café che 42\naa x٣ che ٣\n  bhai bol café",
+        'aa s che "multi\nલાઇન" x\n  y',
+        "kem bhaié bhai bol",
+    ]
+
+    @pytest.mark.parametrize("source", SOURCES)
+    def test_matches_str_lexer(self, source):
+        expected = TestRegexLexer.snapshot(tokenize(source))
+
+        assert TestRegexLexer.snapshot(ByteLexer(source.encode("utf-8")).tokenize()) == expected
+
+    @pytest.mark.parametrize("source", [
+        "aa નામ che 1 — 2",
+        'x\n"é\\é"',
+        '"ગુજરાતી',
+        "x = é",
+    ])
+    def test_matches_str_errors(self, source):
+        with pytest.raises(LexerError) as expected:
+            tokenize(source)
+        with pytest.raises(LexerError) as actual:
+            ByteLexer(source.encode("utf-8")).tokenize()
+
+        assert (actual.value.message, actual.value.line, actual.value.col) == \
+            (expected.value.message, expected.value.line, expected.value.col)
+
+    @pytest.mark.parametrize("phrase", ["bhai bol", "nahi to", "jya sudhi"])
+    @pytest.mark.parametrize("follower", ["\u00a0x", "\u0964", "ક", "\u0abe", "é"])
+    def test_non_ascii_after_multiword_keyword(self, phrase, follower):
+        source = f"{phrase}{follower} 1"
+        expected = RegexLexer(source, recover=True)
+        actual = ByteLexer(source.encode("utf-8"), recover=True)
+
+        assert TestRegexLexer.snapshot(actual.tokenize()) == TestRegexLexer.snapshot(expected.tokenize())
+        assert [(e.message, e.line, e.col) for e in actual.errors] == \
+            [(e.message, e.line, e.col) for e in expected.errors]
+
+    def test_crlf_in_string_is_normalized(self):
+        tokens = ByteLexer(b'"a\r\nb" x').tokenize()
+
+        assert tokens[0].literal == "a\nb"
+        assert (tokens[1].line, tokens[1].col) == (2, 4)
+
+    def test_mapped_file(self, tmp_path):
+        path = tmp_path / "prog.jsk"
+        path.write_text('kem bhai\nbhai bol "નમસ્તે"\naavjo bhai', encoding="utf-8")
+        data = load_source(path)
+
+        expected = tokenize(path.read_text(encoding="utf-8"))
+        assert TestRegexLexer.snapshot(ByteLexer(data).tokenize()) == TestRegexLexer.snapshot(expected)
+        assert source_text(data) == path.read_text(encoding="utf-8")
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.jsk"
+        path.write_text("")
+
+        assert load_source(path) == b""
+        assert [t.type for t in tokenize(load_source(path))] == [TokenType.EOF]
+
+
+class TestLineIndex:
+    def test_positions(self):
+        lines = LineIndex("ab\nc\n\nxyz")
+
+        assert len(lines) == 4
+        assert [lines.position(offset) for offset in (0, 2, 3, 5, 6, 8)] == \
+            [(1, 1), (1, 3), (2, 1), (3, 1), (4, 1), (4, 3)]
+        assert [lines.line_text(line) for line in range(1, 5)] == ["ab", "c", "", "xyz"]
+
+    def test_byte_source_counts_columns_in_characters(self):
+        lines = LineIndex("નમ x\r\ny".encode("utf-8"))
+
+        assert lines.position(7) == (1, 4)
+        assert lines.line_text(1) == "નમ x"
+        assert lines.position(10) == (2, 1)
+
+    @pytest.mark.parametrize("line_break", ["\n", "\r\n", "\r"])
+    def test_line_breaks_match_decoded_text(self, line_break):
+        source = line_break.join(["kem bhai", "aa x che @", "aavjo bhai"])
+        text = source_text(source.encode("utf-8"))
+        offset = source.index("@")
+
+        for lines in (LineIndex(source), LineIndex(source.encode("utf-8"))):
+            assert len(lines) == 3
+            assert lines.position(offset) == LineIndex(text).position(text.index("@")) == (2, 10)
+            assert lines.line_text(2) == "aa x che @"
+
+    @pytest.mark.parametrize("engine", ["classic", "regex"])
+    def test_tokens_share_one_index(self, engine):
+        tokens = tokenize('aa x che "a\nb"\n  x', engine)
+
+        assert all(t.lines is tokens[0].lines for t in tokens)
+        assert [t.offset for t in tokens[:4]] == [0, 3, 5, 9]
+        assert (tokens[-2].lexeme, tokens[-2].line, tokens[-2].col) == ("x", 3, 3)
+
+    def test_render_diagnostic_with_shared_index(self):
+        source = "kem bhai\naa x che @\naavjo bhai"
+        lines = LineIndex(source)
+
+        assert render_diagnostic(source, 2, 10, "Unexpected character '@'", lines=lines) == (
+            "Error: Unexpected character '@'\n"
+            " --> line 2:10\n"
+            "2 | aa x che @\n"
+            "             ^"
+        )
+        assert render_diagnostic(source, 9, 1, "oops", lines=lines) == "Error: oops (line 9:1)"
+
+
+class TestGujaratiScript:
+    PROGRAM = (
+        "કેમ ભાઈ\n"
+        "આ ગણતરી છે ૦\n"
+        "ફરવું {\n"
+        "  ગણતરી છે ગણતરી + 1\n"
+        "} જ્યાં સુધી ગણતરી < 3\n"
+        "જો ગણતરી == 3 { ભાઈ બોલ ભાઈ છે } નહિ તો { ભાઈ બોલ \"ના\" }\n"
+        "આવજો ભાઈ"
+    )
+
+    @pytest.mark.parametrize("engine", ["classic", "regex", "bytes"])
+    def test_keywords_and_identifiers(self, engine):
+        source = self.PROGRAM.encode("utf-8") if engine == "bytes" else self.PROGRAM
+        tokens = tokenize(source, "regex" if engine == "bytes" else engine)
+        pairs = [(t.type, t.lexeme) for t in tokens if t.type != TokenType.NEWLINE]
+
+        assert pairs[:5] == [
+            (TokenType.KEM_BHAI, "કેમ ભાઈ"),
+            (TokenType.AA, "આ"),
+            (TokenType.IDENTIFIER, "ગણતરી"),
+            (TokenType.CHE, "છે"),
+            (TokenType.INTEGER, "૦"),
+        ]
+        assert (TokenType.JYA_SUDHI, "જ્યાં સુધી") in pairs
+        assert (TokenType.BHAI_CHHE, "ભાઈ છે") in pairs
+        assert (TokenType.ELSE, "નહિ તો") in pairs
+
+    @pytest.mark.parametrize("source", [
+        "ભાઈ છેx ભાઈ છે",     # keyword prefix of a longer word
+        "કેમ ભાઈે x",          # phrase followed by a combining mark
+        "x²y _ચલ1",
+        "aa x che 1 ે",       # a mark cannot start a token
+        "aa કિ che ૧૨",
+    ])
+    def test_engines_agree(self, source):
+        def outcome(data, engine):
+            try:
+                return TestRegexLexer.snapshot(tokenize(data, engine))
+            except LexerError as e:
+                return (e.message, e.line, e.col)
+
+        expected = outcome(source, "classic")
+        assert outcome(source, "regex") == expected
+        assert outcome(source.encode("utf-8"), "regex") == expected
+
+    def test_program_runs(self):
+        output = []
+        assert run(self.PROGRAM, input_fn=lambda: "", output_fn=output.append) == 0
+        assert output == ["true"]
+
+
+class TestRecoveringLexer:
+    SOURCE = 'kem bhai\naa x che @ 1\naa y che "a\\zb" ! 2\nbhai bol "open\\q\naavjo bhai'
+
+    def outcome(self, source, engine):
+        data = source.encode("utf-8") if engine == "bytes" else source
+        tokens, errors = tokenize_with_errors(data, "regex" if engine == "bytes" else engine)
+        return TestRegexLexer.snapshot(tokens), [(e.message, e.line, e.col) for e in errors]
+
+    @pytest.mark.parametrize("engine", ["classic", "regex", "bytes"])
+    def test_reports_every_error_in_one_pass(self, engine):
+        tokens, errors = self.outcome(self.SOURCE, engine)
+
+        assert errors == [
+            ("Unexpected character '@'", 2, 10),
+            ("Unknown escape sequence '\\z'", 3, 12),
+            ("Unexpected character '!'", 3, 17),
+            ("Unknown escape sequence '\\q'", 4, 15),
+            ("Unterminated string", 4, 10),
+        ]
+        error_tokens = [(lexeme, literal) for kind, lexeme, _, _, literal in tokens
+                        if kind == TokenType.ERROR]
+        assert error_tokens == [
+            ("@", "Unexpected character '@'"),
+            ('"a\\zb"', "Unknown escape sequence '\\z'"),
+            ("!", "Unexpected character '!'"),
+            ('"open\\q', "Unknown escape sequence '\\q'"),
+        ]
+        # Scanning carries on normally after each error
+        assert tokens[-2][0] == TokenType.AAVJO_BHAI
+        assert (TokenType.INTEGER, "2", 3, 19, 2) in tokens
+
+    @pytest.mark.parametrize("source", ['"\\', 'x ²y', '"é\\é" — "', 'aa ે x'])
+    def test_engines_agree(self, source):
+        expected = self.outcome(source, "classic")
+        assert self.outcome(source, "regex") == expected
+        assert self.outcome(source, "bytes") == expected
+
+    def test_clean_source_has_no_errors(self):
+        tokens, errors = tokenize_with_errors("aa x che 1")
+        assert errors == [] and tokens == tokenize("aa x che 1")
+
+    def test_make_lexer(self):
+        assert type(make_lexer("x")) is Lexer
+        assert type(make_lexer("x", "regex")) is RegexLexer
+        assert type(make_lexer(b"x", "regex")) is ByteLexer
+
+        lexer = make_lexer("aa @", "regex", recover=True)
+        assert [t.type for t in lexer.tokenize()][-2] == TokenType.ERROR
+        assert [error.message for error in lexer.errors] == ["Unexpected character '@'"]
+
+        with pytest.raises(ValueError, match="Unknown lexer engine"):
+            make_lexer("x", "jit")
+
+    def test_strict_mode_still_raises(self):
+        with pytest.raises(LexerError, match="Unexpected character '@'"):
+            Lexer(self.SOURCE).tokenize()
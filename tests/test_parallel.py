@@ -0,0 +1,73 @@
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+
+from kemlang.lexer import Lexer, LexerError
+from kemlang.parallel import split_chunks, tokenize_buffer_parallel, tokenize_parallel
+from kemlang.tokenbuffer import tokenize_buffer
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def outcome(fn):
+    try:
+        return [(t.type, t.lexeme, t.line, t.col, t.literal) for t in fn()]
+    except LexerError as e:
+        return (e.message, e.line, e.col)
+
+
+class TestParallelTokenize:
+    SOURCES = [
+        'kem bhai\naa x che 1\njo x < 2 {\n  bhai bol "small"\n} nahi to {\n  x che x + 1\n}\naavjo bhai\n' * 20,
+        # Multi-line strings that cross several chunk boundaries
+        'aa s che "one\ntwo\nthree\nfour"\nbhai bol s\n' * 15,
+        'x\n"\n"\n' * 20,
+        'aa t che "a\\n\nb\\"\n\n" y\n' * 10 + 'aavjo bhai',
+    ]
+
+    @pytest.mark.parametrize("source", SOURCES)
+    @pytest.mark.parametrize("chunk_size", [1, 5, 16, 64])
+    def test_matches_serial_lexer(self, pool, source, chunk_size):
+        expected = outcome(lambda: Lexer(source).tokenize())
+
+        assert outcome(lambda: tokenize_parallel(source, chunk_size=chunk_size, executor=pool)) == expected
+
+    @pytest.mark.parametrize("source", [
+        'x\n' * 30 + 'aa y che @\n' + 'z\n' * 30,
+        'x\n' * 30 + 'aa s che "never closed\n' + 'z\n' * 30,
+        'aa s che "ok\nstill\n' + 'x\n' * 30 + '"\n' + '"\\q"\n',
+    ])
+    def test_errors_match_serial_lexer(self, pool, source):
+        with pytest.raises(LexerError) as expected:
+            Lexer(source).tokenize()
+        with pytest.raises(LexerError) as actual:
+            tokenize_parallel(source, chunk_size=8, executor=pool)
+
+        assert (actual.value.message, actual.value.line, actual.value.col) == \
+            (expected.value.message, expected.value.line, expected.value.col)
+
+    def test_buffer_offsets_are_rebased(self, pool):
+        source = self.SOURCES[1]
+        parallel = tokenize_buffer_parallel(source, chunk_size=10, executor=pool)
+        serial = tokenize_buffer(source)
+
+        assert list(parallel.starts) == list(serial.starts)
+        assert list(parallel.ends) == list(serial.ends)
+        assert [parallel.literal_at(i) for i in range(len(parallel))] == \
+            [serial.literal_at(i) for i in range(len(serial))]
+
+    def test_own_pool(self):
+        source = self.SOURCES[0]
+        assert tokenize_parallel(source, workers=2, chunk_size=100) == Lexer(source).tokenize()
+
+    def test_small_source_stays_in_process(self):
+        assert tokenize_parallel("aa x che 1") == Lexer("aa x che 1").tokenize()
+
+    def test_chunks_start_lines(self):
+        source = "ab\ncd\nef\n"
+        assert split_chunks(source, 1) == [0, 3, 6]
+        assert split_chunks(source, 4) == [0, 6]
+        assert split_chunks(source, 100) == [0]
@@ -1,10 +1,11 @@
 import pytest
-from kemlang.parser import Parser, parse_program, ParseError
-from kemlang.lexer import tokenize
+from kemlang.parser import Parser, StackParser, parse_program, ParseError
+from kemlang.lexer import Lexer, tokenize
+from kemlang.errors import LexerError
 from kemlang.types import (
     Program, Block, Stmt, Expr,
     Print, Declaration, Assignment, If, While, Break, Continue,
-    Binary, Unary, Literal, Variable, Input, TokenType
+    Binary, Unary, Literal, Variable, Input, TokenType, BinaryOp, UnaryOp
 )
 
 
@@ -118,11 +119,11 @@ class TestParser:
 
         # Should parse as 1 + (2 * 3) due to precedence
         assert isinstance(expr, Binary)
-        assert expr.operator.type == TokenType.PLUS
+        assert expr.operator == BinaryOp.ADD
         assert isinstance(expr.left, Literal)
         assert expr.left.value == 1
         assert isinstance(expr.right, Binary)
-        assert expr.right.operator.type == TokenType.MULTIPLY
+        assert expr.right.operator == BinaryOp.MULTIPLY
 
     def test_comparison_operators(self):
         source = 'kem bhai\nbhai bol 1 < 2\naavjo bhai'
@@ -130,7 +131,7 @@ class TestParser:
 
         expr = program.statements[0].expression
         assert isinstance(expr, Binary)
-        assert expr.operator.type == TokenType.LESS
+        assert expr.operator == BinaryOp.LESS
 
     def test_equality_operators(self):
         source = 'kem bhai\nbhai bol 1 == 2\naavjo bhai'
@@ -138,7 +139,7 @@ class TestParser:
 
         expr = program.statements[0].expression
         assert isinstance(expr, Binary)
-        assert expr.operator.type == TokenType.EQUAL
+        assert expr.operator == BinaryOp.EQUAL
 
     def test_unary_minus(self):
         source = 'kem bhai\nbhai bol -42\naavjo bhai'
@@ -146,7 +147,7 @@ class TestParser:
 
         expr = program.statements[0].expression
         assert isinstance(expr, Unary)
-        assert expr.operator.type == TokenType.MINUS
+        assert expr.operator == UnaryOp.NEGATE
         assert isinstance(expr.right, Literal)
         assert expr.right.value == 42
 
@@ -157,9 +158,9 @@ class TestParser:
         expr = program.statements[0].expression
         # Should parse as (1 + 2) * 3
         assert isinstance(expr, Binary)
-        assert expr.operator.type == TokenType.MULTIPLY
+        assert expr.operator == BinaryOp.MULTIPLY
         assert isinstance(expr.left, Binary)
-        assert expr.left.operator.type == TokenType.PLUS
+        assert expr.left.operator == BinaryOp.ADD
 
     def test_variable_expression(self):
         source = 'kem bhai\nbhai bol variable_name\naavjo bhai'
@@ -200,20 +201,20 @@ class TestParser:
         expr = program.statements[0].expression
         # Should parse as (1 + (2 * 3)) + 4
         assert isinstance(expr, Binary)
-        assert expr.operator.type == TokenType.PLUS
+        assert expr.operator == BinaryOp.ADD
         assert isinstance(expr.right, Literal)
         assert expr.right.value == 4
 
         left = expr.left
         assert isinstance(left, Binary)
-        assert left.operator.type == TokenType.PLUS
+        assert left.operator == BinaryOp.ADD
         assert isinstance(left.left, Literal)
         assert left.left.value == 1
 
         # The 2 * 3 part
         mult_expr = left.right
         assert isinstance(mult_expr, Binary)
-        assert mult_expr.operator.type == TokenType.MULTIPLY
+        assert mult_expr.operator == BinaryOp.MULTIPLY
 
     def test_comparison_precedence(self):
         # Test that + has higher precedence than ==
@@ -223,9 +224,45 @@ class TestParser:
         expr = program.statements[0].expression
         # Should parse as (1 + 2) == 3
         assert isinstance(expr, Binary)
-        assert expr.operator.type == TokenType.EQUAL
+        assert expr.operator == BinaryOp.EQUAL
         assert isinstance(expr.left, Binary)
-        assert expr.left.operator.type == TokenType.PLUS
+        assert expr.left.operator == BinaryOp.ADD
+
+    def test_left_associativity(self):
+        source = 'kem bhai\nbhai bol 8 - 4 - 2 == 2 != bhai chhe\naavjo bhai'
+        expr = parse_program(source).statements[0].expression
+
+        # Should parse as (((8 - 4) - 2) == 2) != bhai chhe
+        assert expr.operator == BinaryOp.NOT_EQUAL
+        assert expr.left.operator == BinaryOp.EQUAL
+        minus = expr.left.left
+        assert minus.operator == BinaryOp.SUBTRACT
+        assert minus.right.value == 2
+        assert minus.left.operator == BinaryOp.SUBTRACT
+
+    def test_long_operator_chain(self):
+        # A flat chain must not recurse once per operator
+        source = 'kem bhai\nbhai bol ' + ' + '.join(['1'] * 5000) + '\naavjo bhai'
+        expr = parse_program(source).statements[0].expression
+
+        depth = 0
+        while isinstance(expr, Binary):
+            expr = expr.left
+            depth += 1
+        assert depth == 4999
+
+    def test_operator_nodes_are_compact(self):
+        source = 'kem bhai\nbhai bol -a * 2\naavjo bhai'
+        expr = parse_program(source).statements[0].expression
+
+        assert expr.operator is BinaryOp.MULTIPLY
+        assert expr.operator.symbol == "*"
+        assert expr.offset == source.index("*")
+        assert expr.left.operator is UnaryOp.NEGATE
+        assert expr.left.offset == source.index("-")
+        assert not hasattr(expr, "__dict__")
+        with pytest.raises(AttributeError):
+            expr.left = expr.right
 
     def test_missing_program_start(self):
         source = 'bhai bol "hello"'
@@ -303,4 +340,96 @@ class TestParser:
         if_stmt = program.statements[0]
 
         assert isinstance(if_stmt, If)
-        assert len(if_stmt.then_branch.statements) == 0
\ No newline at end of file
+        assert len(if_stmt.then_branch.statements) == 0
+
+    def test_collect_errors(self):
+        source = 'kem bhai\naa che 1\njo x {\n  bhai bol (1\n}\nbhai bol 2\naavjo bhai'
+        parser = Parser(tokenize(source), collect_errors=True)
+        program = parser.parse()
+
+        assert [(e.message, e.line, e.col) for e in parser.errors] == [
+            ("Expected variable name after 'aa'", 2, 4),
+            ("Expected ')' after expression", 5, 1),
+        ]
+        # The block and the statements around the errors are kept
+        assert isinstance(program.statements[0], If)
+        assert program.statements[1] == Print(Literal(2))
+
+    def test_parser_pulls_tokens_lazily(self):
+        source = 'kem bhai\naa x che 1 + 2\nbhai bol x\naavjo bhai'
+        pulled = []
+
+        def stream():
+            for token in Lexer(source).iter_tokens():
+                pulled.append(token)
+                yield token
+
+        parser = Parser(stream())
+        assert len(pulled) == 1  # only the lookahead token
+
+        program = parser.parse()
+        assert program == Parser(tokenize(source)).parse()
+        assert program == parse_program(source, "regex")
+
+    @pytest.mark.parametrize("mode", ["recursive", "stack"])
+    def test_lexer_errors_take_precedence(self, mode):
+        # The missing 'kem bhai' is found before the lexer reaches '@'
+        with pytest.raises(LexerError, match="Unexpected character '@'"):
+            parse_program("bhai bol 1\naavjo bhai\n@", mode=mode)
+
+
+class TestStackParser:
+    SOURCES = [
+        'kem bhai\nbhai bol -(1 + 2) * -3 - 4 - 5 == 6 != bhai nathi\naavjo bhai',
+        'kem bhai\naa x che 0\nfarvu {\n  x che x + 1\n  jo x % 2 == 0 {\n    aagal vado\n'
+        '  } nahi to {\n    bhai bol x\n  }\n} jya sudhi x < 5\naavjo bhai',
+        # Errors inside nested blocks are recovered from as in Parser
+        'kem bhai\njo 1 {\n  aa che 2\n  farvu { bhai bol (1 } jya sudhi 1\n  bhai bol 3\n}\naavjo bhai',
+        'kem bhai\njo 1 {\n  jo 2 { bhai bol 1\n}\nbhai bol 2\naavjo bhai',
+        'kem bhai\nfarvu { } bhai bol 1\naavjo bhai',
+        'kem bhai\nbhai bol 1\n',
+        'kem bhai\njo 1 { bhai bol (1 + 2\naavjo bhai',
+        'bhai bol 1\naavjo bhai',
+    ]
+
+    @staticmethod
+    def outcome(parser_class, source):
+        try:
+            return parser_class(tokenize(source)).parse()
+        except ParseError as e:
+            return (e.message, e.line, e.col)
+
+    @pytest.mark.parametrize("source", SOURCES)
+    def test_matches_recursive_parser(self, source):
+        assert self.outcome(StackParser, source) == self.outcome(Parser, source)
+
+    def test_deeply_nested_blocks(self):
+        depth = 5000
+        source = 'kem bhai\n' + 'jo 1 {\n' * depth + 'bhai bol 1\n' + '}\n' * depth + 'aavjo bhai'
+        with pytest.raises(RecursionError):
+            parse_program(source)
+
+        node = parse_program(source, mode="stack").statements[0]
+        levels = 0
+        while isinstance(node, If):
+            node = node.then_branch.statements[0]
+            levels += 1
+        assert levels == depth
+        assert isinstance(node, Print)
+
+    def test_deeply_nested_expressions(self):
+        depth = 20000
+        source = 'kem bhai\nbhai bol ' + '-(1 * ' * depth + '2' + ')' * depth + '\naavjo bhai'
+        expr = parse_program(source, mode="stack").statements[0].expression
+
+        levels = 0
+        while isinstance(expr, Unary):
+            assert expr.right.operator == BinaryOp.MULTIPLY
+            expr = expr.right.right
+            levels += 1
+        assert levels == depth
+        assert expr == Literal(2)
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="Unknown parser mode"):
+            parse_program('kem bhai\naavjo bhai', mode="loop")
@@ -5,6 +5,8 @@ from kemlang.parser import parse_program, ParseError
 from kemlang.fmt import format_code
 from kemlang.interpreter import run
 from kemlang.types import TokenType
+from kemlang.tokenbuffer import tokenize_buffer
+from kemlang.incremental import relex
 import string
 import random
 
@@ -293,3 +295,32 @@ aavjo bhai'''
                     raise
             except Exception as e:
                 pytest.fail(f"Unexpected crash in example {i}: {type(e).__name__}: {e}")
+
+    # Fragments that exercise keywords, multi-line strings and seams
+    SOURCE_PIECES = ['kem bhai', 'aavjo bhai', 'bhai bol', 'nahi', ' to', 'nahi to', 'jya sudhi',
+                     ' ', '\n', '\r\n', 'x', 'abc', '42', '"str"', '"a\\nb"', '"multi\nline"',
+                     '"', '\\', '==', '=', '<', '{', '}', '(', '@']
+
+    @settings(max_examples=300)
+    @given(st.lists(st.sampled_from(SOURCE_PIECES), max_size=25), st.data())
+    def test_incremental_relex_matches_full_tokenize(self, pieces, data):
+        """Property: relex() after any edit equals a full tokenize of the new text."""
+        source = ''.join(pieces)
+        try:
+            buffer = tokenize_buffer(source)
+        except LexerError:
+            assume(False)
+
+        offset = data.draw(st.integers(min_value=0, max_value=len(source)))
+        removed = data.draw(st.integers(min_value=0, max_value=len(source) - offset))
+        inserted = ''.join(data.draw(st.lists(st.sampled_from(self.SOURCE_PIECES), max_size=4)))
+        new_source = source[:offset] + inserted + source[offset + removed:]
+
+        def outcome(fn):
+            try:
+                return [(t.type, t.lexeme, t.line, t.col, t.literal) for t in fn()]
+            except LexerError as e:
+                return (e.message, e.line, e.col)
+
+        assert outcome(lambda: relex(buffer, offset, removed, inserted)) == \
+            outcome(lambda: tokenize(new_source))
@@ -0,0 +1,71 @@
+from kemlang.interpreter import run
+from kemlang.parser import parse_program
+from kemlang.resolver import LocalAssignment, LocalDeclaration, LocalVariable, Scope, resolve
+from kemlang.types import Binary, If, While
+
+
+SOURCE = '''kem bhai
+aa x che 1
+aa y che 2
+farvu {
+  aa x che y
+  jo x { x che x + 1  y che x }
+} jya sudhi y < x
+aavjo bhai'''
+
+
+class TestResolver:
+    def test_bindings(self):
+        resolution = resolve(parse_program(SOURCE))
+        assert resolution.errors == [] and resolution.size == 2
+
+        first, second, loop = resolution.program.statements
+        assert first == LocalDeclaration("x", 0, first.initializer)
+        assert second.slot == 1
+        assert isinstance(loop, While) and isinstance(loop.body, Scope) and loop.body.size == 1
+
+        inner_x, branch = loop.body.statements
+        # The if block declares nothing, so it opens no frame of its own
+        assert branch.then_branch.size == 0
+        # The initializer is resolved before the new x exists
+        assert inner_x == LocalDeclaration("x", 0, LocalVariable("y", 0, 1))
+        assert isinstance(branch, If) and branch.condition == LocalVariable("x", 1, 0)
+        increment, copy = branch.then_branch.statements
+        assert increment == LocalAssignment("x", 1, 0, Binary(LocalVariable("x", 1, 0), increment.value.operator,
+                                                              increment.value.right))
+        assert copy == LocalAssignment("y", 0, 1, LocalVariable("x", 1, 0))
+        # The loop condition only sees the scope around the loop
+        assert loop.condition.right == LocalVariable("x", 0, 0)
+
+    def test_errors_carry_positions(self):
+        source = 'kem bhai\naa x che y\naa x che 1\njo 1 { aa z che 1 }\nz che x\naavjo bhai'
+        resolution = resolve(parse_program(source), source)
+        assert [(error.message, error.line, error.col) for error in resolution.errors] == [
+            ("Undefined variable 'y'", 2, 10),
+            ("Variable 'x' already declared in this scope", 3, 4),
+            ("Undefined variable 'z'", 5, 1),
+        ]
+
+    def test_errors_are_reported_before_running(self):
+        output = []
+        source = 'kem bhai\nbhai bol 1\njo bhai nathi { bhai bol missing }\naavjo bhai'
+        assert run(source, output_fn=output.append, engine="slots") == 1
+        assert output == ["Runtime Error: Undefined variable 'missing'"]
+
+        output = []
+        assert run(source, output_fn=output.append, engine="tree") == 0
+        assert output == ["1"]
+
+    def test_frames_are_fresh_per_block_run(self):
+        source = '''kem bhai
+        aa n che 0
+        farvu {
+            jo n > 0 { bhai bol n }
+            aa seen che n * 10
+            n che n + 1
+            bhai bol seen
+        } jya sudhi n < 3
+        aavjo bhai'''
+        output = []
+        assert run(source, output_fn=output.append, engine="slots") == 0
+        assert output == ["0", "1", "10", "2", "20"]
@@ -0,0 +1,156 @@
+import io
+import json
+import marshal
+import struct
+
+import pytest
+
+from kemlang.errors import ParseError
+from kemlang.fmt import Formatter
+from kemlang.interpreter import Interpreter
+from kemlang.lexer import iter_tokens, tokenize
+from kemlang.parser import Parser, StackParser, parse_program
+from kemlang.serialize import OUTPUT_FORMATS, read_program, write_program, write_tokens
+from kemlang.types import Binary, BinaryOp, Literal, Print, Program
+
+
+SOURCE = '''kem bhai
+aa x che 10
+aa s che "a\\"b ચલ"
+jya sudhi {
+  x che x - 3
+  jo x % 2 == 0 { aagal vado } nahi to { bhai bol -x + 1 }
+  jo x < 0 { tame jao }
+} farvu x > 0
+bhai bol s + (x * 2) != bhai nathi
+aavjo bhai
+'''
+
+
+def dump(program, fmt):
+    stream = io.BytesIO()
+    write_program(program.statements, stream, fmt)
+    return stream.getvalue()
+
+
+def run(program):
+    output = []
+    Interpreter(lambda: "", output.append).interpret(program)
+    return output
+
+
+class TestSerialize:
+    @pytest.mark.parametrize("fmt", OUTPUT_FORMATS)
+    def test_round_trip(self, fmt):
+        program = parse_program(SOURCE)
+        loaded = read_program(io.BytesIO(dump(program, fmt)))
+
+        assert loaded == program
+        assert Formatter().format_program(loaded) == Formatter().format_program(program)
+        assert run(loaded) == run(program)
+        # Offsets survive too, so runtime errors can still point at the source
+        assert loaded.statements[0].offset == program.statements[0].offset
+
+    def test_jsonl_records(self):
+        lines = dump(Program([Print(Binary(Literal(1), BinaryOp.ADD, Literal(True)))]), "jsonl")
+        assert [json.loads(line) for line in lines.splitlines()] == [
+            {"id": 0, "node": "Literal", "value": 1},
+            {"id": 1, "node": "Literal", "value": True},
+            {"id": 2, "node": "Binary", "left": 0, "operator": "+", "right": 1, "offset": -1},
+            {"id": 3, "node": "Print", "expression": 2},
+            {"id": 4, "node": "Program", "statements": [3]},
+        ]
+
+    def test_json_is_one_document_of_the_same_records(self):
+        program = parse_program(SOURCE)
+        records = json.loads(dump(program, "json"))
+        assert records == [json.loads(line) for line in dump(program, "jsonl").splitlines()]
+        assert json.loads(dump(Program([]), "json")) == [{"id": 0, "node": "Program", "statements": []}]
+
+    def test_optional_fields_may_be_omitted(self):
+        text = '{"id": 0, "node": "Variable", "name": "x"}\n{"id": 1, "node": "Program", "statements": [0]}'
+        program = read_program(io.BytesIO(text.encode()))
+        assert program.statements[0].name == "x" and program.statements[0].offset == -1
+
+    def test_statements_are_written_as_parsed(self):
+        source = "kem bhai\nbhai bol 1\nbhai bol 2"
+        stream = io.BytesIO()
+        with pytest.raises(ParseError, match="Program must end with 'aavjo bhai'") as error:
+            write_program(Parser(iter_tokens(source)).iter_statements(), stream, "jsonl")
+        assert (error.value.line, error.value.col) == (3, 11)
+        # Both statements went out before the error; the Program record never did
+        assert len(stream.getvalue().splitlines()) == 4
+
+    @pytest.mark.parametrize("fmt", OUTPUT_FORMATS)
+    def test_deep_nesting(self, fmt):
+        depth = 5000
+        source = "kem bhai\nbhai bol " + "-(" * depth + "1" + ")" * depth + "\naavjo bhai"
+        data = dump(StackParser(tokenize(source)).parse(), fmt)
+        # The AST is too deep to compare recursively, so compare re-dumps
+        assert dump(read_program(io.BytesIO(data)), fmt) == data
+
+    @pytest.mark.parametrize("data", [
+        b"",
+        b'{"id": 0, "node": "Print", "expression": 5}',
+        b'{"id": 0, "node": "Nope"}',
+        b'{"id": 0, "node": "Literal", "value": 1}',
+    ])
+    def test_malformed_streams(self, data):
+        with pytest.raises(ValueError):
+            read_program(io.BytesIO(data))
+
+    @pytest.mark.parametrize("child", [-1, 1, 2, True])
+    def test_child_ids_must_be_earlier_records(self, child):
+        records = [{"id": 0, "node": "Literal", "value": 1},
+                   {"id": 1, "node": "Print", "expression": child},
+                   {"id": 2, "node": "Program", "statements": [1]}]
+        text = "\n".join(json.dumps(record) for record in records)
+        with pytest.raises(ValueError, match="Malformed AST record 1"):
+            read_program(io.BytesIO(text.encode()))
+
+        def print_record(node_id):
+            # Length, then the Print class code and its child id as int32 values
+            return struct.pack("<Icici", 10, b"i", 2, b"i", node_id)
+
+        binary = dump(Program([Print(Literal(1))]), "binary")
+        assert print_record(0) in binary
+        binary = binary.replace(print_record(0), print_record(child))
+        with pytest.raises(ValueError, match="Malformed AST record 1"):
+            read_program(io.BytesIO(binary))
+
+    def test_binary_values(self):
+        big = 3 ** 100
+        program = Program([Print(Binary(Literal(big), BinaryOp.SUBTRACT, Literal(-big))),
+                           Print(Literal("ચલ")), Print(Literal(False)), Print(Literal(-(2 ** 31))), Print(Literal(2 ** 31))])
+        assert read_program(io.BytesIO(dump(program, "binary"))) == program
+
+    @pytest.mark.parametrize("data", [
+        b"KEMA\x01" + marshal.dumps(((11, 1),)),
+        b"KEMA\x02\x05\x00\x00\x00i",
+        b"KEMA\x02\x02\x00\x00\x00x",
+        b"KEMA\x02\x01\x00\x00",
+        b"KEMA\x02\x05\x00\x00\x00i\x63\x00\x00\x00",
+    ])
+    def test_malformed_binary_streams(self, data):
+        with pytest.raises(ValueError):
+            read_program(io.BytesIO(data))
+
+    def test_tokens_are_not_an_ast(self):
+        stream = io.BytesIO()
+        write_tokens(iter_tokens("bhai bol 1"), stream, "binary")
+        stream.seek(0)
+        with pytest.raises(ValueError, match="tokens"):
+            read_program(stream)
+
+    def test_token_records(self):
+        stream = io.BytesIO()
+        assert write_tokens(iter_tokens("aa x\nche 4", "regex"), stream, "jsonl") == 6
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert records[1] == {"type": "IDENTIFIER", "lexeme": "x", "line": 1, "col": 4,
+                              "offset": 3, "literal": None}
+        assert records[2]["type"] == "NEWLINE" and records[4]["literal"] == 4 and records[4]["line"] == 2
+        assert records[-1]["type"] == "EOF"
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown output format"):
+            write_tokens([], io.BytesIO(), "xml")
@@ -0,0 +1,61 @@
+import pytest
+from kemlang.lexer import tokenize, LexerError
+from kemlang.parser import Parser
+from kemlang.tokenbuffer import TokenBuffer, tokenize_buffer
+from kemlang.types import TokenType
+
+
+class TestTokenBuffer:
+    SOURCE = '''kem bhai
+aa msg che "multi
+line"
+bhai bol msg + "!"
+jo 1 <= 2 { tame jao }
+aavjo bhai'''
+
+    def test_views_match_tokenize(self):
+        buffer = tokenize_buffer(self.SOURCE)
+
+        assert list(buffer) == tokenize(self.SOURCE)
+        assert [buffer[i] for i in range(len(buffer))] == tokenize(self.SOURCE)
+
+    def test_arrays_hold_offsets_and_literals(self):
+        buffer = tokenize_buffer('aa x che 42')
+
+        assert len(buffer) == 5
+        assert buffer.type_at(3) == TokenType.INTEGER
+        assert (buffer.starts[3], buffer.ends[3]) == (9, 11)
+        assert buffer.lexeme_at(3) == "42"
+        assert buffer.literal_at(3) == 42
+        assert buffer.literal_at(0) is None
+        assert buffer.literals == [42]
+
+    def test_equal_literals_share_a_slot(self):
+        buffer = tokenize_buffer('"a" + "a" + x + x')
+
+        assert buffer.literals == ["a"]
+        assert buffer.literal_indices[0] == buffer.literal_indices[2] == 0
+        assert buffer[4].lexeme is buffer[6].lexeme
+
+    def test_position_lookup(self):
+        buffer = tokenize_buffer("a\n\n  b")
+
+        assert buffer.position(0) == (1, 1)
+        assert buffer.position(5) == (3, 3)
+        assert buffer[-1].type == TokenType.EOF
+        assert (buffer[-1].line, buffer[-1].col) == (3, 4)
+
+    def test_parser_accepts_buffer(self):
+        program = Parser(tokenize_buffer(self.SOURCE)).parse()
+
+        assert program == Parser(tokenize(self.SOURCE)).parse()
+
+    def test_manual_append(self):
+        buffer = TokenBuffer("x")
+        buffer.append(TokenType.IDENTIFIER, 0, 1)
+
+        assert buffer[0].lexeme == "x"
+
+    def test_lexer_errors_propagate(self):
+        with pytest.raises(LexerError):
+            tokenize_buffer('"unterminated')
@@ -0,0 +1,76 @@
+import pytest
+
+from kemlang.errors import RuntimeError
+from kemlang.interpreter import run
+from kemlang.parser import parse_program
+from kemlang.transpile import PythonInterpreter, transpile
+
+
+def outputs(source, engine):
+    output = []
+    exit_code = run(source, input_fn=lambda: "", output_fn=output.append, engine=engine)
+    return output, exit_code
+
+
+class TestTranspile:
+    def test_loop_lowering(self):
+        source = 'kem bhai\naa i che 0\nfarvu { i che i + 1 } jya sudhi i < 3\naavjo bhai'
+        text = transpile(parse_program(source)).text
+        assert "while True:" in text
+        assert "if not (" in text and "break" in text
+
+    def test_continue_still_checks_the_condition(self):
+        source = '''kem bhai
+        aa i che 0
+        farvu {
+            i che i + 1
+            jo i < 100 { aagal vado }
+            bhai bol "unreachable"
+        } jya sudhi i < 3
+        bhai bol i
+        aavjo bhai'''
+        assert outputs(source, "python") == (["3"], 0)
+        assert "continue" in transpile(parse_program(source)).text
+
+    def test_names_are_renamed_per_declaration(self):
+        source = '''kem bhai
+        aa _t1 che 1
+        aa ચલ che 2
+        aa _print che "p"
+        jo 1 { aa _t1 che _t1 + ચલ  bhai bol _t1 + 0 }
+        bhai bol _print
+        bhai bol _t1
+        aavjo bhai'''
+        assert outputs(source, "python") == outputs(source, "tree") == (["3", "p", "1"], 0)
+
+    def test_runtime_errors_map_to_jsk_lines(self):
+        source = 'kem bhai\naa x che 1\n\nbhai bol x + "s"\naavjo bhai'
+        interpreter = PythonInterpreter(output_fn=lambda text: None, source=source, filename="prog.jsk")
+        with pytest.raises(RuntimeError) as error:
+            interpreter.execute(parse_program(source))
+        assert error.value.line == 4
+        assert "# line 4" in transpile(parse_program(source), source).text
+
+    def test_python_tracebacks_point_into_the_jsk_file(self):
+        source = 'kem bhai\naa x che 1\naa n che 0\nfarvu { x che x * 1000  n che n + 1 } jya sudhi n < 120\n' \
+                 'bhai bol x / 1\naavjo bhai'
+        interpreter = PythonInterpreter(source=source, filename="huge.jsk")
+        with pytest.raises(OverflowError) as error:
+            interpreter.execute(parse_program(source))
+        lines = []
+        traceback = error.tb
+        while traceback:
+            if traceback.tb_frame.f_code.co_filename == "huge.jsk":
+                lines.append(traceback.tb_lineno)
+            traceback = traceback.tb_next
+        assert lines == [5]
+
+    def test_deeply_nested_loops_fall_back(self):
+        depth = 25
+        source = "kem bhai\n" + "farvu {\n" * depth + "bhai bol 1\n" + "} jya sudhi bhai nathi\n" * depth + "aavjo bhai"
+        with pytest.raises(SyntaxError):
+            transpile(parse_program(source)).compile()
+        assert outputs(source, "python") == (["1"], 0)
+
+    def test_empty_program(self):
+        assert outputs("kem bhai\naavjo bhai", "python") == ([], 0)